@@ -1,42 +1,80 @@
 #version 330 core
 
+// Variantes (core.shaders.VariantesShader):
+//   TEXTURED           -> multiplica pela textura uTex0
+//   TEXTURE_ARRAY      -> (com TEXTURED) uTex0 é sampler2DArray, camada uCamada
+//   UNLIT              -> só a cor base (HUD), sem iluminação
+//   BAKED              -> cor base * luz difusa assada no vértice (cenário estático)
+//   NUM_POINT_LIGHTS=N -> quantas pontuais do bloco entram no laço (0..4)
+//   CLUSTERED          -> pontuais vêm das listas por cluster (core.clusters)
+
 in vec3 vNormal;
 in vec3 vFragPos;
 in vec2 vUV;
+in vec3 vTint;
+#ifdef BAKED
+in vec3 vLuz;
+#endif
 
 out vec4 fragCor;
 
-uniform vec3 uTint;
-
 // textura
+#ifdef TEXTURED
+#ifdef TEXTURE_ARRAY
+uniform sampler2DArray uTex0;
+uniform int uCamada;
+#else
 uniform sampler2D uTex0;
-uniform bool uUseTex;
-
-// camera
-uniform vec3 viewPos;
-
-// HUD/Unlit
-uniform bool uUnlit;
+#endif
+#endif
 
+#if !defined(UNLIT) && !defined(BAKED)
 // =========================
-// Luz Direcional
+// Iluminação (UBO por frame)
 // =========================
-uniform vec3 uDirLightDir;
-uniform vec3 uDirLightColor;
-uniform float uDirLightIntensity;
-
-// ambiente
-uniform float uAmbientStrength;
-
+// tamanho dos arrays do bloco (core.iluminacao.NUM_POINT_LIGHTS), igual em toda variante
+#define MAX_POINT_LIGHTS 4
+
+#ifndef NUM_POINT_LIGHTS
+#define NUM_POINT_LIGHTS MAX_POINT_LIGHTS
+#endif
+
+layout(std140) uniform Luzes {
+    vec4 uViewPos;                        // xyz = câmera
+    vec4 uDirLight;                       // xyz = direção, w = intensidade
+    vec4 uDirLightColor;                  // rgb = cor, w = ambiente
+    vec4 uPointPos[MAX_POINT_LIGHTS];     // xyz = posição, w = alcance
+    vec4 uPointColor[MAX_POINT_LIGHTS];   // rgb = cor, w = intensidade
+};
+
+#ifdef CLUSTERED
 // =========================
-// Luzes Pontuais (4)
+// Clustered forward (core.clusters.ClustersLuzes)
 // =========================
-#define NUM_POINT_LIGHTS 4
+uniform samplerBuffer  uLuzesBuf;     // 2 texels por luz: pos+alcance, cor+intensidade
+uniform usamplerBuffer uGradeBuf;     // por cluster: (offset, quantidade)
+uniform usamplerBuffer uIndicesBuf;   // índices das luzes
+
+layout(std140) uniform Clusters {
+    vec4 uGrade;    // tiles x, tiles y, fatias
+    vec4 uProf;     // perto, longe, fatias / log(longe/perto)
+    vec4 uTela;     // largura, altura
+    vec4 uViewZ;    // linha 2 da view
+};
 
-uniform vec3  uPointPos[NUM_POINT_LIGHTS];
-uniform vec3  uPointColor[NUM_POINT_LIGHTS];
-uniform float uPointIntensity[NUM_POINT_LIGHTS];
-uniform float uPointRange[NUM_POINT_LIGHTS];
+int clusterDoFragmento() {
+    ivec3 g = ivec3(uGrade.xyz);
+
+    ivec2 tile = ivec2(gl_FragCoord.xy / uTela.xy * uGrade.xy);
+    tile = clamp(tile, ivec2(0), g.xy - 1);
+
+    float prof = -dot(uViewZ, vec4(vFragPos, 1.0));
+    int fatia = int(floor(log(max(prof, uProf.x) / uProf.x) * uProf.z));
+    fatia = clamp(fatia, 0, g.z - 1);
+
+    return (fatia * g.y + tile.y) * g.x + tile.x;
+}
+#endif
 
 // -------------------------
 // Funções auxiliares
@@ -48,67 +86,85 @@ float pointAttenuation(float dist, float range) {
     return smoothFactor * inv;
 }
 
+vec3 luzPontual(vec4 posAlcance, vec4 corInt, vec3 N, vec3 V, vec3 albedo) {
+    vec3 LpVec = posAlcance.xyz - vFragPos;
+    float dist = length(LpVec);
+    vec3 Lp = LpVec / max(dist, 0.0001);
 
-void main() {
+    float att = pointAttenuation(dist, posAlcance.w) * corInt.w;
 
-    // Cor base
-    vec3 albedo = uTint;
+    float diffP = max(dot(N, Lp), 0.0);
 
-    if (uUseTex) {
-        vec4 tex = texture(uTex0, vUV);
-        albedo *= tex.rgb;
-    }
+    vec3 Rp = reflect(-Lp, N);
+    float specP = pow(max(dot(V, Rp), 0.0), 32.0);
 
+    return (diffP * albedo + 0.35 * specP * vec3(1.0)) * corInt.rgb * att;
+}
+#endif
+
+
+void main() {
+
+    // Cor base
+    vec3 albedo = vTint;
+
+#ifdef TEXTURED
+#ifdef TEXTURE_ARRAY
+    vec4 tex = texture(uTex0, vec3(vUV, float(uCamada)));
+#else
+    vec4 tex = texture(uTex0, vUV);
+#endif
+    albedo *= tex.rgb;
+#endif
+
+#ifdef UNLIT
     // HUD/objetos sem luz
-    if (uUnlit) {
-        fragCor = vec4(albedo, 1.0);
-        return;
-    }
+    fragCor = vec4(albedo, 1.0);
+#elif defined(BAKED)
+    // ambiente + direcional + pontuais já somadas na CPU (sem especular)
+    fragCor = vec4(albedo * vLuz, 1.0);
+#else
 
     vec3 N = normalize(vNormal);
-    vec3 V = normalize(viewPos - vFragPos);
+    vec3 V = normalize(uViewPos.xyz - vFragPos);
 
     // =========================
     // AMBIENTE
     // =========================
-    vec3 ambient = uAmbientStrength * albedo;
+    vec3 ambient = uDirLightColor.w * albedo;
 
     // =========================
     // DIRECIONAL (Phong simples)
     // =========================
-    vec3 Ld = normalize(-uDirLightDir);
+    vec3 Ld = normalize(-uDirLight.xyz);
     float diffD = max(dot(N, Ld), 0.0);
 
     vec3 Rd = reflect(-Ld, N);
     float specD = pow(max(dot(V, Rd), 0.0), 32.0);
 
     vec3 dirLight = (diffD * albedo + 0.35 * specD * vec3(1.0))
-                    * uDirLightColor * uDirLightIntensity;
+                    * uDirLightColor.rgb * uDirLight.w;
 
     // =========================
-    // PONTUAIS (4)
+    // PONTUAIS (ativas do bloco ou só as do cluster)
     // =========================
     vec3 pointSum = vec3(0.0);
 
+#if defined(CLUSTERED)
+    uvec2 lista = texelFetch(uGradeBuf, clusterDoFragmento()).xy;
+    for (uint k = 0u; k < lista.y; k++) {
+        int i = int(texelFetch(uIndicesBuf, int(lista.x + k)).r);
+        pointSum += luzPontual(texelFetch(uLuzesBuf, 2 * i),
+                               texelFetch(uLuzesBuf, 2 * i + 1), N, V, albedo);
+    }
+#elif NUM_POINT_LIGHTS > 0
     for (int i = 0; i < NUM_POINT_LIGHTS; i++) {
-        vec3 LpVec = uPointPos[i] - vFragPos;
-        float dist = length(LpVec);
-        vec3 Lp = LpVec / max(dist, 0.0001);
-
-        float att = pointAttenuation(dist, uPointRange[i]) * uPointIntensity[i];
-
-        float diffP = max(dot(N, Lp), 0.0);
-
-        vec3 Rp = reflect(-Lp, N);
-        float specP = pow(max(dot(V, Rp), 0.0), 32.0);
-
-        vec3 lightP = (diffP * albedo + 0.35 * specP * vec3(1.0))
-                      * uPointColor[i] * att;
-
-        pointSum += lightP;
+        pointSum += luzPontual(uPointPos[i], uPointColor[i], N, V, albedo);
     }
+#endif
 
     vec3 color = ambient + dirLight + pointSum;
     fragCor = vec4(color, 1.0);
+#endif
 
 }
@@ -1,24 +1,55 @@
 #version 330 core
 
+// Variantes (core.shaders.VariantesShader):
+//   INSTANCED -> model/tint/normal vêm dos atributos por instância
+//   BAKED     -> luz difusa assada por vértice (game.nivel.NivelEstatico)
+
 layout(location = 0) in vec3 pos;
 layout(location = 1) in vec3 normal;
 layout(location = 2) in vec2 uv;
 
+#ifdef INSTANCED
+// por instância (core.instancias.LoteInstancias)
+layout(location = 3) in mat4 iModel;       // ocupa 3..6
+layout(location = 7) in vec3 iTint;
+layout(location = 8) in mat3 iNormalMat;   // ocupa 8..10
+
+uniform mat4 vp;
+#else
 uniform mat4 mvp;
 uniform mat4 model;
+uniform mat3 uNormalMat;   // inversa transposta (ou mat3(model)), vem da CPU
+uniform vec3 uTint;
+#endif
+
+#ifdef BAKED
+layout(location = 11) in vec3 luzAssada;   // engine.geometrias.LOC_LUZ_ASSADA
+out vec3 vLuz;
+#endif
 
 out vec3 vNormal;
 out vec3 vFragPos;
 out vec2 vUV;
+out vec3 vTint;
 
 void main() {
+#ifdef INSTANCED
+    vec4 worldPos = iModel * vec4(pos, 1.0);
+    gl_Position = vp * worldPos;
+    mat3 normalMat = iNormalMat;
+    vTint = iTint;
+#else
+    vec4 worldPos = model * vec4(pos, 1.0);
     gl_Position = mvp * vec4(pos, 1.0);
+    mat3 normalMat = uNormalMat;
+    vTint = uTint;
+#endif
 
-    vec4 worldPos = model * vec4(pos, 1.0);
     vFragPos = worldPos.xyz;
-
-    mat3 normalMat = transpose(inverse(mat3(model)));
     vNormal = normalize(normalMat * normal);
 
     vUV = uv;
+#ifdef BAKED
+    vLuz = luzAssada;
+#endif
 }
@@ -0,0 +1,95 @@
+"""
+Microbenchmark das matrizes de modelo (engine.transformacoes): a forma
+encadeada de hoje (translacao @ rotacaoY @ rotacaoX @ escala por objeto)
+contra trs() e as versões em lote. Não precisa de GL.
+
+Da pasta do projeto:
+
+    python src/bench_transformacoes.py
+    python src/bench_transformacoes.py --n 2000 --repeticoes 7
+"""
+import argparse
+import timeit
+
+import numpy as np
+
+from engine.transformacoes import (translacao, escala, rotacaoX, rotacaoY, trs, trs_lote,
+                                   translacoes, escalas, rotacoesX, rotacoesY)
+
+# diferença aceitável contra a encadeada: arredondamento de float32 (a ordem das contas muda)
+TOLERANCIA = 5e-7
+
+
+def _args():
+    ap = argparse.ArgumentParser(description="matrizes de modelo: encadeada x trs x lote")
+    ap.add_argument("--n", type=int, default=1000, help="objetos por lote")
+    ap.add_argument("--repeticoes", type=int, default=5, help="melhor de N medições")
+    return ap.parse_args()
+
+
+def _medir(f, vezes, repeticoes):
+    """Melhor tempo por chamada, em µs."""
+    return min(timeit.repeat(f, number=vezes, repeat=repeticoes)) / vezes * 1e6
+
+
+def rodar():
+    args = _args()
+    n = args.n
+    rng = np.random.default_rng(1)
+    pos = rng.uniform(-50.0, 50.0, (n, 3)).astype(np.float32)
+    yaw = rng.uniform(-np.pi, np.pi, n).astype(np.float32)
+    pitch = rng.uniform(-0.5, 0.5, n).astype(np.float32)
+    esc = rng.uniform(0.2, 2.0, (n, 3)).astype(np.float32)
+
+    # listas de float: é assim que os objetos do jogo chamam
+    pos_l, yaw_l, pitch_l, esc_l = pos.tolist(), yaw.tolist(), pitch.tolist(), esc.tolist()
+    p, y, x, s = pos_l[0], yaw_l[0], pitch_l[0], esc_l[0]
+    buf = np.empty((4, 4), dtype=np.float32)
+    buf_lote = np.empty((n, 4, 4), dtype=np.float32)
+
+    # conferência: tudo tem que bater com a encadeada
+    ref = np.stack([translacao(*pos_l[i]) @ rotacaoY(yaw_l[i]) @ rotacaoX(pitch_l[i]) @ escala(*esc_l[i])
+                    for i in range(n)])
+    erro = max(
+        float(np.abs(trs_lote(pos, yaw, pitch, esc) - ref).max()),
+        float(np.abs(translacoes(pos) @ rotacoesY(yaw) @ rotacoesX(pitch) @ escalas(esc) - ref).max()),
+        float(np.abs(trs(p, y, x, s) - ref[0]).max()),
+    )
+    print(f"erro máximo contra a encadeada: {erro:.2e}")
+    assert erro <= TOLERANCIA, f"trs/lotes divergem da forma encadeada ({erro:.2e} > {TOLERANCIA:.0e})"
+
+    vezes = 20000
+    print("\n1 objeto (µs por matriz):")
+    linhas = [
+        ("encadeada T @ Ry @ Rx @ S", lambda: translacao(*p) @ rotacaoY(y) @ rotacaoX(x) @ escala(*s)),
+        ("encadeada T @ Ry", lambda: translacao(*p) @ rotacaoY(y)),
+        ("trs(pos, yaw, pitch, esc)", lambda: trs(p, y, x, s)),
+        ("trs(pos, yaw)", lambda: trs(p, y)),
+        ("trs(..., out=buf)", lambda: trs(p, y, x, s, out=buf)),
+    ]
+    base = None
+    for nome, f in linhas:
+        us = _medir(f, vezes, args.repeticoes)
+        base = base or us
+        print(f"  {nome:<32} {us:8.2f}   {base / us:5.1f}x")
+
+    vezes = max(1, 200000 // n)
+    print(f"\n{n} objetos (µs por lote):")
+    linhas = [
+        ("laço encadeado", lambda: [translacao(*pos_l[i]) @ rotacaoY(yaw_l[i]) @ rotacaoX(pitch_l[i])
+                                    @ escala(*esc_l[i]) for i in range(n)]),
+        ("laço de trs", lambda: [trs(pos_l[i], yaw_l[i], pitch_l[i], esc_l[i]) for i in range(n)]),
+        ("lotes T @ Ry @ Rx @ S (matmul)", lambda: translacoes(pos) @ rotacoesY(yaw) @ rotacoesX(pitch)
+                                                  @ escalas(esc)),
+        ("trs_lote", lambda: trs_lote(pos, yaw, pitch, esc)),
+        ("trs_lote(out=buf)", lambda: trs_lote(pos, yaw, pitch, esc, out=buf_lote)),
+    ]
+    base = None
+    for nome, f in linhas:
+        us = _medir(f, vezes, args.repeticoes)
+        base = base or us
+        print(f"  {nome:<32} {us:10.1f}   {base / us:6.1f}x")
+
+
+if __name__ == "__main__":
+    rodar()
@@ -0,0 +1,225 @@
+import math
+import numpy as np
+from OpenGL.GL import *
+
+from core.estado_gl import estado_gl
+
+# Clustered forward: a tela é dividida em TILES_X x TILES_Y blocos e a
+# profundidade (espaço de visão) em FATIAS_Z fatias logarítmicas.
+# Por frame a CPU descobre quais luzes pontuais alcançam cada cluster e
+# sobe tudo em buffer textures; o basic.frag (variante CLUSTERED) só percorre
+# as luzes do cluster do fragmento.
+TILES_X = 16
+TILES_Y = 9
+FATIAS_Z = 16
+MAX_LUZES = 256
+
+# unidades de textura dos buffers (a 0 é a textura do material)
+UNIDADE_LUZES = 1     # samplerBuffer  RGBA32F: 2 texels por luz (pos+alcance, cor+intensidade)
+UNIDADE_GRADE = 2     # usamplerBuffer RG32UI:  por cluster (offset, quantidade)
+UNIDADE_INDICES = 3   # usamplerBuffer R32UI:   índices das luzes, agrupados por cluster
+
+# ponto de binding do bloco "Clusters" (basic.frag)
+PONTO_CLUSTERS = 1
+
+# Layout std140 do bloco (tudo vec4):
+#   uGrade  tiles x, tiles y, fatias, -
+#   uProf   perto, longe, fatias / log(longe/perto), -
+#   uTela   largura, altura (pixels do framebuffer), -, -
+#   uViewZ  linha 2 da view -> profundidade = -dot(uViewZ, vec4(p, 1))
+
+
+class _BufferTextura:
+    """Buffer + textura GL_TEXTURE_BUFFER apontando pra ele."""
+
+    def __init__(self, formato):
+        self.buf = glGenBuffers(1)
+        self.tex = glGenTextures(1)
+        glBindBuffer(GL_TEXTURE_BUFFER, self.buf)
+        glBufferData(GL_TEXTURE_BUFFER, 16, None, GL_STREAM_DRAW)
+        estado_gl.bind_texture(GL_TEXTURE_BUFFER, self.tex)
+        glTexBuffer(GL_TEXTURE_BUFFER, formato, self.buf)
+        glBindBuffer(GL_TEXTURE_BUFFER, 0)
+
+    def enviar(self, dados):
+        glBindBuffer(GL_TEXTURE_BUFFER, self.buf)
+        # orphaning: tamanho muda todo frame, glBufferData realoca sem esperar a GPU
+        glBufferData(GL_TEXTURE_BUFFER, max(dados.nbytes, 16), dados if dados.nbytes else None,
+                     GL_STREAM_DRAW)
+        glBindBuffer(GL_TEXTURE_BUFFER, 0)
+
+    def destroy(self):
+        estado_gl.esquecer_textura(self.tex)
+        glDeleteTextures(1, [self.tex])
+        glDeleteBuffers(1, [self.buf])
+
+
+class ClustersLuzes:
+    """
+    Luzes pontuais em quantidade (tochas/cristais por trecho) com culling
+    por cluster. A direcional e a ambiente continuam no bloco "Luzes".
+    """
+    NOME = "Clusters"
+
+    def __init__(self, perto, longe, tiles=(TILES_X, TILES_Y), fatias=FATIAS_Z,
+                 binding=PONTO_CLUSTERS):
+        self.perto = float(perto)
+        self.longe = float(longe)
+        self.tiles_x, self.tiles_y = int(tiles[0]), int(tiles[1])
+        self.fatias = int(fatias)
+        self.escala_z = self.fatias / math.log(self.longe / self.perto)
+        self.binding = binding
+
+        self.pos = np.zeros((0, 3), dtype=np.float32)
+        self.alcance = np.zeros(0, dtype=np.float32)
+        self._dados_luzes = np.zeros((0, 4), dtype=np.float32)
+        self._luzes_mudaram = True
+
+        self.bloco = np.zeros((4, 4), dtype=np.float32)
+        self.bloco[0, 0:3] = (self.tiles_x, self.tiles_y, self.fatias)
+        self.bloco[1, 0:3] = (self.perto, self.longe, self.escala_z)
+
+        self.ubo = glGenBuffers(1)
+        glBindBuffer(GL_UNIFORM_BUFFER, self.ubo)
+        glBufferData(GL_UNIFORM_BUFFER, self.bloco.nbytes, None, GL_DYNAMIC_DRAW)
+        glBindBuffer(GL_UNIFORM_BUFFER, 0)
+        glBindBufferBase(GL_UNIFORM_BUFFER, self.binding, self.ubo)
+
+        self.buf_luzes = _BufferTextura(GL_RGBA32F)
+        self.buf_grade = _BufferTextura(GL_RG32UI)
+        self.buf_indices = _BufferTextura(GL_R32UI)
+
+        self.ultimo_frame = {"luzes": 0, "visiveis": 0, "indices": 0, "max_cluster": 0}
+
+    @property
+    def num_clusters(self):
+        return self.tiles_x * self.tiles_y * self.fatias
+
+    def conectar(self, programa):
+        """Liga o bloco e os samplers numa variante CLUSTERED (as outras ignoram)."""
+        if not programa.bind_bloco(self.NOME, self.binding):
+            return
+        programa.use()
+        programa.set_int("uLuzesBuf", UNIDADE_LUZES)
+        programa.set_int("uGradeBuf", UNIDADE_GRADE)
+        programa.set_int("uIndicesBuf", UNIDADE_INDICES)
+
+    # <----------------------------->
+    # LUZES
+    # <----------------------------->
+    def definir_luzes(self, pos, cor, intensidade, alcance):
+        """Troca a lista de luzes pontuais (N qualquer, até MAX_LUZES)."""
+        pos = np.asarray(pos, dtype=np.float32).reshape(-1, 3)
+        n = len(pos)
+        if n > MAX_LUZES:
+            raise ValueError(f"{n} luzes pontuais (máximo {MAX_LUZES})")
+
+        dados = np.zeros((2 * n, 4), dtype=np.float32)
+        dados[0::2, 0:3] = pos
+        dados[0::2, 3] = alcance
+        dados[1::2, 0:3] = np.asarray(cor, dtype=np.float32).reshape(-1, 3)
+        dados[1::2, 3] = intensidade
+
+        # luzes apagadas não entram em cluster nenhum
+        ativa = (dados[1::2, 3] > 0.0) & (dados[0::2, 3] > 0.0)
+        self.pos = pos
+        self.alcance = np.where(ativa, dados[0::2, 3], 0.0).astype(np.float32)
+        self._dados_luzes = dados
+        self._luzes_mudaram = True
+
+    # <----------------------------->
+    # BINNING (CPU)
+    # <----------------------------->
+    def _fatia(self, prof):
+        f = np.floor(np.log(np.maximum(prof, self.perto) / self.perto) * self.escala_z)
+        return np.clip(f, 0, self.fatias - 1).astype(np.int32)
+
+    def _intervalos(self, view, vp):
+        """
+        Caixa de clusters de cada luz: (x0, x1, y0, y1, z0, z1) inclusivos.
+        Retorna (visivel (N,), caixas (N,6)). Conservador: a esfera inteira cabe na caixa.
+        """
+        n = len(self.pos)
+        r = self.alcance
+        caixas = np.zeros((n, 6), dtype=np.int32)
+
+        # profundidade no espaço de visão (câmera olha pra -z)
+        prof = -(self.pos @ view[2, 0:3] + view[2, 3])
+        p0 = prof - r
+        p1 = prof + r
+        visivel = (r > 0.0) & (p1 > self.perto) & (p0 < self.longe)
+        caixas[:, 4] = self._fatia(p0)
+        caixas[:, 5] = self._fatia(np.minimum(p1, self.longe))
+
+        # tela: projeta os 8 cantos do cubo que envolve a esfera
+        sinais = np.array([[sx, sy, sz] for sx in (-1, 1) for sy in (-1, 1) for sz in (-1, 1)],
+                          dtype=np.float32)
+        cantos = self.pos[:, None, :] + sinais[None, :, :] * r[:, None, None]      # (N,8,3)
+        clip = cantos @ vp[:, 0:3].T + vp[:, 3]                                   # (N,8,4)
+        w = clip[..., 3]
+
+        # canto atrás da câmera: a projeção não vale -> tela inteira
+        cruza = np.any(w <= 1e-4, axis=1)
+        w_seguro = np.where(w > 1e-6, w, 1.0)
+        ndc = clip[..., 0:2] / w_seguro[..., None]
+        lo = np.where(cruza[:, None], -1.0, ndc.min(axis=1))
+        hi = np.where(cruza[:, None], 1.0, ndc.max(axis=1))
+        visivel &= np.all(hi >= -1.0, axis=1) & np.all(lo <= 1.0, axis=1)
+
+        tiles = np.array([self.tiles_x, self.tiles_y], dtype=np.float32)
+        t0 = np.clip(np.floor((np.clip(lo, -1.0, 1.0) * 0.5 + 0.5) * tiles), 0, tiles - 1)
+        t1 = np.clip(np.floor((np.clip(hi, -1.0, 1.0) * 0.5 + 0.5) * tiles), 0, tiles - 1)
+        caixas[:, 0] = t0[:, 0]
+        caixas[:, 1] = t1[:, 0]
+        caixas[:, 2] = t0[:, 1]
+        caixas[:, 3] = t1[:, 1]
+        return visivel, caixas
+
+    def atualizar(self, view, vp, largura, altura):
+        """Refaz as listas por cluster pra câmera deste frame e sobe pra GPU."""
+        self.bloco[2, 0:2] = (largura, altura)
+        self.bloco[3] = view[2]
+        glBindBuffer(GL_UNIFORM_BUFFER, self.ubo)
+        glBufferSubData(GL_UNIFORM_BUFFER, 0, self.bloco.nbytes, self.bloco)
+        glBindBuffer(GL_UNIFORM_BUFFER, 0)
+
+        if self._luzes_mudaram:
+            self.buf_luzes.enviar(self._dados_luzes)
+            self._luzes_mudaram = False
+
+        n = len(self.pos)
+        ocupado = np.zeros((n, self.fatias, self.tiles_y, self.tiles_x), dtype=bool)
+        visivel, caixas = self._intervalos(view, vp)
+        for i in np.flatnonzero(visivel):
+            x0, x1, y0, y1, z0, z1 = caixas[i]
+            ocupado[i, z0:z1 + 1, y0:y1 + 1, x0:x1 + 1] = True
+
+        # (cluster, luz) em ordem de cluster -> lista de índices contígua por cluster
+        cluster, luz = np.nonzero(ocupado.reshape(n, -1).T)
+        contagem = np.bincount(cluster, minlength=self.num_clusters).astype(np.uint32)
+        grade = np.empty((self.num_clusters, 2), dtype=np.uint32)
+        grade[:, 1] = contagem
+        grade[:, 0] = np.cumsum(contagem) - contagem
+
+        self.buf_grade.enviar(grade)
+        self.buf_indices.enviar(luz.astype(np.uint32))
+
+        self.ultimo_frame = {
+            "luzes": n,
+            "visiveis": int(visivel.sum()),
+            "indices": int(luz.size),
+            "max_cluster": int(contagem.max()) if contagem.size else 0,
+        }
+
+    def ligar(self):
+        """Liga os três buffers nas unidades deles (antes dos draws)."""
+        estado_gl.bind_texture(GL_TEXTURE_BUFFER, self.buf_luzes.tex, unidade=UNIDADE_LUZES)
+        estado_gl.bind_texture(GL_TEXTURE_BUFFER, self.buf_grade.tex, unidade=UNIDADE_GRADE)
+        estado_gl.bind_texture(GL_TEXTURE_BUFFER, self.buf_indices.tex, unidade=UNIDADE_INDICES)
+
+    def destroy(self):
+        self.buf_luzes.destroy()
+        self.buf_grade.destroy()
+        self.buf_indices.destroy()
+        glDeleteBuffers(1, [self.ubo])
+        self.ubo = 0
@@ -0,0 +1,100 @@
+from OpenGL.GL import *
+
+
+class EstadoGL:
+    """
+    Cache dos binds do GL (programa, VAO, unidade ativa e texturas).
+    Só chama o GL quando o objeto ligado realmente muda; conta as chamadas
+    emitidas e as evitadas em cada frame.
+
+    Todo bind de programa/VAO/textura do projeto deve passar por aqui,
+    senão o cache fica desatualizado (use invalidar() nesse caso).
+    """
+
+    def __init__(self):
+        self.programa = None
+        self.vao = None
+        self.unidade = None
+        self.texturas = {}   # (unidade, alvo) -> id
+
+        self.emitidas = 0
+        self.evitadas = 0
+        self.ultimo_frame = {"emitidas": 0, "evitadas": 0}
+
+    # <----------------------------->
+    # BINDS
+    # <----------------------------->
+    def use_program(self, prog_id):
+        if self.programa == prog_id:
+            self.evitadas += 1
+            return
+        glUseProgram(prog_id)
+        self.programa = prog_id
+        self.emitidas += 1
+
+    def bind_vao(self, vao):
+        if self.vao == vao:
+            self.evitadas += 1
+            return
+        glBindVertexArray(vao)
+        self.vao = vao
+        self.emitidas += 1
+
+    def active_texture(self, unidade):
+        if self.unidade == unidade:
+            self.evitadas += 1
+            return
+        glActiveTexture(GL_TEXTURE0 + unidade)
+        self.unidade = unidade
+        self.emitidas += 1
+
+    def bind_texture(self, alvo, tex_id, unidade=None):
+        """Liga a textura na unidade pedida (ou na unidade ativa, se None)."""
+        if unidade is not None:
+            self.active_texture(unidade)
+        elif self.unidade is None:
+            self.active_texture(0)
+
+        chave = (self.unidade, alvo)
+        if self.texturas.get(chave) == tex_id:
+            self.evitadas += 1
+            return
+        glBindTexture(alvo, tex_id)
+        self.texturas[chave] = tex_id
+        self.emitidas += 1
+
+    # <----------------------------->
+    # OBJETOS APAGADOS / ESTADO EXTERNO
+    # <----------------------------->
+    def esquecer_programa(self, prog_id):
+        if self.programa == prog_id:
+            self.programa = None
+
+    def esquecer_vao(self, vao):
+        if self.vao == vao:
+            self.vao = None
+
+    def esquecer_textura(self, tex_id):
+        for chave, atual in list(self.texturas.items()):
+            if atual == tex_id:
+                del self.texturas[chave]
+
+    def invalidar(self):
+        self.programa = None
+        self.vao = None
+        self.unidade = None
+        self.texturas.clear()
+
+    # <----------------------------->
+    # ESTATÍSTICAS
+    # <----------------------------->
+    def novo_frame(self):
+        """Fecha as contagens do frame atual e zera para o próximo."""
+        self.ultimo_frame = {"emitidas": self.emitidas, "evitadas": self.evitadas}
+        self.emitidas = 0
+        self.evitadas = 0
+        return self.ultimo_frame
+
+
+# instância única (um contexto GL por processo)
+estado_gl = EstadoGL()
@@ -0,0 +1,160 @@
+from contextlib import nullcontext
+
+from OpenGL.GL import *
+
+from core.iluminacao import NUM_POINT_LIGHTS
+from core.instancias import LoteInstancias
+from core.renderizador import desenhar, defines_material
+from engine.geometrias import BufferAnel, malhas
+
+
+class FilaRender:
+    """
+    Fila de desenho do frame.
+    Quem desenha só enfileira (malha, model, textura, flags); no flush() a fila
+    ordena por estado (material -> textura -> malha), junta itens compatíveis
+    em draws instanciados e desenha o HUD por último, sem depth test.
+
+    Passe 3D: ordenado por estado e, dentro de cada grupo, da frente pra trás.
+    Passe HUD: mantém a ordem de envio (é pintura por cima), só junta itens
+    consecutivos com o mesmo estado.
+
+    O programa de cada grupo é a variante mínima de `shaders` (VariantesShader
+    do basic.vert/basic.frag): UNLIT/TEXTURED pelo material, INSTANCED quando
+    o grupo vira lote e NUM_POINT_LIGHTS = pontuais ativas em `luzes`
+    (ou CLUSTERED, se a fila recebeu `clusters`).
+
+    Com `perfil` (core.profiler.Profiler), os passes "3d" e "hud" são medidos
+    em CPU e GPU.
+
+    Todos os lotes sobem as instâncias no mesmo BufferAnel (`self.anel`),
+    que avança uma fatia por flush. Os lotes ficam por VAO e saem quando o
+    `registro` (engine.geometrias.RegistroMalhas) libera a malha.
+    """
+
+    def __init__(self, shaders, luzes=None, clusters=None, perfil=None, registro=None):
+        self.shaders = shaders
+        self.luzes = luzes
+        self.clusters = clusters
+        self.perfil = perfil
+        self.itens_3d = []
+        self.itens_hud = []
+        self._lotes = {}   # vao -> LoteInstancias
+        self.anel = BufferAnel()
+        self.registro = registro or malhas
+        self.registro.ao_liberar.append(self._esquecer_lote)
+
+        self.draws = 0
+        self.ultimo_frame = {"itens": 0, "draws": 0, "bytes": 0}
+
+    # <----------------------------->
+    # ENVIO
+    # <----------------------------->
+    @staticmethod
+    def _chave_tex(tex):
+        # camadas diferentes do mesmo array não podem cair no mesmo lote
+        return (tex.id, tex.indice) if tex is not None else (0, 0)
+
+    def enfileirar(self, malha, model, tex=None, tint=None, unlit=False, assada=False):
+        """assada: malha com luz assada por vértice (variante BAKED)."""
+        if tint is None:
+            tint = malha[4] if len(malha) >= 5 else (1.0, 1.0, 1.0)
+        chave = (unlit, assada) + self._chave_tex(tex) + (malha[0],)
+        self.itens_3d.append((chave, malha, model, tint, tex, unlit, assada))
+
+    def enfileirar_hud(self, malha, model, tex=None, tint=None):
+        if tint is None:
+            tint = malha[4] if len(malha) >= 5 else (1.0, 1.0, 1.0)
+        chave = (True, False) + self._chave_tex(tex) + (malha[0],)
+        self.itens_hud.append((chave, malha, model, tint, tex, True, False))
+
+    # <----------------------------->
+    # FLUSH
+    # <----------------------------->
+    def _lote(self, malha):
+        lote = self._lotes.get(malha[0])
+        if lote is None:
+            lote = LoteInstancias(malha, anel=self.anel)
+            self._lotes[malha[0]] = lote
+        return lote
+
+    def _esquecer_lote(self, vao):
+        # VAO apagado: o nome pode voltar numa malha nova (count, índices e atributos de instância outros)
+        lote = self._lotes.pop(vao, None)
+        if lote is not None:
+            lote.destroy()
+
+    def _programa(self, unlit, tex, instanced, assada=False):
+        pontuais = self.luzes.ativas if self.luzes is not None else NUM_POINT_LIGHTS
+        return self.shaders.obter(defines_material(
+            unlit=unlit, textured=tex is not None, instanced=instanced,
+            pontuais=pontuais, clustered=self.clusters is not None, baked=assada,
+            array=tex is not None and tex.alvo == GL_TEXTURE_2D_ARRAY))
+
+    def _desenhar_grupos(self, itens, vp):
+        i = 0
+        n = len(itens)
+        while i < n:
+            chave = itens[i][0]
+            j = i + 1
+            while j < n and itens[j][0] == chave:
+                j += 1
+
+            _, malha, model, tint, tex, unlit, assada = itens[i]
+            if j - i == 1:
+                prog = self._programa(unlit, tex, instanced=False, assada=assada)
+                desenhar(malha, model, vp, prog, tint=tint, tex=tex)
+            else:
+                lote = self._lote(malha)
+                for k in range(i, j):
+                    it = itens[k]
+                    lote.adicionar(it[1], it[2], it[3])
+                prog = self._programa(unlit, tex, instanced=True, assada=assada)
+                lote.desenhar(vp, prog, tex=tex)
+
+            self.draws += 1
+            i = j
+
+    def _passe(self, nome):
+        return self.perfil.passe(nome) if self.perfil is not None else nullcontext()
+
+    def flush(self, vp, vp_hud, cam_pos):
+        cx, cy, cz = float(cam_pos[0]), float(cam_pos[1]), float(cam_pos[2])
+
+        def ordem(it):
+            m = it[2]
+            dx = m[0, 3] - cx
+            dy = m[1, 3] - cy
+            dz = m[2, 3] - cz
+            return (it[0], dx * dx + dy * dy + dz * dz)
+
+        with self._passe("3d"):
+            self.itens_3d.sort(key=ordem)
+            if self.clusters is not None:
+                self.clusters.ligar()
+            self._desenhar_grupos(self.itens_3d, vp)
+
+        if self.itens_hud:
+            with self._passe("hud"):
+                glDisable(GL_DEPTH_TEST)
+                self._desenhar_grupos(self.itens_hud, vp_hud)
+                glEnable(GL_DEPTH_TEST)
+
+        self.anel.novo_frame()
+        self.ultimo_frame = {
+            "itens": len(self.itens_3d) + len(self.itens_hud),
+            "draws": self.draws,
+            "bytes": self.anel.ultimo_frame["bytes"],
+        }
+        self.itens_3d = []
+        self.itens_hud = []
+        self.draws = 0
+        return self.ultimo_frame
+
+    def destroy(self):
+        if self._esquecer_lote in self.registro.ao_liberar:
+            self.registro.ao_liberar.remove(self._esquecer_lote)
+        for lote in self._lotes.values():
+            lote.destroy()
+        self._lotes.clear()
+        self.anel.destroy()
@@ -0,0 +1,278 @@
+import ctypes
+import time
+
+import numpy as np
+from OpenGL.GL import *
+
+# Backend sem janela pro mesmo loop de main.main: contexto EGL (surfaceless)
+# ou OSMesa, tudo desenhado num FBO. Serve pra benchmark e teste por imagem
+# em máquina sem GPU (Mesa llvmpipe).
+#
+# O PyOpenGL escolhe a plataforma no primeiro import de OpenGL, então
+# PYOPENGL_PLATFORM ("egl"/"osmesa") tem que estar definido antes disso
+# (ver src/main_headless.py).
+
+
+def _contexto_egl(w, h):
+    from OpenGL import EGL
+
+    dpy = EGL.eglGetDisplay(EGL.EGL_DEFAULT_DISPLAY)
+    maj, mnr = EGL.EGLint(), EGL.EGLint()
+    if not EGL.eglInitialize(dpy, ctypes.pointer(maj), ctypes.pointer(mnr)):
+        raise RuntimeError("EGL: eglInitialize falhou")
+
+    attrs = (EGL.EGLint * 7)(
+        EGL.EGL_SURFACE_TYPE, EGL.EGL_PBUFFER_BIT,
+        EGL.EGL_RENDERABLE_TYPE, EGL.EGL_OPENGL_BIT,
+        EGL.EGL_DEPTH_SIZE, 24,
+        EGL.EGL_NONE,
+    )
+    cfg = EGL.EGLConfig()
+    n = EGL.EGLint()
+    if not EGL.eglChooseConfig(dpy, attrs, ctypes.pointer(cfg), 1, ctypes.pointer(n)) or n.value == 0:
+        raise RuntimeError("EGL: nenhuma config com OpenGL")
+
+    EGL.eglBindAPI(EGL.EGL_OPENGL_API)
+    ctx_attrs = (EGL.EGLint * 7)(
+        EGL.EGL_CONTEXT_MAJOR_VERSION, 3,
+        EGL.EGL_CONTEXT_MINOR_VERSION, 3,
+        EGL.EGL_CONTEXT_OPENGL_PROFILE_MASK, EGL.EGL_CONTEXT_OPENGL_CORE_PROFILE_BIT,
+        EGL.EGL_NONE,
+    )
+    ctx = EGL.eglCreateContext(dpy, cfg, EGL.EGL_NO_CONTEXT, ctx_attrs)
+    if ctx == EGL.EGL_NO_CONTEXT:
+        raise RuntimeError("EGL: não criou contexto 3.3 core")
+
+    # sem superfície (EGL_KHR_surfaceless_context); senão um pbuffer do tamanho pedido
+    if not EGL.eglMakeCurrent(dpy, EGL.EGL_NO_SURFACE, EGL.EGL_NO_SURFACE, ctx):
+        pb = (EGL.EGLint * 5)(EGL.EGL_WIDTH, w, EGL.EGL_HEIGHT, h, EGL.EGL_NONE)
+        surf = EGL.eglCreatePbufferSurface(dpy, cfg, pb)
+        if not EGL.eglMakeCurrent(dpy, surf, surf, ctx):
+            raise RuntimeError("EGL: eglMakeCurrent falhou")
+
+    def fechar():
+        EGL.eglMakeCurrent(dpy, EGL.EGL_NO_SURFACE, EGL.EGL_NO_SURFACE, EGL.EGL_NO_CONTEXT)
+        EGL.eglDestroyContext(dpy, ctx)
+        EGL.eglTerminate(dpy)
+
+    return fechar
+
+
+def _contexto_osmesa(w, h):
+    from OpenGL import osmesa, arrays
+
+    attrs = arrays.GLintArray.asArray([
+        osmesa.OSMESA_FORMAT, osmesa.OSMESA_RGBA,
+        osmesa.OSMESA_DEPTH_BITS, 24,
+        osmesa.OSMESA_PROFILE, osmesa.OSMESA_CORE_PROFILE,
+        osmesa.OSMESA_CONTEXT_MAJOR_VERSION, 3,
+        osmesa.OSMESA_CONTEXT_MINOR_VERSION, 3,
+        0,
+    ])
+    ctx = osmesa.OSMesaCreateContextAttribs(attrs, None)
+    if not ctx:
+        raise RuntimeError("OSMesa: não criou contexto 3.3 core")
+
+    # buffer da "janela" do OSMesa (não usado: o jogo desenha no FBO)
+    buf = arrays.GLubyteArray.zeros((h, w, 4))
+    if not osmesa.OSMesaMakeCurrent(ctx, buf, GL_UNSIGNED_BYTE, w, h):
+        raise RuntimeError("OSMesa: OSMesaMakeCurrent falhou")
+
+    def fechar():
+        osmesa.OSMesaDestroyContext(ctx)
+
+    fechar.buf = buf   # mantém o buffer vivo junto do contexto
+    return fechar
+
+
+CONTEXTOS = {"egl": _contexto_egl, "osmesa": _contexto_osmesa}
+
+
+class JanelaHeadless:
+    """
+    Mesma interface da core.janela.JanelaGLFW, sem tela:
+      - contexto EGL/OSMesa e um FBO (cor RGBA8 + depth 24) do tamanho pedido;
+      - roda `frames` frames e fecha;
+      - tempo fixo (dt = 1/fps) por padrão, pra imagens reproduzíveis: o relógio
+        anda um passo por frame (em trocar_buffers) e tempo() só lê, então
+        quantas vezes o jogo lê o relógio não muda a simulação;
+      - teclas roteirizadas: {frame: [(tecla, acao), ...]};
+      - mede CPU (eventos -> trocar_buffers) e GPU (par de GL_TIMESTAMP) por frame;
+        timestamp e não GL_TIME_ELAPSED pra não aninhar com os passes do
+        core.profiler, que usam GL_TIME_ELAPSED;
+      - ler_frames: guarda cada frame lido (cada `ler_a_cada` frames) em `ao_ler(i, rgb)`.
+    """
+
+    def __init__(self, frames, contexto="egl", fps=60.0, tempo_real=False,
+                 teclas=None, ao_ler=None, ler_a_cada=1):
+        if contexto not in CONTEXTOS:
+            raise ValueError(f"contexto '{contexto}' (use {', '.join(CONTEXTOS)})")
+        self.frames = int(frames)
+        self.contexto = contexto
+        self.dt = 1.0 / float(fps)
+        self.tempo_real = tempo_real
+        self.teclas = teclas or {}
+        self.ao_ler = ao_ler
+        self.ler_a_cada = max(1, int(ler_a_cada))
+
+        self.w = self.h = 0
+        self.renderer = ""
+        self.frame = 0
+        self._cb = None
+        self._fechar_ctx = None
+        self._t = 0.0
+        self._t0 = 0.0
+
+        self.fbo = 0
+        self._rbs = []
+
+        self.cpu_ms = []
+        self.gpu_ms = []
+        self._consultas = []     # (frame, query início, query fim) esperando resultado
+        self._livres = []
+        self._t_frame = None
+        self._q_inicio = 0
+
+    # <----------------------------->
+    # CONTEXTO / FBO
+    # <----------------------------->
+    def iniciar(self, w, h, titulo):
+        self.w, self.h = int(w), int(h)
+        self._fechar_ctx = CONTEXTOS[self.contexto](self.w, self.h)
+
+        self.fbo = glGenFramebuffers(1)
+        cor, prof = glGenRenderbuffers(2)
+        self._rbs = [cor, prof]
+
+        glBindRenderbuffer(GL_RENDERBUFFER, cor)
+        glRenderbufferStorage(GL_RENDERBUFFER, GL_RGBA8, self.w, self.h)
+        glBindRenderbuffer(GL_RENDERBUFFER, prof)
+        glRenderbufferStorage(GL_RENDERBUFFER, GL_DEPTH_COMPONENT24, self.w, self.h)
+        glBindRenderbuffer(GL_RENDERBUFFER, 0)
+
+        # o jogo nunca troca de framebuffer -> o FBO fica ligado o tempo todo
+        glBindFramebuffer(GL_FRAMEBUFFER, self.fbo)
+        glFramebufferRenderbuffer(GL_FRAMEBUFFER, GL_COLOR_ATTACHMENT0, GL_RENDERBUFFER, cor)
+        glFramebufferRenderbuffer(GL_FRAMEBUFFER, GL_DEPTH_ATTACHMENT, GL_RENDERBUFFER, prof)
+        if glCheckFramebufferStatus(GL_FRAMEBUFFER) != GL_FRAMEBUFFER_COMPLETE:
+            raise RuntimeError("FBO incompleto")
+
+        glViewport(0, 0, self.w, self.h)
+        self.renderer = (glGetString(GL_RENDERER) or b"").decode(errors="replace")
+        self._t0 = time.perf_counter()
+        return True
+
+    def encerrar(self):
+        self._coletar(esperar=True)
+        if self._livres:
+            glDeleteQueries(len(self._livres), self._livres)
+            self._livres = []
+        glBindFramebuffer(GL_FRAMEBUFFER, 0)
+        glDeleteFramebuffers(1, [self.fbo])
+        glDeleteRenderbuffers(len(self._rbs), self._rbs)
+        self.fbo = 0
+        if self._fechar_ctx is not None:
+            self._fechar_ctx()
+            self._fechar_ctx = None
+
+    # <----------------------------->
+    # INTERFACE DO LOOP
+    # <----------------------------->
+    def ao_teclar(self, cb):
+        self._cb = cb
+
+    def tempo(self):
+        if self.tempo_real:
+            return time.perf_counter() - self._t0
+        return self._t
+
+    def eventos(self):
+        # início do frame: CPU e query de GPU
+        self._t_frame = time.perf_counter()
+        self._q_inicio = self._query()
+        glQueryCounter(self._q_inicio, GL_TIMESTAMP)
+
+        if self._cb is not None:
+            for tecla, acao in self.teclas.get(self.frame, ()):
+                self._cb(self, tecla, 0, acao, 0)
+
+    def deve_fechar(self):
+        return self.frame >= self.frames
+
+    def tamanho_framebuffer(self):
+        return self.w, self.h
+
+    def trocar_buffers(self):
+        q_fim = self._query()
+        glQueryCounter(q_fim, GL_TIMESTAMP)
+        self._consultas.append((self.frame, self._q_inicio, q_fim))
+        if self._t_frame is not None:
+            self.cpu_ms.append((time.perf_counter() - self._t_frame) * 1000.0)
+
+        if self.ao_ler is not None and (self.frame % self.ler_a_cada == 0
+                                        or self.frame == self.frames - 1):
+            self.ao_ler(self.frame, self.ler_pixels())
+
+        # resultados de GPU chegam atrasados; pega o que já terminou
+        self._coletar(esperar=False)
+        self.frame += 1
+        self._t += self.dt   # relógio fixo: um passo por frame
+
+    # <----------------------------->
+    # LEITURA / TEMPOS
+    # <----------------------------->
+    def ler_pixels(self):
+        """Frame atual como array (h, w, 3) uint8, linha 0 em cima."""
+        glReadBuffer(GL_COLOR_ATTACHMENT0)
+        glPixelStorei(GL_PACK_ALIGNMENT, 1)
+        bruto = glReadPixels(0, 0, self.w, self.h, GL_RGB, GL_UNSIGNED_BYTE)
+        return np.frombuffer(bruto, dtype=np.uint8).reshape(self.h, self.w, 3)[::-1].copy()
+
+    def _query(self):
+        return self._livres.pop() if self._livres else int(np.ravel(glGenQueries(1))[0])
+
+    def _coletar(self, esperar):
+        pendentes = []
+        for frame, q0, q1 in self._consultas:
+            if frame == self.frame and not esperar:
+                pendentes.append((frame, q0, q1))
+                continue
+            # o fim fica pronto depois do início
+            if not esperar and not glGetQueryObjectiv(q1, GL_QUERY_RESULT_AVAILABLE):
+                pendentes.append((frame, q0, q1))
+                continue
+            t0, t1 = GLuint64(0), GLuint64(0)
+            glGetQueryObjectui64v(q0, GL_QUERY_RESULT, ctypes.byref(t0))
+            glGetQueryObjectui64v(q1, GL_QUERY_RESULT, ctypes.byref(t1))
+            self._registrar_gpu(frame, (t1.value - t0.value) / 1e6)
+            self._livres += [q0, q1]
+        self._consultas = pendentes
+
+    def _registrar_gpu(self, frame, ms):
+        while len(self.gpu_ms) <= frame:
+            self.gpu_ms.append(float("nan"))
+        self.gpu_ms[frame] = ms
+
+    def resumo(self, descartar=0):
+        """Estatística dos tempos por frame (ms), ignorando os `descartar` primeiros."""
+        def stats(v):
+            v = np.asarray(v[descartar:], dtype=np.float64)
+            v = v[~np.isnan(v)]
+            if v.size == 0:
+                return None
+            return {
+                "media": float(v.mean()),
+                "p50": float(np.percentile(v, 50)),
+                "p95": float(np.percentile(v, 95)),
+                "max": float(v.max()),
+            }
+
+        return {
+            "frames": self.frame,
+            "tamanho": [self.w, self.h],
+            "contexto": self.contexto,
+            "renderer": self.renderer,
+            "cpu_ms": stats(self.cpu_ms),
+            "gpu_ms": stats(self.gpu_ms),
+        }
+
@@ -0,0 +1,125 @@
+import numpy as np
+from OpenGL.GL import *
+
+NUM_POINT_LIGHTS = 4
+
+# ponto de binding do bloco "Luzes" (basic.frag)
+PONTO_LUZES = 0
+
+# Layout std140 do bloco (tudo vec4 -> sem padding escondido):
+#   linha 0            uViewPos        xyz = câmera
+#   linha 1            uDirLight       xyz = direção, w = intensidade
+#   linha 2            uDirLightColor  rgb = cor,     w = ambiente
+#   linhas 3..3+N-1    uPointPos[N]    xyz = posição, w = alcance
+#   linhas 3+N..3+2N-1 uPointColor[N]  rgb = cor,     w = intensidade
+_L_VIEW = 0
+_L_DIR = 1
+_L_DIR_COR = 2
+_L_PONTO_POS = 3
+_L_PONTO_COR = 3 + NUM_POINT_LIGHTS
+
+
+class BlocoLuzes:
+    """
+    Uniform buffer com a iluminação da cena.
+    Escrito uma vez por frame (câmera) e quando o mundo troca (luzes);
+    todos os draws leem o mesmo bloco.
+
+    Pontuais: o bloco guarda só as NUM_POINT_LIGHTS primeiras ativas (variantes
+    sem CLUSTERED); a lista inteira (luzes dos trechos, core.clusters) fica
+    em `pontuais` e é a que o iluminar() usa.
+    """
+    NOME = "Luzes"
+
+    def __init__(self, binding=PONTO_LUZES):
+        self.binding = binding
+        self.dados = np.zeros((3 + 2 * NUM_POINT_LIGHTS, 4), dtype=np.float32)
+        self._enviado = None
+
+        # pontuais com efeito (ficam no começo dos arrays); o shader
+        # só precisa de uma variante com NUM_POINT_LIGHTS = ativas
+        self.ativas = NUM_POINT_LIGHTS
+        self.pontuais = np.zeros((0, 2, 4), dtype=np.float32)   # (N, pos+alcance / cor+intensidade)
+
+        self.ubo = glGenBuffers(1)
+        glBindBuffer(GL_UNIFORM_BUFFER, self.ubo)
+        glBufferData(GL_UNIFORM_BUFFER, self.dados.nbytes, None, GL_DYNAMIC_DRAW)
+        glBindBuffer(GL_UNIFORM_BUFFER, 0)
+        glBindBufferBase(GL_UNIFORM_BUFFER, self.binding, self.ubo)
+
+    def conectar(self, programa):
+        programa.bind_bloco(self.NOME, self.binding)
+
+    def definir_camera(self, view_pos):
+        self.dados[_L_VIEW, 0:3] = view_pos
+
+    def definir_mundo(self, dir_dir, dir_color, dir_intensity, ambient_strength,
+                      point_pos, point_color, point_intensity, point_range):
+        self.dados[_L_DIR, 0:3] = dir_dir
+        self.dados[_L_DIR, 3] = dir_intensity
+        self.dados[_L_DIR_COR, 0:3] = dir_color
+        self.dados[_L_DIR_COR, 3] = ambient_strength
+
+        # luzes apagadas (intensidade ou alcance zero) saem; as ativas são compactadas
+        ativas = [i for i in range(len(point_pos))
+                  if point_intensity[i] > 0.0 and point_range[i] > 0.0]
+
+        self.pontuais = np.zeros((len(ativas), 2, 4), dtype=np.float32)
+        for k, i in enumerate(ativas):
+            self.pontuais[k, 0, 0:3] = point_pos[i]
+            self.pontuais[k, 0, 3] = point_range[i]
+            self.pontuais[k, 1, 0:3] = point_color[i]
+            self.pontuais[k, 1, 3] = point_intensity[i]
+
+        bloco = self.pontuais[:NUM_POINT_LIGHTS]
+        self.dados[_L_PONTO_POS:] = 0.0
+        self.dados[_L_PONTO_POS:_L_PONTO_POS + len(bloco)] = bloco[:, 0]
+        self.dados[_L_PONTO_COR:_L_PONTO_COR + len(bloco)] = bloco[:, 1]
+        self.ativas = len(bloco)
+
+    def iluminar(self, pos, normais):
+        """
+        Luz difusa que o basic.frag daria em cada vértice (N,3), sem o
+        especular (depende da câmera): ambiente + direcional + todas as pontuais
+        ativas (não só as do bloco).
+        Resultado multiplica o albedo; usado pra assar o cenário estático.
+        """
+        pos = np.asarray(pos, dtype=np.float32).reshape(-1, 3)
+        n = np.asarray(normais, dtype=np.float32).reshape(-1, 3)
+        luz = np.full((len(pos), 3), self.dados[_L_DIR_COR, 3], dtype=np.float32)
+
+        ld = -self.dados[_L_DIR, 0:3]
+        ld = ld / max(float(np.linalg.norm(ld)), 1e-9)
+        difusa = np.maximum(n @ ld, 0.0)
+        luz += difusa[:, None] * self.dados[_L_DIR_COR, 0:3] * self.dados[_L_DIR, 3]
+
+        for ponto, cor in self.pontuais:
+            # fora do alcance a atenuação é zero: só os vértices perto da luz
+            vec = ponto[0:3] - pos
+            d2 = np.einsum("ij,ij->i", vec, vec)
+            perto = np.flatnonzero(d2 < ponto[3] * ponto[3])
+            vec = vec[perto]
+            dist = np.sqrt(d2[perto])
+            lp = vec / np.maximum(dist, 1e-4)[:, None]
+
+            # mesma atenuação do pointAttenuation()
+            x = np.clip(dist / max(float(ponto[3]), 1e-4), 0.0, 1.0)
+            att = (1.0 - x * x * (3.0 - 2.0 * x)) / (1.0 + dist * dist * 0.08) * cor[3]
+
+            difusa = np.maximum(np.einsum("ij,ij->i", n[perto], lp), 0.0)
+            luz[perto] += (difusa * att)[:, None] * cor[0:3]
+        return luz
+
+    def enviar(self):
+        # só sobe pra GPU se algo mudou desde o último envio
+        bruto = self.dados.tobytes()
+        if bruto == self._enviado:
+            return
+        self._enviado = bruto
+        glBindBuffer(GL_UNIFORM_BUFFER, self.ubo)
+        glBufferSubData(GL_UNIFORM_BUFFER, 0, self.dados.nbytes, self.dados)
+        glBindBuffer(GL_UNIFORM_BUFFER, 0)
+
+    def destroy(self):
+        glDeleteBuffers(1, [self.ubo])
+        self.ubo = 0
@@ -0,0 +1,122 @@
+import ctypes
+import numpy as np
+from OpenGL.GL import *
+
+from core.estado_gl import estado_gl
+from core.renderizador import usar_textura
+from engine.geometrias import BufferAnel
+from engine.transformacoes import matrizes_normais
+
+# Atributos por instância (basic.vert):
+#   location 3..6  -> iModel     (mat4, uma coluna por location)
+#   location 7     -> iTint      (vec3)
+#   location 8..10 -> iNormalMat (mat3, calculada na CPU)
+LOC_MODEL = 3
+LOC_TINT = 7
+LOC_NORMAL = 8
+
+# mat4 (16, coluna a coluna) + tint (3) + mat3 (9, coluna a coluna) -> 112 bytes
+FLOATS_INSTANCIA = 28
+OFS_TINT = 16
+OFS_NORMAL = 19
+
+
+class LoteInstancias:
+    """
+    Acumula cópias de uma malha (model + tint por instância) e desenha todas
+    com um único glDrawElementsInstanced.
+    Os atributos de instância são presos no próprio VAO da malha; um draw
+    normal (desenhar) nesse VAO simplesmente ignora esses atributos.
+
+    Os dados sobem num engine.geometrias.BufferAnel: o `anel` recebido
+    (compartilhado, quem criou chama anel.novo_frame()) ou um próprio,
+    avançado a cada desenhar().
+    """
+
+    def __init__(self, malha, capacidade=256, anel=None):
+        self.vao, self.vbo, self.ebo, self.count = malha[:4]
+        self.tipo_indice = malha[5] if len(malha) >= 6 else GL_UNSIGNED_INT
+        self.capacidade = int(capacidade)
+        self.dados = np.zeros((self.capacidade, FLOATS_INSTANCIA), dtype=np.float32)
+        self.n = 0
+
+        self._anel_proprio = anel is None
+        self.anel = BufferAnel(self.dados.nbytes) if anel is None else anel
+
+        estado_gl.bind_vao(self.vao)
+        for loc in range(LOC_MODEL, LOC_NORMAL + 3):
+            glEnableVertexAttribArray(loc)
+            glVertexAttribDivisor(loc, 1)
+        self._apontar(0)
+
+    def _apontar(self, base):
+        # VAO da malha ligado; ponteiros de instância a partir de `base` no anel
+        stride = FLOATS_INSTANCIA * 4
+        glBindBuffer(GL_ARRAY_BUFFER, self.anel.buf)
+        for c in range(4):
+            glVertexAttribPointer(LOC_MODEL + c, 4, GL_FLOAT, GL_FALSE, stride,
+                                  ctypes.c_void_p(base + c * 16))
+        glVertexAttribPointer(LOC_TINT, 3, GL_FLOAT, GL_FALSE, stride,
+                              ctypes.c_void_p(base + OFS_TINT * 4))
+        for c in range(3):
+            glVertexAttribPointer(LOC_NORMAL + c, 3, GL_FLOAT, GL_FALSE, stride,
+                                  ctypes.c_void_p(base + (OFS_NORMAL + 3 * c) * 4))
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+
+    def _crescer(self, minimo):
+        while self.capacidade < minimo:
+            self.capacidade *= 2
+        novo = np.zeros((self.capacidade, FLOATS_INSTANCIA), dtype=np.float32)
+        novo[:self.n] = self.dados[:self.n]
+        self.dados = novo
+
+    def adicionar(self, malha, model, tint=None):
+        """Enfileira uma instância; a cor padrão é o tint do handle da malha."""
+        if tint is None:
+            tint = malha[4] if len(malha) >= 5 else (1.0, 1.0, 1.0)
+
+        if self.n == self.capacidade:
+            self._crescer(self.n + 1)
+
+        linha = self.dados[self.n]
+        linha[0:16] = model.T.ravel()   # GL lê a mat4 coluna a coluna
+        linha[OFS_TINT:OFS_TINT + 3] = tint
+        self.n += 1
+
+    def limpar(self):
+        self.n = 0
+
+    def desenhar(self, vp, prog, tex=None):
+        """
+        Sobe as instâncias acumuladas e desenha tudo num draw só.
+        prog precisa ser uma variante INSTANCED do basic.vert.
+        """
+        if self.n == 0:
+            return
+
+        prog.use()
+        prog.set_mat4("vp", vp)
+
+        if tex is not None:
+            usar_textura(prog, tex)
+
+        # matrizes normais de todas as instâncias numa passada
+        # (colunas[n, j] = coluna j de mat3(model); a linha já está em coluna a coluna)
+        inst = self.dados[:self.n]
+        colunas = inst[:, 0:16].reshape(-1, 4, 4)[:, :3, :3]
+        inst[:, OFS_NORMAL:OFS_NORMAL + 9] = matrizes_normais(colunas).reshape(-1, 9)
+
+        base = self.anel.escrever(inst)
+
+        estado_gl.bind_vao(self.vao)
+        self._apontar(base)
+        glDrawElementsInstanced(GL_TRIANGLES, self.count, self.tipo_indice, None, self.n)
+
+        self.n = 0
+        if self._anel_proprio:
+            self.anel.novo_frame()
+
+    def destroy(self):
+        if self._anel_proprio:
+            self.anel.destroy()
+        self.anel = None
@@ -0,0 +1,52 @@
+import glfw
+
+
+class JanelaGLFW:
+    """
+    Janela + contexto GL 3.3 core via GLFW.
+    O loop do jogo (main.main) só fala com esta interface, então dá pra
+    trocar por outro backend (core.headless.JanelaHeadless) sem mexer no jogo:
+
+        iniciar(w, h, titulo) -> bool
+        ao_teclar(cb)              cb(janela, tecla, scancode, acao, mods)
+        tempo()                    segundos
+        eventos()                  início do frame (entrada)
+        deve_fechar() -> bool
+        tamanho_framebuffer() -> (w, h)
+        trocar_buffers()           fim do frame
+        encerrar()
+    """
+
+    def __init__(self):
+        self.win = None
+
+    def iniciar(self, w, h, titulo):
+        if not glfw.init():
+            return False
+        glfw.window_hint(glfw.CONTEXT_VERSION_MAJOR, 3)
+        glfw.window_hint(glfw.CONTEXT_VERSION_MINOR, 3)
+        glfw.window_hint(glfw.OPENGL_PROFILE, glfw.OPENGL_CORE_PROFILE)
+        self.win = glfw.create_window(w, h, titulo, None, None)
+        glfw.make_context_current(self.win)
+        return True
+
+    def ao_teclar(self, cb):
+        glfw.set_key_callback(self.win, cb)
+
+    def tempo(self):
+        return glfw.get_time()
+
+    def eventos(self):
+        glfw.poll_events()
+
+    def deve_fechar(self):
+        return glfw.window_should_close(self.win)
+
+    def tamanho_framebuffer(self):
+        return glfw.get_framebuffer_size(self.win)
+
+    def trocar_buffers(self):
+        glfw.swap_buffers(self.win)
+
+    def encerrar(self):
+        glfw.terminate()
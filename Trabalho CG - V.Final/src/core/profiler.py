@@ -0,0 +1,219 @@
+import ctypes
+import json
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import numpy as np
+from OpenGL.GL import *
+
+from engine.transformacoes import trs
+
+# cores das barras do overlay (na ordem em que as séries aparecem)
+CORES = [
+    (0.95, 0.75, 0.20),
+    (0.30, 0.80, 0.95),
+    (0.55, 0.95, 0.35),
+    (0.95, 0.40, 0.70),
+    (0.75, 0.55, 1.00),
+    (1.00, 0.55, 0.30),
+]
+COR_FUNDO = (0.08, 0.08, 0.10)
+COR_FRAME = (0.90, 0.90, 0.90)
+COR_ALVO = (0.95, 0.20, 0.20)
+
+ALVO_MS = 1000.0 / 60.0
+
+
+class Profiler:
+    """
+    Tempos por frame: escopos de CPU, passes de GPU e histograma móvel.
+
+      with perfil.escopo("culling"): ...     # CPU (acumula se repetir no frame)
+      perfil.abrir("simulacao") ... perfil.fechar("simulacao")   # idem, sem bloco
+      with perfil.passe("3d"): ...           # CPU + GL_TIME_ELAPSED
+      perfil.novo_frame()                    # fecha o frame
+
+    As queries de GPU ficam pendentes por frame, em fila: no fim de cada
+    frame são lidos, em ordem, os frames cujas queries já estão prontas
+    (nunca trava esperando a GPU). Frame atrasado continua na fila até ficar
+    pronto; query só volta pro pool depois de lida, então GPU 2-3 frames
+    atrás não perde amostra (nem as dos frames mais pesados). Passes não
+    podem se aninhar (limitação do GL_TIME_ELAPSED).
+
+    Séries guardadas (últimos `janela` frames): "frame", "cpu:<nome>", "gpu:<nome>".
+    """
+
+    def __init__(self, janela=300):
+        self.janela = int(janela)
+        self.series = {}              # nome -> deque de ms
+        self.frames = 0
+
+        self._cpu = {}                # escopos do frame atual
+        self._abertos = {}            # abrir()/fechar(): nome -> início
+        self._consultas = []          # do frame atual: [(nome, query)]
+        self._pendentes = deque()     # frames fechados ainda não lidos: [(nome, query)]
+        self._livres = []
+        self._t_frame = None
+
+    # <----------------------------->
+    # MEDIÇÃO
+    # <----------------------------->
+    def _add(self, nome, ms):
+        serie = self.series.get(nome)
+        if serie is None:
+            serie = deque(maxlen=self.janela)
+            self.series[nome] = serie
+        serie.append(ms)
+
+    def abrir(self, nome):
+        self._abertos[nome] = time.perf_counter()
+
+    def fechar(self, nome):
+        ms = (time.perf_counter() - self._abertos.pop(nome)) * 1000.0
+        self._cpu[nome] = self._cpu.get(nome, 0.0) + ms
+
+    @contextmanager
+    def escopo(self, nome):
+        self.abrir(nome)
+        try:
+            yield
+        finally:
+            self.fechar(nome)
+
+    @contextmanager
+    def passe(self, nome):
+        if self._livres:
+            q = self._livres.pop()
+        else:
+            q = int(np.ravel(glGenQueries(1))[0])
+        self._consultas.append((nome, q))
+
+        glBeginQuery(GL_TIME_ELAPSED, q)
+        try:
+            with self.escopo(nome):
+                yield
+        finally:
+            glEndQuery(GL_TIME_ELAPSED)
+
+    def _ler_gpu(self):
+        """Lê os frames pendentes já prontos, do mais antigo pro mais novo."""
+        ns = GLuint64(0)
+        while self._pendentes:
+            consultas = self._pendentes[0]
+            if not all(glGetQueryObjectiv(q, GL_QUERY_RESULT_AVAILABLE) for _, q in consultas):
+                break   # a GPU ainda não chegou nesse frame (nem nos seguintes)
+            self._pendentes.popleft()
+
+            gpu = {}
+            for nome, q in consultas:
+                glGetQueryObjectui64v(q, GL_QUERY_RESULT, ctypes.byref(ns))
+                gpu[nome] = gpu.get(nome, 0.0) + ns.value / 1e6
+                self._livres.append(q)
+            for nome, ms in gpu.items():
+                self._add("gpu:" + nome, ms)
+
+    def novo_frame(self):
+        """Fecha o frame: grava os escopos de CPU e lê a GPU do frame anterior."""
+        agora = time.perf_counter()
+        if self._t_frame is not None:
+            self._add("frame", (agora - self._t_frame) * 1000.0)
+        self._t_frame = agora
+
+        for nome, ms in self._cpu.items():
+            self._add("cpu:" + nome, ms)
+        self._cpu = {}
+
+        self.frames += 1
+        if self._consultas:
+            self._pendentes.append(self._consultas)
+            self._consultas = []
+        self._ler_gpu()
+
+    # <----------------------------->
+    # ESTATÍSTICA
+    # <----------------------------->
+    def percentis(self, nome, ps=(50, 95, 99)):
+        serie = self.series.get(nome)
+        if not serie:
+            return None
+        return tuple(float(v) for v in np.percentile(np.fromiter(serie, dtype=np.float64), ps))
+
+    def resumo(self):
+        saida = {}
+        for nome, serie in self.series.items():
+            v = np.fromiter(serie, dtype=np.float64)
+            p50, p95, p99 = np.percentile(v, (50, 95, 99))
+            saida[nome] = {
+                "n": int(v.size),
+                "media": float(v.mean()),
+                "p50": float(p50),
+                "p95": float(p95),
+                "p99": float(p99),
+                "max": float(v.max()),
+            }
+        return saida
+
+    def salvar_json(self, caminho):
+        dados = {
+            "frames": self.frames,
+            "janela": self.janela,
+            "resumo": self.resumo(),
+            "series": {nome: list(serie) for nome, serie in self.series.items()},
+        }
+        with open(caminho, "w", encoding="utf-8") as f:
+            json.dump(dados, f, indent=2)
+
+    def destroy(self):
+        ids = self._livres + [q for _, q in self._consultas]
+        ids += [q for consultas in self._pendentes for _, q in consultas]
+        if ids:
+            glDeleteQueries(len(ids), ids)
+        self._livres = []
+        self._consultas = []
+        self._pendentes.clear()
+
+    # <----------------------------->
+    # OVERLAY (HUD)
+    # <----------------------------->
+    def overlay(self, fila, malha, x0=0.30, y0=-0.95, largura=0.65, escala_ms=2.0 * ALVO_MS):
+        """
+        Painel no canto inferior direito, com quads do HUD (fila.enfileirar_hud):
+          - uma barra por série (p50 cheio, p95 num traço fino), 0..escala_ms;
+          - histórico dos últimos frames (colunas) com a linha do alvo de 60 fps.
+        """
+        nomes = sorted(n for n in self.series if n != "frame")
+        linha_h = 0.035
+        hist_h = 0.18
+        altura = hist_h + 0.04 + linha_h * (len(nomes) + 1) + 0.02
+
+        def quad(cx, cy, w, h, cor):
+            if w <= 0.0 or h <= 0.0:
+                return
+            fila.enfileirar_hud(malha, trs((cx, cy, 0.0), esc=(w, h, 1.0)), tint=cor)
+
+        quad(x0 + largura * 0.5, y0 + altura * 0.5, largura + 0.02, altura, COR_FUNDO)
+
+        # histórico de frames
+        frames = list(self.series.get("frame", ()))[-60:]
+        if frames:
+            coluna = largura / 60.0
+            base = y0 + 0.01
+            for k, ms in enumerate(frames):
+                h = min(ms / escala_ms, 1.0) * hist_h
+                quad(x0 + (k + 0.5) * coluna, base + h * 0.5, coluna * 0.8, h, COR_FRAME)
+            alvo = base + (ALVO_MS / escala_ms) * hist_h
+            quad(x0 + largura * 0.5, alvo, largura, 0.004, COR_ALVO)
+
+        # barras p50 / p95 por série (frame primeiro)
+        y = y0 + hist_h + 0.04
+        for i, nome in enumerate(["frame"] + nomes):
+            p = self.percentis(nome, (50, 95))
+            if p is None:
+                continue
+            cor = COR_FRAME if nome == "frame" else CORES[(i - 1) % len(CORES)]
+            w50 = min(p[0] / escala_ms, 1.0) * largura
+            quad(x0 + w50 * 0.5, y + linha_h * 0.5, w50, linha_h * 0.7, cor)
+            x95 = x0 + min(p[1] / escala_ms, 1.0) * largura
+            quad(x95, y + linha_h * 0.5, 0.004, linha_h * 0.9, cor)
+            y += linha_h
@@ -1,93 +1,67 @@
 from OpenGL.GL import *
 
-NUM_POINT_LIGHTS = 4
+from core.estado_gl import estado_gl
+from core.iluminacao import NUM_POINT_LIGHTS
+from engine.transformacoes import matriz_normal
+
+# A iluminação (câmera, direcional, pontuais) vem do bloco "Luzes"
+# (core.iluminacao.BlocoLuzes), escrito uma vez por frame.
+
+def defines_material(unlit=False, textured=False, instanced=False,
+                     pontuais=NUM_POINT_LIGHTS, clustered=False, baked=False, array=False):
+    """
+    Defines da variante mínima do basic.vert/basic.frag pra um material.
+    Objetos sem luz ou com luz assada (baked) ignoram as pontuais (a chave
+    não depende delas); clustered troca o laço fixo do bloco pelas listas
+    por cluster; array: textura é uma camada de GL_TEXTURE_2D_ARRAY.
+    """
+    defines = {"INSTANCED": instanced, "TEXTURED": textured, "UNLIT": unlit,
+               "TEXTURE_ARRAY": textured and array}
+    if baked and not unlit:
+        defines["BAKED"] = True
+    elif not unlit:
+        if clustered:
+            defines["CLUSTERED"] = True
+        else:
+            defines["NUM_POINT_LIGHTS"] = int(pontuais)
+    return defines
+
+
+def usar_textura(prog, tex):
+    """Liga tex (Texture2D ou CamadaTextura) na unidade 0; a camada vai no uCamada."""
+    tex.bind(0)
+    prog.set_int("uTex0", 0)
+    if tex.alvo == GL_TEXTURE_2D_ARRAY:
+        prog.set_int("uCamada", tex.indice)
 
-def _u3(prog, name, v):
-    loc = glGetUniformLocation(prog, name)
-    if loc != -1:
-        glUniform3f(loc, float(v[0]), float(v[1]), float(v[2]))
-
-def _u1f(prog, name, x):
-    loc = glGetUniformLocation(prog, name)
-    if loc != -1:
-        glUniform1f(loc, float(x))
-
-def _u1i(prog, name, x):
-    loc = glGetUniformLocation(prog, name)
-    if loc != -1:
-        glUniform1i(loc, int(x))
 
 def desenhar(vao_tuple, model, vp, prog,
-             view_pos=(0.0, 0.0, 5.0),
-
-         
-             dir_dir=(0.3, -1.0, 0.2),
-             dir_color=(1.0, 1.0, 1.0),
-             dir_intensity=1.0,
-             ambient_strength=0.18,
-          
-             point_pos=None,
-             point_color=None,
-             point_intensity=None,
-             point_range=None,
-
              tint=None,
-             unlit=False,
-            
-             tex=None,
-             use_tex=False):
+             tex=None):
+    """prog já é a variante certa pro material (ver defines_material)."""
 
-    if len(vao_tuple) == 5:
-        vao, vbo, ebo, count, vao_tint = vao_tuple
-    else:
-        vao, vbo, ebo, count = vao_tuple
-        vao_tint = (1.0, 1.0, 1.0)
+    # (vao, vbo, ebo, count[, tint[, tipo dos índices]]) -> engine.geometrias.Malha
+    vao, vbo, ebo, count = vao_tuple[:4]
+    vao_tint = vao_tuple[4] if len(vao_tuple) >= 5 else (1.0, 1.0, 1.0)
+    tipo_indice = vao_tuple[5] if len(vao_tuple) >= 6 else GL_UNSIGNED_INT
 
     if tint is None:
         tint = vao_tint
 
-    # defaults para 4 luzes
-    if point_pos is None:
-        point_pos = [(0.0, 2.0, 0.0)] * NUM_POINT_LIGHTS
-    if point_color is None:
-        point_color = [(1.0, 1.0, 1.0)] * NUM_POINT_LIGHTS
-    if point_intensity is None:
-        point_intensity = [0.0] * NUM_POINT_LIGHTS
-    if point_range is None:
-        point_range = [10.0] * NUM_POINT_LIGHTS
-
     mvp = vp @ model
 
-    glUseProgram(prog)
-
-    glUniformMatrix4fv(glGetUniformLocation(prog, "mvp"), 1, GL_FALSE, mvp.T)
-    glUniformMatrix4fv(glGetUniformLocation(prog, "model"), 1, GL_FALSE, model.T)
-
-    _u3(prog, "uTint", tint)
-    _u3(prog, "viewPos", view_pos)
-    _u1i(prog, "uUnlit", 1 if unlit else 0)
-
-    _u3(prog, "uDirLightDir", dir_dir)
-    _u3(prog, "uDirLightColor", dir_color)
-    _u1f(prog, "uDirLightIntensity", dir_intensity)
-    _u1f(prog, "uAmbientStrength", ambient_strength)
-
-    for i in range(NUM_POINT_LIGHTS):
-        _u3(prog, f"uPointPos[{i}]", point_pos[i])
-        _u3(prog, f"uPointColor[{i}]", point_color[i])
-        _u1f(prog, f"uPointIntensity[{i}]", point_intensity[i])
-        _u1f(prog, f"uPointRange[{i}]", point_range[i])
-    _u1i(prog, "uUseTex", 1 if (use_tex and tex is not None) else 0)
+    prog.use()
 
-    if use_tex and tex is not None:
-        glActiveTexture(GL_TEXTURE0)
-        glBindTexture(GL_TEXTURE_2D, tex.id)
+    prog.set_mat4("mvp", mvp)
+    prog.set_mat4("model", model)
+    if prog.tem("uNormalMat"):   # variantes UNLIT não usam normal
+        prog.set_mat3("uNormalMat", matriz_normal(model))
 
-        loc_tex = glGetUniformLocation(prog, "uTex0")
-        if loc_tex != -1:
-            glUniform1i(loc_tex, 0)
+    prog.set_vec3("uTint", tint)
 
-    glBindVertexArray(vao)
-    glDrawElements(GL_TRIANGLES, count, GL_UNSIGNED_INT, None)
+    if tex is not None:
+        usar_textura(prog, tex)
 
-    glBindVertexArray(0)
+    # sem unbind no final: o próximo draw só rebinda se o VAO mudar
+    estado_gl.bind_vao(vao)
+    glDrawElements(GL_TRIANGLES, count, tipo_indice, None)
@@ -1,4 +1,14 @@
+import ctypes
+import hashlib
+import struct
+import time
+from pathlib import Path
+
 from OpenGL.GL import *
+from OpenGL.error import GLError
+
+from core.estado_gl import estado_gl
+
 def compilarShader(src, stype):
     s = glCreateShader(stype)
     glShaderSource(s, src)
@@ -7,10 +17,195 @@ def compilarShader(src, stype):
         raise RuntimeError(glGetShaderInfoLog(s).decode())
     return s
 
-def criarPrograma(vsrc, fsrc):
+
+class Program:
+    """
+    Programa linkado + cache de uniforms.
+    As localizações são refletidas uma vez (glGetActiveUniform) e os setters
+    só enviam o valor se ele mudou desde o último upload.
+    Os setters assumem que o programa já está em uso (use()).
+    """
+
+    def __init__(self, prog_id):
+        self.id = prog_id
+        self.defines = ()    # preenchido por VariantesShader
+        self.uniforms = {}   # nome -> localização
+        self.tipos = {}      # nome -> tipo GL
+        self._valores = {}   # localização -> último valor enviado
+        self._refletir()
+
+    def _refletir(self):
+        n = glGetProgramiv(self.id, GL_ACTIVE_UNIFORMS)
+        for i in range(n):
+            nome, tamanho, tipo = glGetActiveUniform(self.id, i)
+            if isinstance(nome, bytes):
+                nome = nome.decode()
+
+            # arrays aparecem como "nome[0]": registra cada elemento
+            if nome.endswith("[0]"):
+                base = nome[:-3]
+                for k in range(int(tamanho)):
+                    self._registrar(f"{base}[{k}]", int(tipo))
+                if f"{base}[0]" in self.uniforms:
+                    self.uniforms[base] = self.uniforms[f"{base}[0]"]
+                    self.tipos[base] = int(tipo)
+            else:
+                self._registrar(nome, int(tipo))
+
+    def _registrar(self, nome, tipo):
+        loc = glGetUniformLocation(self.id, nome)
+        # uniforms de bloco (UBO) não têm localização
+        if loc == -1:
+            return
+        self.uniforms[nome] = loc
+        self.tipos[nome] = tipo
+
+    def use(self):
+        estado_gl.use_program(self.id)
+
+    def tem(self, nome):
+        return nome in self.uniforms
+
+    def bind_bloco(self, nome, binding):
+        """Liga o uniform block `nome` ao ponto de binding (se existir no programa)."""
+        idx = glGetUniformBlockIndex(self.id, nome)
+        if idx == GL_INVALID_INDEX:
+            return False
+        glUniformBlockBinding(self.id, idx, binding)
+        return True
+
+    # <----------------------------->
+    # SETTERS (com cache)
+    # <----------------------------->
+    def set_mat4(self, nome, m):
+        loc = self.uniforms.get(nome)
+        if loc is None:
+            return
+        chave = m.tobytes()
+        if self._valores.get(loc) == chave:
+            return
+        self._valores[loc] = chave
+        glUniformMatrix4fv(loc, 1, GL_FALSE, m.T)
+
+    def set_mat3(self, nome, m):
+        loc = self.uniforms.get(nome)
+        if loc is None:
+            return
+        chave = m.tobytes()
+        if self._valores.get(loc) == chave:
+            return
+        self._valores[loc] = chave
+        glUniformMatrix3fv(loc, 1, GL_FALSE, m.T)
+
+    def set_vec3(self, nome, v):
+        loc = self.uniforms.get(nome)
+        if loc is None:
+            return
+        v = (float(v[0]), float(v[1]), float(v[2]))
+        if self._valores.get(loc) == v:
+            return
+        self._valores[loc] = v
+        glUniform3f(loc, *v)
+
+    def set_float(self, nome, x):
+        loc = self.uniforms.get(nome)
+        if loc is None:
+            return
+        x = float(x)
+        if self._valores.get(loc) == x:
+            return
+        self._valores[loc] = x
+        glUniform1f(loc, x)
+
+    def set_int(self, nome, x):
+        loc = self.uniforms.get(nome)
+        if loc is None:
+            return
+        x = int(x)
+        if self._valores.get(loc) == x:
+            return
+        self._valores[loc] = x
+        glUniform1i(loc, x)
+
+    def destroy(self):
+        estado_gl.esquecer_programa(self.id)
+        glDeleteProgram(self.id)
+        self.id = 0
+        self.uniforms.clear()
+        self._valores.clear()
+
+
+def aplicarDefines(src, defines):
+    """Insere '#define NOME valor' logo depois da linha do #version."""
+    if not defines:
+        return src
+    linhas = [f"#define {k} {v}".rstrip() for k, v in defines]
+    versao, _, resto = src.partition("\n")
+    if not versao.lstrip().startswith("#version"):
+        return "\n".join(linhas) + "\n" + src
+    return versao + "\n" + "\n".join(linhas) + "\n" + resto
+
+
+def chaveDefines(defines):
+    """dict/iterável de defines -> tupla ordenada (chave do cache de variantes)."""
+    if not defines:
+        return ()
+    itens = defines.items() if isinstance(defines, dict) else defines
+    return tuple(sorted((str(k), "" if v is True else str(v)) for k, v in itens
+                        if v is not None and v is not False))
+
+
+class VariantesShader:
+    """
+    Um par de fontes (vert/frag) compilado em variantes por conjunto de
+    #defines, cada variante um Program separado, criado na primeira vez que
+    é pedido e guardado pelo conjunto de defines.
+
+    ao_criar(programa) roda uma vez por variante nova (ligar UBOs etc).
+    Com `cache` (CacheBinarios) o programa linkado vem do disco quando dá.
+    """
+
+    def __init__(self, vsrc, fsrc, ao_criar=None, cache=None):
+        self.vsrc = vsrc
+        self.fsrc = fsrc
+        self.ao_criar = ao_criar
+        self.cache = cache
+        self.variantes = {}   # chave de defines -> Program
+
+    def obter(self, defines=None):
+        chave = chaveDefines(defines)
+        prog = self.variantes.get(chave)
+        if prog is None:
+            vsrc = aplicarDefines(self.vsrc, chave)
+            fsrc = aplicarDefines(self.fsrc, chave)
+            if self.cache is not None:
+                prog = self.cache.programa(vsrc, fsrc, chave)
+            else:
+                prog = criarPrograma(vsrc, fsrc)
+            prog.defines = chave
+            if self.ao_criar is not None:
+                self.ao_criar(prog)
+            self.variantes[chave] = prog
+        return prog
+
+    def aquecer(self, lista_defines):
+        """Cria de uma vez as variantes conhecidas (no load, não no 1º frame)."""
+        for defines in lista_defines:
+            self.obter(defines)
+
+    def destroy(self):
+        for prog in self.variantes.values():
+            prog.destroy()
+        self.variantes.clear()
+
+
+def criarPrograma(vsrc, fsrc, recuperavel=False):
+    """recuperavel: pede ao driver pra guardar o binário (glGetProgramBinary)."""
     vs = compilarShader(vsrc, GL_VERTEX_SHADER)
     fs = compilarShader(fsrc, GL_FRAGMENT_SHADER)
     prog = glCreateProgram()
+    if recuperavel:
+        glProgramParameteri(prog, GL_PROGRAM_BINARY_RETRIEVABLE_HINT, GL_TRUE)
     glAttachShader(prog, vs)
     glAttachShader(prog, fs)
     glLinkProgram(prog)
@@ -18,4 +213,116 @@ def criarPrograma(vsrc, fsrc):
         raise RuntimeError(glGetProgramInfoLog(prog).decode())
     glDeleteShader(vs)
     glDeleteShader(fs)
-    return prog
\ No newline at end of file
+    return Program(prog)
+
+
+# <----------------------------->
+# CACHE DE BINÁRIOS
+# <----------------------------->
+class CacheBinarios:
+    """
+    Programas linkados guardados em disco (glGetProgramBinary) e recarregados
+    com glProgramBinary no próximo launch.
+
+    Chave = hash das fontes já com os defines + defines + vendor/renderer/versão
+    do GL: trocar shader, variante, driver ou placa gera outro arquivo.
+    Binário recusado pelo driver (ou arquivo corrompido) -> compila da fonte
+    e regrava.
+
+    Arquivo: <chave>.bin = formato (uint32) + binário do driver.
+    `tempos` guarda (defines, caminho, ms) de cada programa criado, com
+    caminho "binario", "fonte" ou "recusado".
+    """
+
+    def __init__(self, pasta):
+        self.pasta = Path(pasta)
+        self.tempos = []
+
+        # sem formato de binário (ou sem GL 4.1 / ARB_get_program_binary): só fonte
+        try:
+            formatos = int(glGetIntegerv(GL_NUM_PROGRAM_BINARY_FORMATS))
+        except GLError:   # GL_INVALID_ENUM: o contexto não conhece o enum
+            formatos = 0
+        self.ativo = formatos > 0 and bool(glGetProgramBinary) and bool(glProgramBinary)
+
+        self.driver = "|".join(
+            (glGetString(s) or b"").decode(errors="replace")
+            for s in (GL_VENDOR, GL_RENDERER, GL_VERSION))
+
+    def chave(self, vsrc, fsrc, defines):
+        h = hashlib.sha1()
+        for parte in (vsrc, fsrc, repr(defines), self.driver):
+            h.update(parte.encode("utf-8"))
+            h.update(b"\0")
+        return h.hexdigest()
+
+    def programa(self, vsrc, fsrc, defines=()):
+        t0 = time.perf_counter()
+        if not self.ativo:
+            prog = criarPrograma(vsrc, fsrc)
+            self._medir(defines, "fonte", t0)
+            return prog
+
+        arquivo = self.pasta / (self.chave(vsrc, fsrc, defines) + ".bin")
+        caminho = "fonte"
+        if arquivo.exists():
+            prog = self._carregar(arquivo)
+            if prog is not None:
+                self._medir(defines, "binario", t0)
+                return prog
+            caminho = "recusado"
+
+        prog = criarPrograma(vsrc, fsrc, recuperavel=True)
+        self._salvar(arquivo, prog.id)
+        self._medir(defines, caminho, t0)
+        return prog
+
+    def _carregar(self, arquivo):
+        try:
+            bruto = arquivo.read_bytes()
+            formato = struct.unpack_from("<I", bruto)[0]
+            dados = bruto[4:]
+        except (OSError, struct.error):
+            return None
+
+        prog = glCreateProgram()
+        try:
+            glProgramBinary(prog, formato, dados, len(dados))
+            ok = glGetProgramiv(prog, GL_LINK_STATUS) == GL_TRUE
+        except GLError:   # formato que o driver não conhece mais
+            ok = False
+        if not ok:
+            # driver atualizado/outro contexto: apaga e deixa recompilar
+            glDeleteProgram(prog)
+            try:
+                arquivo.unlink()
+            except OSError:
+                pass
+            return None
+        return Program(prog)
+
+    def _salvar(self, arquivo, prog_id):
+        tamanho = int(glGetProgramiv(prog_id, GL_PROGRAM_BINARY_LENGTH))
+        if tamanho <= 0:
+            return
+        buf = (ctypes.c_ubyte * tamanho)()
+        lido = GLsizei(0)
+        formato = GLenum(0)
+        glGetProgramBinary(prog_id, tamanho, ctypes.byref(lido), ctypes.byref(formato), buf)
+        try:
+            self.pasta.mkdir(parents=True, exist_ok=True)
+            arquivo.write_bytes(struct.pack("<I", formato.value) + bytes(buf)[:lido.value])
+        except OSError:
+            pass   # cache é só otimização
+
+    def _medir(self, defines, caminho, t0):
+        self.tempos.append((defines, caminho, (time.perf_counter() - t0) * 1000.0))
+
+    def relatorio(self):
+        """Resumo por caminho: {"binario": (n, ms), "fonte": (n, ms), "recusado": (n, ms)}."""
+        resumo = {}
+        for _, caminho, ms in self.tempos:
+            n, total = resumo.get(caminho, (0, 0.0))
+            resumo[caminho] = (n + 1, total + ms)
+        return resumo
+
@@ -0,0 +1,71 @@
+import numpy as np
+
+
+def planos_frustum(vp):
+    """
+    Extrai os 6 planos do frustum (Gribb/Hartmann) de vp = proj @ view.
+    Retorna (6,4) com (a, b, c, d) normalizados; ponto dentro <=> a*x+b*y+c*z+d >= 0.
+    Ordem: esquerda, direita, baixo, cima, perto, longe.
+    """
+    m = np.asarray(vp, dtype=np.float64)
+    r0, r1, r2, r3 = m[0], m[1], m[2], m[3]
+
+    planos = np.array([
+        r3 + r0,
+        r3 - r0,
+        r3 + r1,
+        r3 - r1,
+        r3 + r2,
+        r3 - r2,
+    ])
+    planos /= np.linalg.norm(planos[:, :3], axis=1, keepdims=True)
+    return planos
+
+
+def aabbs_visiveis(planos, centros, extensoes):
+    """
+    Testa N AABBs de uma vez contra o frustum.
+    centros: (N,3) em mundo; extensoes: (N,3) ou (3,) igual para todas
+    (extensão = meia-largura por eixo).
+    Retorna máscara bool (N,): False só quando a caixa está toda fora de algum plano.
+    """
+    centros = np.asarray(centros, dtype=np.float64).reshape(-1, 3)
+    extensoes = np.asarray(extensoes, dtype=np.float64).reshape(-1, 3)
+
+    normais = planos[:, :3]
+    # distância do centro + "raio" da caixa projetado na normal -> (N,6)
+    dist = centros @ normais.T + planos[:, 3]
+    raio = extensoes @ np.abs(normais).T
+    return np.all(dist + raio >= 0.0, axis=1)
+
+
+class CullingFrustum:
+    """Culling por frustum com contagem de objetos testados/desenhados por frame."""
+
+    def __init__(self):
+        self.planos = None
+        self.testados = 0
+        self.desenhados = 0
+        self.ultimo_frame = {"testados": 0, "desenhados": 0, "descartados": 0}
+
+    def atualizar(self, vp):
+        self.planos = planos_frustum(vp)
+
+    def visiveis(self, centros, extensoes):
+        if len(centros) == 0:
+            return np.zeros(0, dtype=bool)
+
+        mask = aabbs_visiveis(self.planos, centros, extensoes)
+        self.testados += mask.size
+        self.desenhados += int(mask.sum())
+        return mask
+
+    def novo_frame(self):
+        self.ultimo_frame = {
+            "testados": self.testados,
+            "desenhados": self.desenhados,
+            "descartados": self.testados - self.desenhados,
+        }
+        self.testados = 0
+        self.desenhados = 0
+        return self.ultimo_frame
@@ -1,7 +1,124 @@
 import numpy as np
 import ctypes
+import hashlib
+from functools import lru_cache
+from typing import NamedTuple
 from OpenGL.GL import *
 
+from core.estado_gl import estado_gl
+
+# layout com luz assada: [pos(3) + normal(3) + uv(2) + luz(3)]; a luz vai
+# na location 11 (3..10 são os atributos de instância, core.instancias)
+LOC_LUZ_ASSADA = 11
+
+
+# <----------------------------->
+# FORMATOS DE VÉRTICE
+# <----------------------------->
+class Atributo(NamedTuple):
+    loc: int           # location no basic.vert
+    inicio: int        # primeira coluna nos floats de entrada
+    componentes: int
+    tipo: int          # GL_FLOAT, GL_HALF_FLOAT, GL_UNSIGNED_SHORT ou GL_INT_2_10_10_10_REV
+                       # (os dois últimos normalizados: [0,1] e [-1,1])
+
+
+class FormatoVertice:
+    """
+    Como os floats de entrada (8 ou 11 por vértice) viram bytes no VBO.
+    Cada atributo fica alinhado em 4 bytes; 2_10_10_10 usa 4 bytes pra xyz.
+    """
+
+    def __init__(self, nome, atributos):
+        self.nome = nome
+        self.atributos = tuple(atributos)
+        self.floats = max(a.inicio + a.componentes for a in self.atributos)
+
+        self.offsets = []
+        ofs = 0
+        for a in self.atributos:
+            self.offsets.append(ofs)
+            ofs += -(-self._bytes(a) // 4) * 4
+        self.stride = ofs
+
+    @staticmethod
+    def _bytes(a):
+        if a.tipo == GL_INT_2_10_10_10_REV:
+            return 4
+        return a.componentes * (2 if a.tipo in (GL_HALF_FLOAT, GL_UNSIGNED_SHORT) else 4)
+
+    def empacotar(self, verts):
+        """floats (N * self.floats) -> bytes (N, stride) uint8 no layout do formato."""
+        v = np.asarray(verts, dtype=np.float32).reshape(-1, self.floats)
+        saida = np.zeros((len(v), self.stride), dtype=np.uint8)
+        for a, ofs in zip(self.atributos, self.offsets):
+            col = v[:, a.inicio:a.inicio + a.componentes]
+            if a.tipo == GL_INT_2_10_10_10_REV:
+                q = np.rint(np.clip(col, -1.0, 1.0) * 511.0).astype(np.int32) & 0x3FF
+                pacote = (q[:, 0] | (q[:, 1] << 10) | (q[:, 2] << 20)).astype(np.uint32)
+                bruto = pacote.reshape(-1, 1)
+            elif a.tipo == GL_UNSIGNED_SHORT:
+                bruto = np.rint(np.clip(col, 0.0, 1.0) * 65535.0).astype(np.uint16)
+            elif a.tipo == GL_HALF_FLOAT:
+                bruto = np.ascontiguousarray(col, dtype=np.float16)
+            else:
+                bruto = np.ascontiguousarray(col, dtype=np.float32)
+            n = self._bytes(a)
+            saida[:, ofs:ofs + n] = bruto.view(np.uint8).reshape(len(v), n)
+        return saida
+
+    def configurar(self):
+        """Ponteiros dos atributos (VAO e VBO já ligados)."""
+        for a, ofs in zip(self.atributos, self.offsets):
+            glEnableVertexAttribArray(a.loc)
+            if a.tipo == GL_INT_2_10_10_10_REV:
+                glVertexAttribPointer(a.loc, 4, a.tipo, GL_TRUE, self.stride, ctypes.c_void_p(ofs))
+            elif a.tipo == GL_UNSIGNED_SHORT:
+                glVertexAttribPointer(a.loc, a.componentes, a.tipo, GL_TRUE, self.stride,
+                                      ctypes.c_void_p(ofs))
+            else:
+                glVertexAttribPointer(a.loc, a.componentes, a.tipo, GL_FALSE, self.stride,
+                                      ctypes.c_void_p(ofs))
+
+
+# float32 em tudo: 32 bytes por vértice (44 com luz)
+FORMATO_FLOAT = FormatoVertice("float", [
+    Atributo(0, 0, 3, GL_FLOAT), Atributo(1, 3, 3, GL_FLOAT), Atributo(2, 6, 2, GL_FLOAT)])
+FORMATO_FLOAT_LUZ = FormatoVertice("float_luz", FORMATO_FLOAT.atributos + (
+    Atributo(LOC_LUZ_ASSADA, 8, 3, GL_FLOAT),))
+
+# posição float32, normal 2_10_10_10, UV half: 20 bytes (28 com a luz em half)
+FORMATO_COMPACTO = FormatoVertice("compacto", [
+    Atributo(0, 0, 3, GL_FLOAT), Atributo(1, 3, 3, GL_INT_2_10_10_10_REV),
+    Atributo(2, 6, 2, GL_HALF_FLOAT)])
+FORMATO_COMPACTO_LUZ = FormatoVertice("compacto_luz", FORMATO_COMPACTO.atributos + (
+    Atributo(LOC_LUZ_ASSADA, 8, 3, GL_HALF_FLOAT),))
+
+# mesmo tamanho, UV em uint16 normalizado: só pra UV em [0,1], mas com
+# passo 1/65535 (half perto de 1 anda 1/2048 ~ um texel das texturas de 2k)
+FORMATO_COMPACTO_UV16 = FormatoVertice("compacto_uv16", [
+    Atributo(0, 0, 3, GL_FLOAT), Atributo(1, 3, 3, GL_INT_2_10_10_10_REV),
+    Atributo(2, 6, 2, GL_UNSIGNED_SHORT)])
+FORMATO_COMPACTO_UV16_LUZ = FormatoVertice("compacto_uv16_luz", FORMATO_COMPACTO_UV16.atributos + (
+    Atributo(LOC_LUZ_ASSADA, 8, 3, GL_HALF_FLOAT),))
+
+
+def formatoPadrao(luz_assada=False, verts=None):
+    """Compacto; UV em uint16 se `verts` tem todas as UVs em [0,1], senão half."""
+    if verts is not None:
+        uv = np.asarray(verts, dtype=np.float32).reshape(-1, 11 if luz_assada else 8)[:, 6:8]
+        if uv.size and uv.min() >= 0.0 and uv.max() <= 1.0:
+            return FORMATO_COMPACTO_UV16_LUZ if luz_assada else FORMATO_COMPACTO_UV16
+    return FORMATO_COMPACTO_LUZ if luz_assada else FORMATO_COMPACTO
+
+
+def indicesCompactos(idx):
+    """uint16 quando todos os índices cabem, senão uint32 -> (array, tipo GL)."""
+    idx = np.asarray(idx)
+    if idx.size == 0 or int(idx.max()) < 0x10000:
+        return np.ascontiguousarray(idx, dtype=np.uint16), GL_UNSIGNED_SHORT
+    return np.ascontiguousarray(idx, dtype=np.uint32), GL_UNSIGNED_INT
+
 def _normal_tri(a, b, c):
     import numpy as np
 
@@ -227,29 +344,376 @@ def criarRampaSolida(cor=(0.64, 0.48, 0.24), tile=1.0):
     return verts, idx, cor
 
 
-def criarVAO(verts, idx, tint=(1.0, 1.0, 1.0)):
+def criarVAO(verts, idx, tint=(1.0, 1.0, 1.0), luz_assada=False, formato=None):
+    """
+    verts: floats [pos(3) + normal(3) + uv(2)] (+ luz(3) se luz_assada).
+    formato: FormatoVertice do VBO (padrão: compacto); índices em uint16 se couberem.
+    """
+    if formato is None:
+        formato = formatoPadrao(luz_assada, verts)
+    dados = formato.empacotar(verts)
+    idx, tipo_idx = indicesCompactos(idx)
+
     vao = glGenVertexArrays(1)
-    glBindVertexArray(vao)
+    estado_gl.bind_vao(vao)
 
     vbo = glGenBuffers(1)
     glBindBuffer(GL_ARRAY_BUFFER, vbo)
-    glBufferData(GL_ARRAY_BUFFER, verts.nbytes, verts, GL_STATIC_DRAW)
+    glBufferData(GL_ARRAY_BUFFER, dados.nbytes, dados, GL_STATIC_DRAW)
 
     ebo = glGenBuffers(1)
     glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, ebo)
     glBufferData(GL_ELEMENT_ARRAY_BUFFER, idx.nbytes, idx, GL_STATIC_DRAW)
 
-    stride = 8 * 4
-    glEnableVertexAttribArray(0)
-    glVertexAttribPointer(0, 3, GL_FLOAT, GL_FALSE, stride, ctypes.c_void_p(0))
+    formato.configurar()
+
+    estado_gl.bind_vao(0)
+
+    return Malha(vao, vbo, ebo, idx.size, tint, tipo_idx)
 
-    glEnableVertexAttribArray(1)
-    glVertexAttribPointer(1, 3, GL_FLOAT, GL_FALSE, stride, ctypes.c_void_p(12))
 
-    glEnableVertexAttribArray(2)
-    glVertexAttribPointer(2, 2, GL_FLOAT, GL_FALSE, stride, ctypes.c_void_p(24))
+def destruirVAO(malha):
+    vao, vbo, ebo = malha[0], malha[1], malha[2]
+    estado_gl.esquecer_vao(vao)
+    glDeleteVertexArrays(1, [vao])
+    glDeleteBuffers(2, [vbo, ebo])
+
+
+class Malha(NamedTuple):
+    """
+    Handle de malha na GPU; começa com a tupla antiga (vao, vbo, ebo, count, tint)
+    e termina com o tipo dos índices (GL_UNSIGNED_SHORT/INT) pro glDrawElements.
+    """
+    vao: int
+    vbo: int
+    ebo: int
+    count: int
+    tint: tuple = (1.0, 1.0, 1.0)
+    tipo_indice: int = GL_UNSIGNED_INT
+
+    def com_tint(self, tint):
+        """Mesma malha na GPU com outra cor (sem upload, sem nova referência)."""
+        return self._replace(tint=tuple(tint))
+
+
+class RegistroMalhas:
+    """
+    Malhas na GPU compartilhadas: cada geometria sobe uma vez só e quem pede
+    recebe um handle (Malha) com o próprio tint.
 
-    glBindVertexArray(0)
+      cubo = malhas.obter(criarCubo, tint=cor)       # gerador + parâmetros
+      m = malhas.registrar(verts, idx, tint=cor)     # dados prontos (hash do conteúdo)
+      malhas.liberar(m)                              # cada obter/registrar pede um liberar
 
-    return vao, vbo, ebo, idx.size, tint
+    Chave final é o hash dos bytes (verts + idx + layout), então geradores
+    diferentes com o mesmo resultado também dividem a malha. A saída de
+    cada gerador (CPU) fica guardada pela chave gerador + parâmetros.
 
+    Quem guarda estado por VAO (lotes da core.fila_render) se inscreve em
+    `ao_liberar`: é chamado com o vao antes de ele ser apagado (o GL pode
+    reusar o nome numa malha nova).
+    """
+
+    def __init__(self):
+        self._dados = {}     # (gerador, args, kwargs) -> (verts, idx, cor)
+        self._malhas = {}    # hash -> Malha
+        self._hash = {}      # vao -> hash
+        self._refs = {}      # vao -> referências
+        self._bytes = {}     # vao -> bytes na GPU
+        self.ao_liberar = []  # callbacks(vao)
+        self.reusos = 0
+
+    def dados(self, gerador, *args, **kwargs):
+        """(verts, idx, cor) do gerador, gerado só na primeira vez (não altere os arrays)."""
+        chave = (gerador.__module__, gerador.__qualname__, args, tuple(sorted(kwargs.items())))
+        saida = self._dados.get(chave)
+        if saida is None:
+            saida = gerador(*args, **kwargs)
+            self._dados[chave] = saida
+        return saida
+
+    def obter(self, gerador, *args, tint=None, **kwargs):
+        verts, idx, cor = self.dados(gerador, *args, **kwargs)
+        return self.registrar(verts, idx, tint=cor if tint is None else tint)
+
+    def registrar(self, verts, idx, tint=(1.0, 1.0, 1.0), luz_assada=False, formato=None):
+        if formato is None:
+            formato = formatoPadrao(luz_assada, verts)
+        verts = np.ascontiguousarray(verts, dtype=np.float32)
+        idx = np.ascontiguousarray(idx, dtype=np.uint32)
+        h = hashlib.sha1()
+        h.update(formato.nome.encode())
+        h.update(verts.tobytes())
+        h.update(idx.tobytes())
+        chave = h.hexdigest()
+
+        malha = self._malhas.get(chave)
+        if malha is None:
+            malha = criarVAO(verts, idx, luz_assada=luz_assada, formato=formato)
+            self._malhas[chave] = malha
+            self._hash[malha.vao] = chave
+            self._refs[malha.vao] = 0
+            self._bytes[malha.vao] = (verts.size // formato.floats * formato.stride
+                                      + idx.size * (2 if malha.tipo_indice == GL_UNSIGNED_SHORT else 4))
+        else:
+            self.reusos += 1
+        self._refs[malha.vao] += 1
+        return malha.com_tint(tint)
+
+    def liberar(self, malha):
+        vao = malha[0]
+        if vao not in self._refs:
+            return
+        self._refs[vao] -= 1
+        if self._refs[vao] > 0:
+            return
+        for f in self.ao_liberar:
+            f(vao)
+        destruirVAO(self._malhas.pop(self._hash.pop(vao)))
+        del self._refs[vao]
+        del self._bytes[vao]
+
+    def estatisticas(self):
+        return {
+            "malhas": len(self._malhas),
+            "referencias": sum(self._refs.values()),
+            "reusos": self.reusos,
+            "bytes": sum(self._bytes.values()),
+        }
+
+    def destroy(self):
+        for malha in self._malhas.values():
+            for f in self.ao_liberar:
+                f(malha.vao)
+            destruirVAO(malha)
+        self._malhas.clear()
+        self._hash.clear()
+        self._refs.clear()
+        self._bytes.clear()
+        self._dados.clear()
+
+
+# registro do processo (um contexto GL só)
+malhas = RegistroMalhas()
+
+
+class BufferAnel:
+    """
+    Buffer de streaming pra dados que mudam todo frame (instâncias, partes
+    animadas, flechas). Um buffer GL dividido em `regioes` fatias (triple
+    buffering): cada frame escreve só na sua fatia enquanto a GPU ainda lê
+    as dos frames anteriores.
+
+      ofs = anel.escrever(arr)   # copia arr direto pra memória do buffer -> offset em bytes
+      ...                        # glVertexAttribPointer(..., ofs + ...) / draw
+      anel.novo_frame()          # fence na fatia usada, passa pra próxima
+
+    Modo "mapa": glMapBufferRange com GL_MAP_UNSYNCHRONIZED_BIT (o driver não
+    sincroniza) + glFenceSync por fatia; só espera (glClientWaitSync) se a
+    GPU estiver `regioes` frames atrasada. Se a espera estoura o prazo ou
+    falha, o frame não escreve sem sincronizar: o buffer inteiro vira órfão
+    (storage nova, fences descartadas) e o anel recomeça da fatia 0.
+    Modo "orfao" (sem fences/map, ou orfao=True): glBufferData(None) no
+    primeiro envio do frame + glBufferSubData.
+
+    Se um frame passa da fatia, o anel dobra (o buffer antigo é órfão:
+    draws já emitidos continuam lendo dele).
+    """
+    ALINHAMENTO = 16
+    ESPERA_NS = 1_000_000_000   # prazo da espera por uma fatia antes de desistir
+
+    def __init__(self, bytes_regiao=1 << 18, regioes=3, alvo=GL_ARRAY_BUFFER, orfao=False):
+        self.alvo = alvo
+        self.regioes = int(regioes)
+        self.bytes_regiao = int(bytes_regiao)
+        self.modo = "orfao" if orfao or not (bool(glFenceSync) and bool(glMapBufferRange)) else "mapa"
+
+        self.buf = glGenBuffers(1)
+        self._fences = [None] * self.regioes
+        self._regiao = 0
+        self._cursor = 0
+        self._alocar()
+
+        self.bytes = 0
+        self.esperas = 0
+        self.orfaos = 0
+        self.ultimo_frame = {"bytes": 0, "esperas": 0, "orfaos": 0, "modo": self.modo}
+
+    def _alocar(self):
+        n = self.bytes_regiao if self.modo == "orfao" else self.bytes_regiao * self.regioes
+        glBindBuffer(self.alvo, self.buf)
+        glBufferData(self.alvo, n, None, GL_STREAM_DRAW)
+        glBindBuffer(self.alvo, 0)
+        for i, f in enumerate(self._fences):
+            if f is not None:
+                glDeleteSync(f)
+                self._fences[i] = None
+        self._regiao = 0
+        self._cursor = 0
+
+    def _base(self):
+        return 0 if self.modo == "orfao" else self._regiao * self.bytes_regiao
+
+    def escrever(self, dados):
+        """
+        Copia `dados` (array NumPy contíguo; não contíguo é copiado antes)
+        pra fatia do frame. Retorna o offset em bytes dentro de self.buf.
+        """
+        dados = np.ascontiguousarray(dados)
+        n = dados.nbytes
+        inicio = -(-self._cursor // self.ALINHAMENTO) * self.ALINHAMENTO
+        if inicio + n > self.bytes_regiao:
+            while inicio + n > self.bytes_regiao:
+                self.bytes_regiao *= 2
+            self._alocar()
+            inicio = 0
+
+        ofs = self._base() + inicio
+        glBindBuffer(self.alvo, self.buf)
+        if self.modo == "mapa":
+            ptr = glMapBufferRange(self.alvo, ofs, n, GL_MAP_WRITE_BIT
+                                   | GL_MAP_UNSYNCHRONIZED_BIT | GL_MAP_INVALIDATE_RANGE_BIT)
+            ctypes.memmove(ptr, dados.ctypes.data, n)
+            glUnmapBuffer(self.alvo)
+        else:
+            if self._cursor == 0:
+                glBufferData(self.alvo, self.bytes_regiao, None, GL_STREAM_DRAW)
+            glBufferSubData(self.alvo, ofs, n, dados)
+        glBindBuffer(self.alvo, 0)
+
+        self._cursor = inicio + n
+        self.bytes += n
+        return ofs
+
+    def novo_frame(self):
+        """Fecha a fatia do frame e libera a próxima (chamar depois dos draws)."""
+        if self.modo == "mapa":
+            if self._cursor:
+                self._fences[self._regiao] = glFenceSync(GL_SYNC_GPU_COMMANDS_COMPLETE, 0)
+            self._regiao = (self._regiao + 1) % self.regioes
+            f = self._fences[self._regiao]
+            if f is not None:
+                # normalmente já sinalizou (frame de `regioes` atrás); senão espera
+                r = glClientWaitSync(f, 0, 0)
+                if r == GL_TIMEOUT_EXPIRED:
+                    self.esperas += 1
+                    r = glClientWaitSync(f, GL_SYNC_FLUSH_COMMANDS_BIT, self.ESPERA_NS)
+                glDeleteSync(f)
+                self._fences[self._regiao] = None
+                if r not in (GL_ALREADY_SIGNALED, GL_CONDITION_SATISFIED):
+                    # fatia possivelmente ainda em uso: órfão do buffer todo em vez de mapear por cima
+                    self.orfaos += 1
+                    self._alocar()
+        self._cursor = 0
+
+        self.ultimo_frame = {"bytes": self.bytes, "esperas": self.esperas,
+                             "orfaos": self.orfaos, "modo": self.modo}
+        self.bytes = 0
+        self.esperas = 0
+        self.orfaos = 0
+
+    def destroy(self):
+        for f in self._fences:
+            if f is not None:
+                glDeleteSync(f)
+        self._fences = [None] * self.regioes
+        glDeleteBuffers(1, [self.buf])
+        self.buf = 0
+
+
+def transformarMalha(verts, idx, model):
+    """
+    Leva uma malha [pos(3) + normal(3) + uv(2)] para o espaço do mundo.
+    Posições por model, normais pela inversa-transposta (renormalizadas);
+    UVs ficam como estão (mesmo mapeamento do desenho por objeto).
+    Com escala negativa a ordem dos triângulos é invertida para manter o CCW.
+    """
+    m = np.asarray(model, dtype=np.float64)
+    v = verts.reshape(-1, 8).astype(np.float64)
+
+    out = np.empty_like(v)
+    out[:, 0:3] = v[:, 0:3] @ m[:3, :3].T + m[:3, 3]
+
+    normal_mat = np.linalg.inv(m[:3, :3]).T
+    n = v[:, 3:6] @ normal_mat.T
+    norm = np.linalg.norm(n, axis=1, keepdims=True)
+    out[:, 3:6] = n / np.maximum(norm, 1e-9)
+
+    out[:, 6:8] = v[:, 6:8]
+
+    tris = idx.reshape(-1, 3)
+    if np.linalg.det(m[:3, :3]) < 0.0:
+        tris = tris[:, ::-1]
+
+    return out.astype(np.float32).reshape(-1), np.ascontiguousarray(tris, dtype=np.uint32).reshape(-1)
+
+
+def mesclarMalhas(malhas):
+    """[(verts, idx), ...] -> (verts, idx) numa malha só, com os índices deslocados."""
+    todos_v = []
+    todos_i = []
+    base = 0
+    for verts, idx in malhas:
+        todos_v.append(verts.reshape(-1, 8))
+        todos_i.append(idx.astype(np.uint32) + base)
+        base += verts.size // 8
+
+    verts = np.concatenate(todos_v).astype(np.float32).reshape(-1)
+    idx = np.concatenate(todos_i).astype(np.uint32)
+    return verts, idx
+
+
+@lru_cache(maxsize=None)
+def _grade_baricentrica(n):
+    """Pesos (k,3) dos pontos de um triângulo dividido em n² e os (n²,3) sub-triângulos."""
+    pontos = {}
+    pesos = []
+    for i in range(n + 1):
+        for j in range(n + 1 - i):
+            pontos[(i, j)] = len(pesos)
+            pesos.append((1.0 - (i + j) / n, i / n, j / n))
+
+    tris = []
+    for i in range(n):
+        for j in range(n - i):
+            tris.append((pontos[(i, j)], pontos[(i + 1, j)], pontos[(i, j + 1)]))
+            if i + j < n - 1:
+                tris.append((pontos[(i + 1, j)], pontos[(i + 1, j + 1)], pontos[(i, j + 1)]))
+    return np.array(pesos, dtype=np.float32), np.array(tris, dtype=np.uint32)
+
+
+def subdividirMalha(verts, idx, passo, max_div=64):
+    """
+    Quebra cada triângulo de uma malha [pos(3) + normal(3) + uv(2)] em n²
+    (n = maior aresta / passo), pra iluminação por vértice ter resolução.
+    Atributos interpolados linearmente (normais renormalizadas).
+    """
+    v = verts.reshape(-1, 8)
+    tris = idx.reshape(-1, 3)
+    cantos = v[tris]                                        # (T,3,8)
+
+    p = cantos[:, :, 0:3]
+    arestas = np.stack([p[:, 1] - p[:, 0], p[:, 2] - p[:, 1], p[:, 0] - p[:, 2]], axis=1)
+    maior = np.linalg.norm(arestas, axis=2).max(axis=1)
+    divs = np.clip(np.ceil(maior / passo), 1, max_div).astype(np.int32)
+
+    todos_v = []
+    todos_i = []
+    base = 0
+    for n in np.unique(divs):
+        grupo = cantos[divs == n]                           # (G,3,8)
+        pesos, sub = _grade_baricentrica(int(n))
+        novos = np.einsum("kc,gcf->gkf", pesos, grupo)      # (G,k,8)
+        k = len(pesos)
+
+        nrm = novos[:, :, 3:6]
+        novos[:, :, 3:6] = nrm / np.maximum(np.linalg.norm(nrm, axis=2, keepdims=True), 1e-9)
+
+        deslocamento = (np.arange(len(grupo), dtype=np.uint32) * k)[:, None, None]
+        todos_v.append(novos.reshape(-1, 8))
+        todos_i.append((sub[None, :, :] + deslocamento).reshape(-1) + base)
+        base += len(grupo) * k
+
+    verts = np.concatenate(todos_v).astype(np.float32).reshape(-1)
+    idx = np.concatenate(todos_i).astype(np.uint32)
+    return verts, idx
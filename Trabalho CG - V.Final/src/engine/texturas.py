@@ -1,11 +1,205 @@
 from __future__ import annotations
-from dataclasses import dataclass
+import gc
+import hashlib
+import mmap
+import os
+import struct
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Optional
+from typing import NamedTuple, Optional
 
+import numpy as np
 from OpenGL.GL import *
 from PIL import Image
 
+from core.estado_gl import estado_gl
+
+
+def decodificar(path: str | Path, flip_y: bool = True, tamanho: Optional[tuple[int, int]] = None,
+                filtro=Image.BICUBIC) -> tuple[int, int, bytes]:
+    """
+    PNG/JPG -> (w, h, bytes RGBA), reamostrado pra `tamanho` se vier.
+    Só CPU (sem GL): pode rodar em outra thread.
+    """
+    with Image.open(Path(path)) as img:
+        img = img.convert("RGBA")
+    if tamanho is not None and img.size != tuple(tamanho):
+        img = img.resize(tuple(tamanho), filtro)
+    if flip_y:
+        img = img.transpose(Image.FLIP_TOP_BOTTOM)
+    w, h = img.size
+    return w, h, img.tobytes("raw", "RGBA", 0, -1)
+
+
+def cadeia_mipmaps(w: int, h: int, base) -> list[np.ndarray]:
+    """Níveis 1..n (até 1x1) de uma imagem RGBA8, média de 2x2 (box, como o glGenerateMipmap)."""
+    nivel = np.frombuffer(base, dtype=np.uint8).reshape(h, w, 4)
+    niveis = []
+    while w > 1 or h > 1:
+        nw, nh = max(1, w // 2), max(1, h // 2)
+        a = nivel.astype(np.float32)
+        if h > 1:
+            a = (a[0:nh * 2:2] + a[1:nh * 2:2]) * 0.5
+        if w > 1:
+            a = (a[:, 0:nw * 2:2] + a[:, 1:nw * 2:2]) * 0.5
+        nivel = np.rint(a).astype(np.uint8)
+        niveis.append(nivel)
+        w, h = nw, nh
+    return niveis
+
+
+@dataclass
+class Texels:
+    """Níveis RGBA8 prontos pra subir (0 = base). `mapa`: mmap que os contém, se veio do cache."""
+    width: int
+    height: int
+    niveis: list
+    mapa: Optional[mmap.mmap] = field(default=None, repr=False)
+
+    def fechar(self) -> None:
+        # as views (np.frombuffer) seguram o mmap: com uma viva o close falha
+        self.niveis.clear()
+        if self.mapa is not None:
+            try:
+                self.mapa.close()
+            except BufferError:
+                gc.collect()   # view presa num ciclo (traceback de um upload que falhou)
+                try:
+                    self.mapa.close()
+                except BufferError as erro:
+                    print(f"texturas: mmap do cache continua aberto ({erro}); "
+                          "fecha quando a última view for coletada")
+            self.mapa = None
+
+
+class CacheTexels:
+    """
+    Texels já decodificados (RGBA8, com o flip aplicado) guardados em disco e
+    lidos com mmap no próximo launch: o buffer vai direto pro glTexImage2D,
+    sem PNG, sem convert, sem cópia.
+
+    Arquivo: <sha1(caminho, flip, mips, tamanho)>.tex = cabeçalho + níveis em sequência
+    (base e, se `mipmaps`, a cadeia inteira até 1x1, calculada aqui).
+
+    Validade: mtime e tamanho iguais aos do fonte -> usa direto. Mudou o mtime
+    (checkout, cópia) -> compara o sha1 do fonte; igual, só corrige o mtime no
+    cabeçalho. Diferente, arquivo estranho ou versão velha -> decodifica e regrava.
+
+    `ler` não usa GL: roda nas threads do GerenciadorTexturas.
+    """
+    MAGICO = b"TEXC"
+    VERSAO = 1
+    # mágico, versão, flags, largura, altura, níveis, mtime_ns, tamanho do fonte, sha1 do fonte
+    CABECALHO = struct.Struct("<4sHHIIIQQ20s")
+    INICIO = 64                    # texels começam aqui (cabeçalho + folga)
+    _POS_MTIME = 20                # offset do mtime_ns no cabeçalho
+
+    FLIP = 1
+    MIPS = 2
+
+    def __init__(self, pasta, mipmaps: bool = True):
+        self.pasta = Path(pasta)
+        self.mipmaps = mipmaps
+        self._trava = threading.Lock()
+        self.acertos = 0
+        self.revalidados = 0
+        self.gerados = 0
+
+    def arquivo(self, path: str | Path, flags: int, tamanho=None, filtro=Image.BICUBIC) -> Path:
+        extra = f"|{tuple(tamanho)}|{int(filtro)}" if tamanho is not None else ""
+        h = hashlib.sha1(f"{Path(path).resolve()}|{flags}{extra}".encode("utf-8"))
+        return self.pasta / (h.hexdigest() + ".tex")
+
+    @staticmethod
+    def _hash_fonte(path: str | Path) -> bytes:
+        with open(path, "rb") as f:
+            return hashlib.sha1(f.read()).digest()
+
+    def _contar(self, nome: str) -> None:
+        with self._trava:
+            setattr(self, nome, getattr(self, nome) + 1)
+
+    def ler(self, path: str | Path, flip_y: bool = True, mipmaps: bool = False,
+            tamanho: Optional[tuple[int, int]] = None, filtro=Image.BICUBIC) -> Texels:
+        """tamanho: guarda já reamostrado (decodificar), num arquivo próprio."""
+        flags = (self.FLIP if flip_y else 0) | (self.MIPS if mipmaps and self.mipmaps else 0)
+        arquivo = self.arquivo(path, flags, tamanho, filtro)
+        st = os.stat(path)
+
+        texels = self._abrir(arquivo, path, flags, st)
+        if texels is not None:
+            return texels
+
+        w, h, base = decodificar(path, flip_y, tamanho, filtro)
+        niveis = [base] + (cadeia_mipmaps(w, h, base) if flags & self.MIPS else [])
+        self._salvar(arquivo, flags, w, h, niveis, st, self._hash_fonte(path))
+        self._contar("gerados")
+        return Texels(w, h, niveis)
+
+    def _abrir(self, arquivo: Path, path, flags: int, st) -> Optional[Texels]:
+        try:
+            with open(arquivo, "rb") as f:
+                mapa = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):   # não existe / vazio
+            return None
+
+        try:
+            magico, versao, f_flags, w, h, n, mtime, tamanho, sha = self.CABECALHO.unpack_from(mapa)
+        except struct.error:
+            mapa.close()
+            return None
+        tamanhos = [max(1, w >> i) * max(1, h >> i) * 4 for i in range(n)]
+        if (magico != self.MAGICO or versao != self.VERSAO or f_flags != flags
+                or mapa.size() != self.INICIO + sum(tamanhos)):
+            mapa.close()
+            return None
+
+        if mtime != st.st_mtime_ns or tamanho != st.st_size:
+            if tamanho != st.st_size or sha != self._hash_fonte(path):
+                mapa.close()
+                return None
+            # mesmo conteúdo, só o mtime mudou: corrige pra não precisar do hash de novo
+            try:
+                with open(arquivo, "r+b") as f:
+                    f.seek(self._POS_MTIME)
+                    f.write(struct.pack("<Q", st.st_mtime_ns))
+            except OSError:
+                pass
+            self._contar("revalidados")
+        else:
+            self._contar("acertos")
+
+        niveis = []
+        pos = self.INICIO
+        for i, t in enumerate(tamanhos):
+            niveis.append(np.frombuffer(mapa, dtype=np.uint8, count=t, offset=pos))
+            pos += t
+        return Texels(w, h, niveis, mapa)
+
+    def _salvar(self, arquivo: Path, flags: int, w: int, h: int, niveis, st, sha: bytes) -> None:
+        cab = self.CABECALHO.pack(self.MAGICO, self.VERSAO, flags, w, h, len(niveis),
+                                  st.st_mtime_ns, st.st_size, sha)
+        temp = arquivo.with_name(f"{arquivo.name}.{os.getpid()}.{threading.get_ident()}")
+        try:
+            self.pasta.mkdir(parents=True, exist_ok=True)
+            with open(temp, "wb") as f:
+                f.write(cab.ljust(self.INICIO, b"\0"))
+                for nivel in niveis:
+                    f.write(nivel)
+            os.replace(temp, arquivo)   # quem lê nunca vê arquivo pela metade
+        except OSError:
+            try:
+                temp.unlink()
+            except OSError:
+                pass   # cache é só otimização
+
+    def relatorio(self) -> dict:
+        return {"acertos": self.acertos, "revalidados": self.revalidados, "gerados": self.gerados}
+
 
 @dataclass
 class Texture2D:
@@ -13,6 +207,10 @@ class Texture2D:
     width: int
     height: int
 
+    # interface comum com CamadaTextura (core.renderizador / core.fila_render)
+    alvo = GL_TEXTURE_2D
+    indice = 0
+
     @staticmethod
     def from_file(
         path: str | Path,
@@ -24,18 +222,53 @@ class Texture2D:
         mag_filter=GL_LINEAR,
         wrap_s=GL_REPEAT,
         wrap_t=GL_REPEAT,
+        cache: Optional[CacheTexels] = None,
     ) -> "Texture2D":
-        path = Path(path)
-
-        img = Image.open(path).convert("RGBA")
-        if flip_y:
-            img = img.transpose(Image.FLIP_TOP_BOTTOM)
+        if cache is not None:
+            texels = cache.ler(path, flip_y, generate_mipmaps)
+        else:
+            w, h, data = decodificar(path, flip_y)
+            texels = Texels(w, h, [data])
+        try:
+            return Texture2D.from_texels(
+                texels,
+                srgb=srgb,
+                generate_mipmaps=generate_mipmaps,
+                min_filter=min_filter,
+                mag_filter=mag_filter,
+                wrap_s=wrap_s,
+                wrap_t=wrap_t,
+            )
+        finally:
+            texels.fechar()
 
-        w, h = img.size
-        data = img.tobytes("raw", "RGBA", 0, -1)
+    @staticmethod
+    def from_texels(texels: Texels, **opcoes) -> "Texture2D":
+        """Sobe um Texels (base + mipmaps prontos, se tiver). Não fecha o mmap."""
+        return Texture2D.from_pixels(texels.width, texels.height, texels.niveis[0],
+                                     mipmaps=texels.niveis[1:], **opcoes)
 
+    @staticmethod
+    def from_pixels(
+        w: int,
+        h: int,
+        data,
+        *,
+        mipmaps: Optional[list] = None,
+        srgb: bool = False,
+        generate_mipmaps: bool = True,
+        min_filter=GL_LINEAR_MIPMAP_LINEAR,
+        mag_filter=GL_LINEAR,
+        wrap_s=GL_REPEAT,
+        wrap_t=GL_REPEAT,
+    ) -> "Texture2D":
+        """
+        Sobe pixels RGBA já decodificados (linha 0 embaixo se veio com flip_y).
+        mipmaps: níveis 1..n já calculados (cadeia_mipmaps); sem eles e com
+        generate_mipmaps, o driver gera.
+        """
         tex_id = glGenTextures(1)
-        glBindTexture(GL_TEXTURE_2D, tex_id)
+        estado_gl.bind_texture(GL_TEXTURE_2D, tex_id)
 
         # filtros e wrap
         glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, int(min_filter))
@@ -56,16 +289,503 @@ class Texture2D:
             data
         )
 
-        if generate_mipmaps:
+        if generate_mipmaps and mipmaps:
+            for nivel, texels in enumerate(mipmaps, start=1):
+                glTexImage2D(GL_TEXTURE_2D, nivel, internal_format,
+                             max(1, w >> nivel), max(1, h >> nivel), 0,
+                             GL_RGBA, GL_UNSIGNED_BYTE, texels)
+        elif generate_mipmaps:
             glGenerateMipmap(GL_TEXTURE_2D)
 
-        glBindTexture(GL_TEXTURE_2D, 0)
+        estado_gl.bind_texture(GL_TEXTURE_2D, 0)
         return Texture2D(tex_id, w, h)
 
     def bind(self, unit: int = 0) -> None:
-        glActiveTexture(GL_TEXTURE0 + unit)
-        glBindTexture(GL_TEXTURE_2D, self.id)
+        estado_gl.bind_texture(GL_TEXTURE_2D, self.id, unidade=unit)
 
     def destroy(self) -> None:
+        estado_gl.esquecer_textura(self.id)
         glDeleteTextures([self.id])
         self.id = 0
+
+
+# <----------------------------->
+# ARRAYS (GL_TEXTURE_2D_ARRAY)
+# <----------------------------->
+def reamostrar(texels: Texels, w: int, h: int, filtro=Image.BICUBIC) -> Texels:
+    """Texels -> outro tamanho (só o nível base; os mipmaps saem de novo depois)."""
+    img = Image.frombuffer("RGBA", (texels.width, texels.height),
+                           bytes(texels.niveis[0]), "raw", "RGBA", 0, 1)
+    return Texels(w, h, [img.resize((w, h), filtro).tobytes()])
+
+
+class CamadaTextura(NamedTuple):
+    """Uma camada de um TextureArray2D, usada como `tex` na fila/desenhar."""
+    array: "TextureArray2D"
+    indice: int
+
+    alvo = GL_TEXTURE_2D_ARRAY
+
+    @property
+    def id(self) -> int:
+        return self.array.id
+
+    def bind(self, unit: int = 0) -> None:
+        self.array.bind(unit)
+
+
+@dataclass
+class TextureArray2D:
+    """
+    Várias imagens do mesmo papel (chão de cada mundo, ...) num
+    GL_TEXTURE_2D_ARRAY: fica ligado o mesmo objeto e o material só escolhe a
+    camada (uniform uCamada, variante TEXTURE_ARRAY do basic.frag).
+    """
+    id: int
+    width: int
+    height: int
+    camadas: int
+    bytes: int = 0
+    niveis: int = 1                       # níveis alocados (1 = sem mipmaps)
+    filtro: int = Image.BICUBIC           # reamostragem de camada fora do tamanho
+
+    alvo = GL_TEXTURE_2D_ARRAY
+
+    @staticmethod
+    def vazio(
+        w: int,
+        h: int,
+        camadas: int,
+        *,
+        srgb: bool = False,
+        generate_mipmaps: bool = True,
+        min_filter=GL_LINEAR_MIPMAP_LINEAR,
+        mag_filter=GL_LINEAR,
+        wrap_s=GL_REPEAT,
+        wrap_t=GL_REPEAT,
+    ) -> "TextureArray2D":
+        """Aloca w x h x camadas (com a cadeia de mipmaps inteira, se pedir), sem dados."""
+        niveis = max(w, h).bit_length() if generate_mipmaps else 1
+
+        tex_id = glGenTextures(1)
+        estado_gl.bind_texture(GL_TEXTURE_2D_ARRAY, tex_id)
+
+        glTexParameteri(GL_TEXTURE_2D_ARRAY, GL_TEXTURE_MIN_FILTER, int(min_filter))
+        glTexParameteri(GL_TEXTURE_2D_ARRAY, GL_TEXTURE_MAG_FILTER, int(mag_filter))
+        glTexParameteri(GL_TEXTURE_2D_ARRAY, GL_TEXTURE_WRAP_S, int(wrap_s))
+        glTexParameteri(GL_TEXTURE_2D_ARRAY, GL_TEXTURE_WRAP_T, int(wrap_t))
+
+        internal_format = GL_SRGB8_ALPHA8 if srgb else GL_RGBA8
+        for nivel in range(niveis):
+            glTexImage3D(GL_TEXTURE_2D_ARRAY, nivel, internal_format,
+                         max(1, w >> nivel), max(1, h >> nivel), camadas,
+                         0, GL_RGBA, GL_UNSIGNED_BYTE, None)
+
+        estado_gl.bind_texture(GL_TEXTURE_2D_ARRAY, 0)
+        filtro = Image.NEAREST if mag_filter == GL_NEAREST else Image.BICUBIC
+        return TextureArray2D(tex_id, w, h, camadas,
+                              bytes_textura(w, h, generate_mipmaps) * camadas, niveis, filtro)
+
+    @staticmethod
+    def from_texels(
+        texels: list[Texels],
+        *,
+        largura: Optional[int] = None,
+        altura: Optional[int] = None,
+        **opcoes,
+    ) -> "TextureArray2D":
+        """
+        Uma camada por Texels, na ordem. Tamanho comum: largura x altura
+        (padrão: a maior de cada eixo). Não fecha os Texels.
+        """
+        w = largura or max(t.width for t in texels)
+        h = altura or max(t.height for t in texels)
+        arr = TextureArray2D.vazio(w, h, len(texels), **opcoes)
+        faltam = False
+        for camada, t in enumerate(texels):
+            faltam |= arr.enviar_camada(camada, t, gerar_mipmaps=False)
+        if faltam:
+            arr.gerar_mipmaps()
+        return arr
+
+    def enviar_camada(self, indice: int, texels: Texels, gerar_mipmaps: bool = True) -> bool:
+        """
+        Sobe texels na camada `indice` (reamostra se o tamanho não bate; NEAREST
+        se o array é GL_NEAREST, senão bicúbico). Usa a cadeia de mipmaps que
+        vier pronta; sem ela, gera (ou, com gerar_mipmaps=False, retorna True
+        pra quem chama gerar uma vez só depois).
+        """
+        if (texels.width, texels.height) != (self.width, self.height):
+            texels = reamostrar(texels, self.width, self.height, self.filtro)
+        prontos = len(texels.niveis) == self.niveis
+        niveis = self.niveis if prontos else 1
+
+        estado_gl.bind_texture(GL_TEXTURE_2D_ARRAY, self.id)
+        for nivel in range(niveis):
+            glTexSubImage3D(GL_TEXTURE_2D_ARRAY, nivel, 0, 0, indice,
+                            max(1, self.width >> nivel), max(1, self.height >> nivel), 1,
+                            GL_RGBA, GL_UNSIGNED_BYTE, texels.niveis[nivel])
+        estado_gl.bind_texture(GL_TEXTURE_2D_ARRAY, 0)
+
+        faltam = not prontos and self.niveis > 1
+        if faltam and gerar_mipmaps:
+            self.gerar_mipmaps()
+            return False
+        return faltam
+
+    def gerar_mipmaps(self) -> None:
+        estado_gl.bind_texture(GL_TEXTURE_2D_ARRAY, self.id)
+        glGenerateMipmap(GL_TEXTURE_2D_ARRAY)
+        estado_gl.bind_texture(GL_TEXTURE_2D_ARRAY, 0)
+
+    def camada(self, indice: int) -> CamadaTextura:
+        return CamadaTextura(self, indice)
+
+    def bind(self, unit: int = 0) -> None:
+        estado_gl.bind_texture(GL_TEXTURE_2D_ARRAY, self.id, unidade=unit)
+
+    def destroy(self) -> None:
+        estado_gl.esquecer_textura(self.id)
+        glDeleteTextures([self.id])
+        self.id = 0
+
+
+# padrões do Texture2D.from_file (chave do cache)
+OPCOES_PADRAO = {
+    "flip_y": True,
+    "srgb": False,
+    "generate_mipmaps": True,
+    "min_filter": GL_LINEAR_MIPMAP_LINEAR,
+    "mag_filter": GL_LINEAR,
+    "wrap_s": GL_REPEAT,
+    "wrap_t": GL_REPEAT,
+}
+
+
+def tamanho_comum(caminhos) -> tuple[int, int]:
+    """Maior largura e maior altura dos arquivos (só lê o cabeçalho)."""
+    w = h = 0
+    for c in caminhos:
+        with Image.open(Path(c)) as img:
+            w = max(w, img.size[0])
+            h = max(h, img.size[1])
+    return w, h
+
+
+def bytes_textura(w: int, h: int, mipmaps: bool) -> int:
+    """Memória estimada de uma textura RGBA8 (a cadeia de mipmaps soma ~1/3)."""
+    n = w * h * 4
+    return n * 4 // 3 if mipmaps else n
+
+
+@dataclass
+class _Entrada:
+    tex: Texture2D | CamadaTextura
+    bytes: int
+    refs: int = 0
+
+
+@dataclass
+class _Pedido:
+    opcoes: dict
+    decodificacao: Future      # Texels, da thread de decodificação
+    pronto: Future             # Texture2D ou CamadaTextura, resolvido no upload (thread do GL)
+    refs: int = 0
+    array: Optional[TextureArray2D] = None   # sobe numa camada livre dele
+
+
+@dataclass
+class _Array:
+    arr: TextureArray2D
+    opcoes: dict
+    livres: list[int]          # camadas sem entrada, em ordem
+
+
+class GerenciadorTexturas:
+    """
+    Cache de texturas por (caminho, opções do from_file).
+
+      tex = texturas.obter("src/textures/x.png", generate_mipmaps=False)
+      texturas.liberar(tex)      # um liberar por obter
+
+    Assíncrono: a decodificação (PIL, solta o GIL) roda num pool de threads
+    e o upload fica na thread do GL, quando alguém bombeia:
+
+      f = texturas.pedir(caminho, **opcoes)   # Future -> Texture2D (conta referência)
+      texturas.carregar(caminho, **opcoes)    # só adianta a decodificação
+      texturas.bombear(tempo_max=0.004)       # 1x por frame: sobe o que já decodificou
+      texturas.esperar()                      # sobe tudo que falta (bloqueia)
+
+    O mesmo arquivo com as mesmas opções sobe uma vez só. Textura sem
+    referência continua na GPU (um novo obter sai de graça) até o total
+    passar de `orcamento` bytes; aí as menos usadas recentemente saem.
+    Textura com referência nunca é despejada, mesmo acima do orçamento.
+
+    Com `cache` (CacheTexels), as threads leem os texels do disco em vez de
+    decodificar o PNG.
+
+    Arrays: `alocar_array` cria um TextureArray2D vazio cujas camadas são
+    entradas do cache como as outras. pedir/obter/carregar com `array=arr`
+    usam as opções do array, leem no tamanho dele e sobem numa camada livre
+    (Future -> CamadaTextura). A chave é a mesma pra qualquer array de mesmas
+    opções: o mesmo arquivo pedido por dois arrays fica numa camada só, a do
+    primeiro. Despejar uma camada só a devolve ao array; sem camada livre, o
+    upload despeja a camada sem referência menos usada do array. O array fica
+    com o gerenciador até `liberar_array`/destroy.
+    """
+
+    def __init__(self, orcamento: int = 64 << 20, threads: Optional[int] = None):
+        self.orcamento = int(orcamento)
+        self.threads = threads or min(4, os.cpu_count() or 1)
+        self._entradas: OrderedDict[tuple, _Entrada] = OrderedDict()   # LRU: mais antiga primeiro
+        self._chave_tex: dict[tuple[int, int], tuple] = {}              # (id, camada) -> chave
+        self._pedidos: dict[tuple, _Pedido] = {}
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self.cache: Optional[CacheTexels] = None
+        self._arrays: dict[int, _Array] = {}
+        self.bytes = 0
+        self.carregadas = 0
+        self.acertos = 0
+        self.despejadas = 0
+        self.ms_upload = 0.0
+
+    @staticmethod
+    def chave(path: str | Path, em_array: bool = False, **opcoes) -> tuple:
+        # opções omitidas valem o padrão do from_file (mesma textura, mesma chave)
+        return (str(Path(path).resolve()), em_array,
+                tuple(sorted({**OPCOES_PADRAO, **opcoes}.items())))
+
+    # <----------------------------->
+    # PEDIDOS
+    # <----------------------------->
+    def _pedido(self, path: str | Path, opcoes: dict,
+                array: Optional[TextureArray2D] = None) -> tuple[tuple, Optional[_Pedido]]:
+        """Chave e pedido pendente (criado se preciso); None se já está na GPU."""
+        if array is not None:
+            opcoes = self._arrays[array.id].opcoes
+        chave = self.chave(path, array is not None, **opcoes)
+        if chave in self._entradas:
+            return chave, None
+        p = self._pedidos.get(chave)
+        if p is None:
+            tamanho = (array.width, array.height) if array is not None else None
+            dec = self._executor().submit(self._ler, path, opcoes, tamanho)
+            p = _Pedido(opcoes, dec, Future(), array=array)
+            self._pedidos[chave] = p
+        return chave, p
+
+    def _ler(self, path: str | Path, opcoes: dict, tamanho=None) -> Texels:
+        flip_y = opcoes.get("flip_y", True)
+        filtro = Image.NEAREST if opcoes.get("mag_filter") == GL_NEAREST else Image.BICUBIC
+        if self.cache is not None:
+            return self.cache.ler(path, flip_y, opcoes.get("generate_mipmaps", True),
+                                  tamanho, filtro)
+        w, h, dados = decodificar(path, flip_y, tamanho, filtro)
+        return Texels(w, h, [dados])
+
+    def _executor(self) -> ThreadPoolExecutor:
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(self.threads, thread_name_prefix="texturas")
+        return self._pool
+
+    def ler(self, path: str | Path, tamanho: Optional[tuple[int, int]] = None, **opcoes) -> Future:
+        """Future -> Texels (decodificado ou do cache), sem subir nada."""
+        return self._executor().submit(self._ler, path, opcoes, tamanho)
+
+    def alocar_array(self, w: int, h: int, camadas: int, **opcoes) -> TextureArray2D:
+        """TextureArray2D.vazio, guardado aqui até liberar_array/destroy (camadas: pedir(array=))."""
+        opcoes_gl = {k: v for k, v in opcoes.items() if k != "flip_y"}
+        arr = TextureArray2D.vazio(w, h, camadas, **opcoes_gl)
+        self._arrays[arr.id] = _Array(arr, dict(opcoes), list(range(camadas)))
+        return arr
+
+    def liberar_array(self, arr: TextureArray2D) -> None:
+        """Destrói o array com as camadas dele (referência que sobrou também cai)."""
+        for chave, p in list(self._pedidos.items()):
+            if p.array is arr:
+                del self._pedidos[chave]
+                self._descartar(p)
+        for chave, e in list(self._entradas.items()):
+            if isinstance(e.tex, CamadaTextura) and e.tex.array is arr:
+                self._remover(chave)
+        del self._arrays[arr.id]
+        arr.destroy()
+
+    def carregar(self, path: str | Path, array: Optional[TextureArray2D] = None, **opcoes) -> None:
+        """Começa a decodificar (sem referência: se ninguém pedir, pode ser despejada)."""
+        self._pedido(path, opcoes, array)
+
+    def pedir(self, path: str | Path, array: Optional[TextureArray2D] = None, **opcoes) -> Future:
+        chave, p = self._pedido(path, opcoes, array)
+        if p is None:
+            e = self._entradas[chave]
+            self._entradas.move_to_end(chave)
+            self.acertos += 1
+            e.refs += 1
+            f = Future()
+            f.set_result(e.tex)
+            return f
+        p.refs += 1
+        return p.pronto
+
+    def obter(self, path: str | Path, array: Optional[TextureArray2D] = None, **opcoes):
+        f = self.pedir(path, array, **opcoes)
+        if not f.done():
+            chave, p = self._pedido(path, opcoes, array)
+            self._subir(chave, p)
+            self._despejar()
+        return f.result()
+
+    def _camada_livre(self, arr: TextureArray2D) -> Optional[CamadaTextura]:
+        a = self._arrays[arr.id]
+        if not a.livres:
+            # cheio: sai a camada sem referência menos usada deste array
+            for chave, e in self._entradas.items():
+                if isinstance(e.tex, CamadaTextura) and e.tex.array is arr and e.refs == 0:
+                    self._remover(chave)
+                    self.despejadas += 1
+                    break
+        return arr.camada(a.livres.pop(0)) if a.livres else None
+
+    def _subir(self, chave: tuple, p: _Pedido) -> None:
+        # thread do GL; espera a decodificação se ainda não acabou
+        del self._pedidos[chave]
+        try:
+            texels = p.decodificacao.result()
+        except Exception as erro:
+            p.pronto.set_exception(erro)
+            raise
+
+        t0 = time.perf_counter()
+        try:
+            if p.array is None:
+                opcoes_gl = {k: v for k, v in p.opcoes.items() if k != "flip_y"}
+                tex = Texture2D.from_texels(texels, **opcoes_gl)
+                n = bytes_textura(tex.width, tex.height, p.opcoes.get("generate_mipmaps", True))
+            else:
+                tex = self._camada_livre(p.array)
+                if tex is None:
+                    if p.refs == 0:   # ninguém esperando: não vale tirar camada de quem usa
+                        p.pronto.cancel()
+                        return
+                    erro = RuntimeError(f"array {p.array.id}: as {p.array.camadas} camadas estão em uso")
+                    p.pronto.set_exception(erro)
+                    raise erro
+                p.array.enviar_camada(tex.indice, texels)
+                n = p.array.bytes // p.array.camadas
+        finally:
+            texels.fechar()
+        self.ms_upload += (time.perf_counter() - t0) * 1000.0
+
+        e = _Entrada(tex, n, p.refs)
+        self._entradas[chave] = e
+        self._chave_tex[(tex.id, tex.indice)] = chave
+        self.bytes += e.bytes
+        self.carregadas += 1
+        p.pronto.set_result(tex)
+
+    def bombear(self, tempo_max: Optional[float] = None) -> int:
+        """
+        Sobe as texturas que já terminaram de decodificar (chamar na thread
+        do GL). tempo_max (s) limita o trabalho por chamada. Retorna quantas subiram.
+        """
+        t0 = time.perf_counter()
+        n = 0
+        for chave, p in list(self._pedidos.items()):
+            if not p.decodificacao.done():
+                continue
+            self._subir(chave, p)
+            n += 1
+            if tempo_max is not None and time.perf_counter() - t0 > tempo_max:
+                break
+        if n:
+            self._despejar()
+        return n
+
+    def esperar(self) -> None:
+        """Sobe todos os pedidos pendentes, esperando as decodificações."""
+        while self._pedidos:
+            chave, p = next(iter(self._pedidos.items()))
+            self._subir(chave, p)
+        self._despejar()
+
+    @property
+    def pendentes(self) -> int:
+        return len(self._pedidos)
+
+    def liberar(self, tex) -> None:
+        """Solta uma referência de obter/pedir: a textura, ou o Future do pedir ainda pendente."""
+        if isinstance(tex, Future):
+            if not tex.done():
+                for p in self._pedidos.values():
+                    if p.pronto is tex:
+                        p.refs = max(0, p.refs - 1)
+                        return
+                return
+            if tex.cancelled() or tex.exception() is not None:
+                return
+            tex = tex.result()
+        chave = self._chave_tex.get((tex.id, tex.indice))
+        if chave is None:
+            return
+        e = self._entradas[chave]
+        e.refs = max(0, e.refs - 1)
+        if e.refs == 0:
+            self._despejar()
+
+    def _despejar(self) -> None:
+        for chave in list(self._entradas):
+            if self.bytes <= self.orcamento:
+                return
+            e = self._entradas[chave]
+            if e.refs == 0:
+                self._remover(chave)
+                self.despejadas += 1
+
+    def _remover(self, chave: tuple) -> None:
+        e = self._entradas.pop(chave)
+        del self._chave_tex[(e.tex.id, e.tex.indice)]
+        self.bytes -= e.bytes
+        if isinstance(e.tex, CamadaTextura):
+            livres = self._arrays[e.tex.id].livres
+            livres.append(e.tex.indice)
+            livres.sort()
+        else:
+            e.tex.destroy()
+
+    @staticmethod
+    def _descartar(p: _Pedido) -> None:
+        p.pronto.cancel()
+        if not p.decodificacao.cancel() and p.decodificacao.done() \
+                and p.decodificacao.exception() is None:
+            p.decodificacao.result().fechar()
+
+    def estatisticas(self) -> dict:
+        return {
+            "residentes": len(self._entradas),
+            "em_uso": sum(1 for e in self._entradas.values() if e.refs),
+            "bytes": self.bytes,
+            "carregadas": self.carregadas,
+            "acertos": self.acertos,
+            "despejadas": self.despejadas,
+            "pendentes": len(self._pedidos),
+            "arrays": len(self._arrays),
+            "bytes_arrays": sum(a.arr.bytes for a in self._arrays.values()),
+        }
+
+    def destroy(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
+        for p in self._pedidos.values():
+            self._descartar(p)
+        self._pedidos.clear()
+        for chave in list(self._entradas):
+            self._remover(chave)
+        for a in self._arrays.values():
+            a.arr.destroy()
+        self._arrays.clear()
+
+
+# cache do processo (um contexto GL só)
+texturas = GerenciadorTexturas()
@@ -56,4 +56,158 @@ def ortho(l, r, b, t, n=-1.0, f=1.0):
     M[0,3] = -(r + l) / (r - l)
     M[1,3] = -(t + b) / (t - b)
     M[2,3] = -(f + n) / (f - n)
-    return M
\ No newline at end of file
+    return M
+
+# <----------------------------->
+# TRS DIRETO / EM LOTE
+# <----------------------------->
+# trs() escreve translacao @ rotacaoY @ rotacaoX @ escala já composta, sem
+# np.eye nem matmul. As versões no plural montam N matrizes (N,4,4) float32
+# numa passada. Todas aceitam `out` pra reaproveitar o buffer entre frames.
+
+def trs(pos, yaw=0.0, pitch=0.0, esc=(1.0, 1.0, 1.0), out=None):
+    """
+    translacao(pos) @ rotacaoY(yaw) @ rotacaoX(pitch) @ escala(esc).
+    esc: escalar (uniforme) ou (sx, sy, sz); out: (4,4) float32 contígua.
+    """
+    if np.ndim(esc) == 0:   # int/float ou escalar NumPy
+        sx = sy = sz = float(esc)
+    else:
+        sx, sy, sz = esc
+    cy, sny = math.cos(yaw), math.sin(yaw)
+    if pitch:
+        cx, snx = math.cos(pitch), math.sin(pitch)
+    else:
+        cx, snx = 1.0, 0.0
+
+    v = (cy * sx, sny * snx * sy, sny * cx * sz, pos[0],
+         0.0, cx * sy, -snx * sz, pos[1],
+         -sny * sx, cy * snx * sy, cy * cx * sz, pos[2],
+         0.0, 0.0, 0.0, 1.0)
+    if out is None:
+        return np.array(v, dtype=np.float32).reshape(4, 4)
+    out.reshape(16)[:] = v   # uma escrita só (reshape de array contígua é view)
+    return out
+
+def _lote(n, out):
+    M = out if out is not None else np.empty((n, 4, 4), dtype=np.float32)
+    M[:] = 0.0
+    M[:, 3, 3] = 1.0
+    return M
+
+def translacoes(pos, out=None):
+    pos = np.asarray(pos, dtype=np.float32).reshape(-1, 3)
+    M = _lote(len(pos), out)
+    M[:, 0, 0] = M[:, 1, 1] = M[:, 2, 2] = 1.0
+    M[:, 0:3, 3] = pos
+    return M
+
+def escalas(esc, out=None):
+    """esc: escalar (1 objeto, ou len(out)), (N,) uniforme ou (N,3)."""
+    esc = np.asarray(esc, dtype=np.float32)
+    if esc.ndim < 2:
+        n = esc.size if esc.ndim else (len(out) if out is not None else 1)
+        esc = np.broadcast_to(esc.reshape(-1, 1), (n, 3))
+    M = _lote(len(esc), out)
+    M[:, 0, 0], M[:, 1, 1], M[:, 2, 2] = esc[:, 0], esc[:, 1], esc[:, 2]
+    return M
+
+def rotacoesX(a, out=None):
+    a = np.asarray(a, dtype=np.float32).reshape(-1)
+    c, s = np.cos(a), np.sin(a)
+    M = _lote(len(a), out)
+    M[:, 0, 0] = 1.0
+    M[:, 1, 1], M[:, 1, 2] = c, -s
+    M[:, 2, 1], M[:, 2, 2] = s, c
+    return M
+
+def rotacoesY(a, out=None):
+    a = np.asarray(a, dtype=np.float32).reshape(-1)
+    c, s = np.cos(a), np.sin(a)
+    M = _lote(len(a), out)
+    M[:, 1, 1] = 1.0
+    M[:, 0, 0], M[:, 0, 2] = c, s
+    M[:, 2, 0], M[:, 2, 2] = -s, c
+    return M
+
+def trs_lote(pos, yaw=0.0, pitch=0.0, esc=1.0, out=None):
+    """
+    trs() de N objetos: pos (N,3); yaw/pitch escalar ou (N,); esc escalar,
+    (N,) uniforme ou (N,3). Retorna (N,4,4).
+    """
+    pos = np.asarray(pos, dtype=np.float32).reshape(-1, 3)
+    n = len(pos)
+    yaw = np.broadcast_to(np.asarray(yaw, dtype=np.float32), (n,))
+    pitch = np.broadcast_to(np.asarray(pitch, dtype=np.float32), (n,))
+    esc = np.asarray(esc, dtype=np.float32)
+    if esc.ndim < 2:
+        esc = np.broadcast_to(esc.reshape(-1)[:, None] if esc.ndim else esc, (n, 3))
+
+    cy, sny = np.cos(yaw), np.sin(yaw)
+    cx, snx = np.cos(pitch), np.sin(pitch)
+    sx, sy, sz = esc[:, 0], esc[:, 1], esc[:, 2]
+
+    M = out if out is not None else np.empty((n, 4, 4), dtype=np.float32)
+    M[:, 0, 0] = cy * sx
+    M[:, 0, 1] = sny * snx * sy
+    M[:, 0, 2] = sny * cx * sz
+    M[:, 1, 0] = 0.0
+    M[:, 1, 1] = cx * sy
+    M[:, 1, 2] = -snx * sz
+    M[:, 2, 0] = -sny * sx
+    M[:, 2, 1] = cy * snx * sy
+    M[:, 2, 2] = cy * cx * sz
+    M[:, 0:3, 3] = pos
+    M[:, 3] = (0.0, 0.0, 0.0, 1.0)
+    return M
+
+# <----------------------------->
+# MATRIZ NORMAL (CPU)
+# <----------------------------->
+# Normais usam a inversa transposta de mat3(model). Como o shader normaliza
+# depois, serve qualquer múltiplo positivo dela: a matriz de cofatores
+# (= det * inversa transposta) vezes sign(det). Não precisa de inversa e
+# continua valendo com escala zero (HUD achatado).
+
+def _cofatores(c0, c1, c2):
+    # colunas da matriz de cofatores a partir das colunas de A
+    return np.cross(c1, c2), np.cross(c2, c0), np.cross(c0, c1)
+
+def matriz_normal(model, tol=1e-5):
+    """
+    Matriz normal (3x3) de um draw.
+    Sem escala não uniforme (A^T A = k I) devolve mat3(model) direto.
+    """
+    A = np.asarray(model, dtype=np.float32)[:3, :3]
+    G = A.T @ A
+    k = G[0, 0]
+    if abs(G[1, 1] - k) <= tol * k and abs(G[2, 2] - k) <= tol * k \
+            and abs(G[0, 1]) + abs(G[0, 2]) + abs(G[1, 2]) <= tol * k:
+        return np.ascontiguousarray(A)
+
+    a, b, c = A[0]
+    d, e, f = A[1]
+    g, h, i = A[2]
+    cof = np.array([
+        [e * i - f * h, f * g - d * i, d * h - e * g],
+        [c * h - b * i, a * i - c * g, b * g - a * h],
+        [b * f - c * e, c * d - a * f, a * e - b * d],
+    ], dtype=np.float32)
+    if a * cof[0, 0] + b * cof[0, 1] + c * cof[0, 2] < 0.0:
+        cof = -cof
+    return cof
+
+def matrizes_normais(colunas):
+    """
+    Versão em lote: colunas (N,3,3) com colunas[n, j] = coluna j de mat3(model_n).
+    Devolve no mesmo formato (coluna a coluna), pronto pro atributo por instância.
+    Aqui não vale separar o caso uniforme: os cofatores em lote já são baratos
+    e dão a mesma direção depois do normalize.
+    """
+    c0, c1, c2 = colunas[:, 0], colunas[:, 1], colunas[:, 2]
+    cof = np.empty_like(colunas)
+    cof[:, 0], cof[:, 1], cof[:, 2] = _cofatores(c0, c1, c2)
+
+    det = np.einsum("ij,ij->i", c0, cof[:, 0])
+    cof[det < 0.0] *= -1.0
+    return cof
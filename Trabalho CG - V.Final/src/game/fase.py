@@ -67,6 +67,18 @@ class Fase:
             t.inimigos = []
         self.trecho_atual_id = None
 
+    def pontos_de_luz(self, z_lado: float, espaco: float) -> List[Tuple[float, float]]:
+        """(x, z) das luzes dos trechos: ~1 a cada `espaco` no x de cada trecho, nos dois lados (±z_lado)."""
+        pontos = []
+        for t in self.trechos:
+            xmin, xmax = t.bounds[0], t.bounds[1]
+            n = max(1, round((xmax - xmin) / espaco))
+            passo = (xmax - xmin) / n
+            for i in range(n):
+                x = xmin + passo * (i + 0.5)
+                pontos += [(x, -z_lado), (x, z_lado)]
+        return pontos
+
     def get_trecho(self, x: float, z: float) -> Optional[Trecho]:
         for t in self.trechos:
             if t.contem(x, z):
@@ -1,6 +1,24 @@
 # src/game/modelo_blocos.py
 import math
-from engine.transformacoes import translacao, escala, rotacaoY, rotacaoX
+import numpy as np
+from engine.transformacoes import translacao, escala, trs
+from game.modelo_partes import TabelaPartes, local, juntas_rotX
+
+# <--------------------------->
+# JUNTAS ANIMADAS (pivôs relativos à base)
+# <--------------------------->
+BRACO_E, BRACO_D, PERNA_E, PERNA_D, ESPADA = range(5)
+
+PIVOS = np.array([
+    (-0.60, 1.30, 0.0),   # braço esq
+    (+0.60, 1.30, 0.0),   # braço dir
+    (-0.22, 0.32, 0.0),   # perna esq
+    (+0.22, 0.32, 0.0),   # perna dir
+    (+0.60, 1.30, 0.0),   # espada (ombro dir, sem o giro do ataque)
+], dtype=np.float32)
+
+# mão da espada relativa ao ombro
+MAO = translacao(0.0, -0.40, 0.40)
 
 
 class ModeloBlocos:
@@ -12,74 +30,52 @@ class ModeloBlocos:
         self.vao_metal = vao_metal
         self.vao_madeira = vao_madeira
 
-    def draw_link(self, desenhar_fn, prog, vp, x, y, z, face, t, andando=False, atacando=False):
-        base = translacao(x, y, z) @ rotacaoY(face)
-
-        swing = 0.0
-        if andando:
-            swing = math.sin(t * 10.0) * 0.6
-
-        # Ataque
-        atk = +1.1 if atacando else 0.0
+        self.tabela = TabelaPartes([
+            # TRONCO / CABEÇA
+            (vao_roupa, None, local(translacao(0.0, 1.10, 0.0), escala(0.95, 1.05, 0.60))),
+            (vao_pele, None, local(translacao(0.0, 2.05, 0.0), escala(0.70, 0.70, 0.70))),
 
-        # TRONCO 
-        tronco = base @ translacao(0.0, 1.10, 0.0) @ escala(0.95, 1.05, 0.60)
-        desenhar_fn(self.vao_roupa, tronco, vp, prog)
+            # BRAÇOS
+            (vao_roupa, BRACO_E, escala(0.25, 0.85, 0.25)),
+            (vao_roupa, BRACO_D, escala(0.25, 0.85, 0.25)),
 
-        # CABEÇA
-        cabeca = base @ translacao(0.0, 2.05, 0.0) @ escala(0.70, 0.70, 0.70)
-        desenhar_fn(self.vao_pele, cabeca, vp, prog)
+            # PERNAS
+            (vao_bota, PERNA_E, escala(0.30, 0.90, 0.30)),
+            (vao_bota, PERNA_D, escala(0.30, 0.90, 0.30)),
 
-        # BRAÇO ESQ 
-        braco_e = (
-            base
-            @ translacao(-0.60, 1.30, 0.0)
-            @ rotacaoX(+swing)
-            @ escala(0.25, 0.85, 0.25)
-        )
-        desenhar_fn(self.vao_roupa, braco_e, vp, prog)
+            # CINTO
+            (vao_detalhe, None, local(translacao(0.0, 0.92, 0.0), escala(1.00, 0.15, 0.62))),
 
-        # BRAÇO DIR 
-        braco_d_base = base @ translacao(+0.60, 1.30, 0.0) @ rotacaoX(-swing + atk)
-        braco_d = braco_d_base @ escala(0.25, 0.85, 0.25)
-        desenhar_fn(self.vao_roupa, braco_d, vp, prog)
+            # ESPADA: cabo, guarda, lâmina, ponta
+            (vao_madeira, ESPADA, local(MAO, translacao(0.0, 0.00, 0.10), escala(0.10, 0.10, 0.40))),
+            (vao_metal, ESPADA, local(MAO, translacao(0.0, 0.00, 0.30), escala(0.35, 0.10, 0.10))),
+            (vao_metal, ESPADA, local(MAO, translacao(0.0, 0.05, 0.95), escala(0.12, 0.08, 1.25))),
+            (vao_metal, ESPADA, local(MAO, translacao(0.0, 0.05, 1.65), escala(0.08, 0.06, 0.18))),
+        ])
 
-        # PERNAS 
-        perna_e = base @ translacao(-0.22, 0.32, 0.0) @ rotacaoX(-swing) @ escala(0.30, 0.90, 0.30)
-        perna_d = base @ translacao(+0.22, 0.32, 0.0) @ rotacaoX(+swing) @ escala(0.30, 0.90, 0.30)
-        desenhar_fn(self.vao_bota, perna_e, vp, prog)
-        desenhar_fn(self.vao_bota, perna_d, vp, prog)
+        self._angulos = np.zeros(len(PIVOS), dtype=np.float32)
+        self._juntas = np.zeros((len(PIVOS), 4, 4), dtype=np.float32)
 
-        # CINTO 
-        cinto = base @ translacao(0.0, 0.92, 0.0) @ escala(1.00, 0.15, 0.62)
-        desenhar_fn(self.vao_detalhe, cinto, vp, prog)
-
-        # <--------------------------->
-        # ESPADA 
-        # <--------------------------->
-
-        # Estocada
-        atk = 0.0  # sem rotação extra
-        estocada = 0.35 if atacando else 0.0  # empurra a arma pra frente
-
-        braco_d_base = base @ translacao(+0.60, 1.30, 0.0) @ rotacaoX(-swing + atk)
-
-        # mão: empurra pra frente quando ataca
-        mao = braco_d_base @ translacao(0.0, -0.40, 0.40 - estocada)
+    def draw_link(self, fila, x, y, z, face, t, andando=False, atacando=False):
+        base = trs((x, y, z), face)
 
+        swing = 0.0
+        if andando:
+            swing = math.sin(t * 10.0) * 0.6
 
-        # Cabo
-        cabo = mao @ translacao(0.0, 0.00, 0.10) @ escala(0.10, 0.10, 0.40)
-        desenhar_fn(self.vao_madeira, cabo, vp, prog)
+        # Ataque: o braço sobe, a espada só avança (estocada)
+        atk = +1.1 if atacando else 0.0
+        estocada = 0.35 if atacando else 0.0
 
-        # Guarda 
-        guarda = mao @ translacao(0.0, 0.00, 0.30) @ escala(0.35, 0.10, 0.10)
-        desenhar_fn(self.vao_metal, guarda, vp, prog)
+        a = self._angulos
+        a[BRACO_E] = +swing
+        a[BRACO_D] = -swing + atk
+        a[PERNA_E] = -swing
+        a[PERNA_D] = +swing
+        a[ESPADA] = -swing
+        J = juntas_rotX(PIVOS, a, out=self._juntas)
 
-        # Lâmina 
-        lamina = mao @ translacao(0.0, 0.05, 0.95) @ escala(0.12, 0.08, 1.25)
-        desenhar_fn(self.vao_metal, lamina, vp, prog)
+        # estocada = translação no eixo z local do ombro
+        J[ESPADA, 0:3, 3] -= J[ESPADA, 0:3, 2] * estocada
 
-        # Ponta
-        ponta = mao @ translacao(0.0, 0.05, 1.65) @ escala(0.08, 0.06, 0.18)
-        desenhar_fn(self.vao_metal, ponta, vp, prog)
+        self.tabela.enfileirar(fila, base, J)
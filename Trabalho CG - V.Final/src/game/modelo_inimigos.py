@@ -1,68 +1,74 @@
 import math
-from engine.transformacoes import translacao, escala, rotacaoY
+from engine.transformacoes import translacao, escala, rotacaoY, trs
+from game.modelo_partes import TabelaPartes, local
+from game.render_utils import EstatisticasLOD
+
+# distância da câmera a partir da qual o inimigo vira uma caixa só
+DIST_LOD_INIMIGO = 45.0
 
 class ModeloInimigos:
-    def __init__(self, vao_corpo, vao_cabeca, vao_metal, vao_madeira, vao_corda):
+    """
+    Melee: 5 partes; ranged: 8. Com a posição da câmera (cam), além de
+    `dist_lod` o inimigo vira uma caixa na cor do corpo (1 draw);
+    contagens em self.lod (EstatisticasLOD).
+    """
+
+    def __init__(self, vao_corpo, vao_cabeca, vao_metal, vao_madeira, vao_corda,
+                 dist_lod=DIST_LOD_INIMIGO):
+        self.dist_lod = float(dist_lod)
+        self.lod = EstatisticasLOD()
+
         self.vao_corpo = vao_corpo
         self.vao_cabeca = vao_cabeca
         self.vao_metal = vao_metal
         self.vao_madeira = vao_madeira
         self.vao_corda = vao_corda
 
-    # INIMIGO MELEE (faca)
-    def draw_melee(self, desenhar_fn, prog, vp, x, y, z, face):
-        base = translacao(x, y, z) @ rotacaoY(face)
-
-        corpo = base @ translacao(0.0, 0.9, 0.0) @ escala(0.9, 1.0, 0.6)
-        desenhar_fn(self.vao_corpo, corpo, vp, prog)
-
-        cabeca = base @ translacao(0.0, 1.70, 0.0) @ escala(0.6, 0.6, 0.6)
-        desenhar_fn(self.vao_cabeca, cabeca, vp, prog)
-
-        # “mão” na frente direita
-        mao = base @ translacao(0.65, 1.05, 0.45)
-
-        # cabo 
-        cabo = mao @ translacao(0.0, 0.0, 0.10) @ escala(0.10, 0.10, 0.35)
-        desenhar_fn(self.vao_madeira, cabo, vp, prog)
-
-        # lâmina 
-        lamina = mao @ translacao(0.0, 0.02, 0.55) @ escala(0.08, 0.06, 0.85)
-        desenhar_fn(self.vao_metal, lamina, vp, prog)
-
-        # ponta
-        ponta = mao @ translacao(0.0, 0.02, 1.05) @ escala(0.06, 0.05, 0.15)
-        desenhar_fn(self.vao_metal, ponta, vp, prog)
-
-    # INIMIGO RANGED (arco)
-    def draw_ranged(self, desenhar_fn, prog, vp, x, y, z, face):
-        base = translacao(x, y, z) @ rotacaoY(face)
-
-        corpo = base @ translacao(0.0, 1.0, 0.0) @ escala(0.6, 1.2, 0.5)
-        desenhar_fn(self.vao_corpo, corpo, vp, prog)
-
-        cabeca = base @ translacao(0.0, 1.9, 0.0) @ escala(0.6, 0.6, 0.6)
-        desenhar_fn(self.vao_cabeca, cabeca, vp, prog)
-
-        # arco na frente do inimigo
-        arco_base = base @ translacao(0.65, 1.15, 0.40) @ rotacaoY(math.pi)
-
-        # “curva fake”
-        topo = arco_base @ translacao(0.0, 0.45, 0.0) @ escala(0.12, 0.45, 0.12)
-        meio = arco_base @ translacao(0.0, 0.00, 0.0) @ escala(0.10, 0.55, 0.10)
-        baixo = arco_base @ translacao(0.0, -0.45, 0.0) @ escala(0.12, 0.45, 0.12)
-        desenhar_fn(self.vao_madeira, topo, vp, prog)
-        desenhar_fn(self.vao_madeira, meio, vp, prog)
-        desenhar_fn(self.vao_madeira, baixo, vp, prog)
-
-        # pontas do arco 
-        ponta_cima  = arco_base @ translacao(0.0, 0.92, 0.08) @ escala(0.10, 0.26, 0.12)
-        ponta_baixo = arco_base @ translacao(0.0, -0.92, 0.08) @ escala(0.10, 0.26, 0.12)
-
-        desenhar_fn(self.vao_madeira, ponta_cima, vp, prog)
-        desenhar_fn(self.vao_madeira, ponta_baixo, vp, prog)
-
-        # corda
-        corda = arco_base @ translacao(0.0, 0.0, 0.10) @ escala(0.02, 1.65, 0.02)
-        desenhar_fn(self.vao_corda, corda, vp, prog)
-
+        # caixas do LOD: corpo + cabeça
+        self.caixa_melee = local(translacao(0.0, 1.0, 0.0), escala(0.9, 2.0, 0.6))
+        self.caixa_ranged = local(translacao(0.0, 1.1, 0.0), escala(0.7, 2.2, 0.6))
+
+        # INIMIGO MELEE (faca) -> tudo preso na base
+        mao = translacao(0.65, 1.05, 0.45)   # “mão” na frente direita
+        self.tabela_melee = TabelaPartes([
+            (vao_corpo, None, local(translacao(0.0, 0.9, 0.0), escala(0.9, 1.0, 0.6))),
+            (vao_cabeca, None, local(translacao(0.0, 1.70, 0.0), escala(0.6, 0.6, 0.6))),
+
+            # cabo, lâmina, ponta
+            (vao_madeira, None, local(mao, translacao(0.0, 0.0, 0.10), escala(0.10, 0.10, 0.35))),
+            (vao_metal, None, local(mao, translacao(0.0, 0.02, 0.55), escala(0.08, 0.06, 0.85))),
+            (vao_metal, None, local(mao, translacao(0.0, 0.02, 1.05), escala(0.06, 0.05, 0.15))),
+        ])
+
+        # INIMIGO RANGED (arco) -> arco na frente do inimigo
+        arco = local(translacao(0.65, 1.15, 0.40), rotacaoY(math.pi))
+        self.tabela_ranged = TabelaPartes([
+            (vao_corpo, None, local(translacao(0.0, 1.0, 0.0), escala(0.6, 1.2, 0.5))),
+            (vao_cabeca, None, local(translacao(0.0, 1.9, 0.0), escala(0.6, 0.6, 0.6))),
+
+            # “curva fake”: topo, meio, baixo
+            (vao_madeira, None, local(arco, translacao(0.0, 0.45, 0.0), escala(0.12, 0.45, 0.12))),
+            (vao_madeira, None, local(arco, translacao(0.0, 0.00, 0.0), escala(0.10, 0.55, 0.10))),
+            (vao_madeira, None, local(arco, translacao(0.0, -0.45, 0.0), escala(0.12, 0.45, 0.12))),
+
+            # pontas do arco
+            (vao_madeira, None, local(arco, translacao(0.0, 0.92, 0.08), escala(0.10, 0.26, 0.12))),
+            (vao_madeira, None, local(arco, translacao(0.0, -0.92, 0.08), escala(0.10, 0.26, 0.12))),
+
+            # corda
+            (vao_corda, None, local(arco, translacao(0.0, 0.0, 0.10), escala(0.02, 1.65, 0.02))),
+        ])
+
+    def draw_melee(self, fila, x, y, z, face, cam=None):
+        base = trs((x, y, z), face)
+        if self.lod.longe(cam, x, y + 1.0, z, self.dist_lod):
+            fila.enfileirar(self.vao_corpo, base @ self.caixa_melee)
+            return
+        self.tabela_melee.enfileirar(fila, base)
+
+    def draw_ranged(self, fila, x, y, z, face, cam=None):
+        base = trs((x, y, z), face)
+        if self.lod.longe(cam, x, y + 1.1, z, self.dist_lod):
+            fila.enfileirar(self.vao_corpo, base @ self.caixa_ranged)
+            return
+        self.tabela_ranged.enfileirar(fila, base)
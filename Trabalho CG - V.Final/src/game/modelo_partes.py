@@ -0,0 +1,68 @@
+import numpy as np
+
+
+def local(*ops):
+    """Compõe uma matriz local constante (só na montagem da tabela)."""
+    M = np.eye(4, dtype=np.float32)
+    for op in ops:
+        M = M @ op
+    return M
+
+
+def juntas_rotX(pivos, angulos, out=None):
+    """
+    Monta J juntas de uma vez: translacao(pivô) @ rotacaoX(ângulo).
+    pivos: (J,3); angulos: (J,). Retorna (J,4,4) float32.
+    """
+    angulos = np.asarray(angulos, dtype=np.float32)
+    c = np.cos(angulos)
+    s = np.sin(angulos)
+
+    J = out if out is not None else np.zeros((len(angulos), 4, 4), dtype=np.float32)
+    J[:] = 0.0
+    J[:, 0, 0] = 1.0
+    J[:, 1, 1] = c
+    J[:, 1, 2] = -s
+    J[:, 2, 1] = s
+    J[:, 2, 2] = c
+    J[:, 3, 3] = 1.0
+    J[:, 0:3, 3] = pivos
+    return J
+
+
+class TabelaPartes:
+    """
+    Modelo hierárquico descrito como dados.
+    Cada peça = (malha, junta, matriz local constante). As locais são montadas
+    uma vez; por frame só as juntas animadas mudam e todas as peças saem numa
+    multiplicação (N,4,4):
+
+        mundo[i] = base @ juntas[junta[i]] @ locais[i]
+
+    junta = None -> peça presa direto na base.
+    """
+
+    def __init__(self, partes):
+        self.malhas = [p[0] for p in partes]
+        self.locais = np.stack([p[2] for p in partes]).astype(np.float32)
+
+        juntas = [p[1] for p in partes]
+        self.presas = np.array([j is None for j in juntas], dtype=bool)
+        self.junta = np.array([0 if j is None else j for j in juntas], dtype=np.intp)
+
+        # só as peças com junta passam pela multiplicação extra
+        self._idx_juntas = np.flatnonzero(~self.presas)
+
+    def compor(self, base, juntas=None):
+        """Retorna (N,4,4) com a matriz de mundo de cada peça."""
+        mundo = np.matmul(base, self.locais)
+
+        if juntas is not None and self._idx_juntas.size:
+            k = self._idx_juntas
+            mundo[k] = np.matmul(base, np.matmul(juntas[self.junta[k]], self.locais[k]))
+        return mundo
+
+    def enfileirar(self, fila, base, juntas=None):
+        mundo = self.compor(base, juntas)
+        for malha, model in zip(self.malhas, mundo):
+            fila.enfileirar(malha, model)
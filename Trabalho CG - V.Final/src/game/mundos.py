@@ -0,0 +1,97 @@
+import time
+
+from engine.texturas import texturas, tamanho_comum
+
+
+class StreamingMundos:
+    """
+    Texturas do cenário por mundo, com no máximo dois mundos referenciados:
+    o atual e o próximo. Cada papel ("chao", "parede", "rampa") é um
+    TextureArray2D de 2 camadas alocado no engine.texturas; as camadas são
+    entradas do cache dele (chave: arquivo + opções, contagem de referência,
+    orçamento LRU). Um arquivo repetido com as mesmas opções (Chao_Under no
+    chão e na rampa) é lido e sobe uma vez só: os dois papéis usam a mesma
+    camada.
+
+      mundos.ativar(m)           # papel -> CamadaTextura; espera se o m não veio antes
+      mundos.prefetch(proximo)   # quando a fase acabar: pede as texturas do próximo
+      texturas.bombear(...)      # 1x por frame (engine.texturas): sobe o que já foi lido
+
+    Ativar outro mundo solta as referências do anterior: as camadas dele
+    ficam no cache até o orçamento (ou um prefetch precisar delas).
+    tex_mundo: {mundo: {papel: (arquivo, opções)}}, as opções de cada papel
+    iguais em todo mundo.
+    """
+    CAMADAS = 2
+
+    def __init__(self, tex_mundo, gerenciador=None):
+        self.tex_mundo = tex_mundo
+        self.gerenciador = gerenciador or texturas
+
+        primeiro = next(iter(tex_mundo.values()))
+        self.arrays = {}
+        for papel, (_, opcoes) in primeiro.items():
+            # tamanho comum a todos os mundos: qualquer mundo cabe em qualquer camada
+            w, h = tamanho_comum([tex[papel][0] for tex in tex_mundo.values()])
+            self.arrays[papel] = self.gerenciador.alocar_array(w, h, self.CAMADAS, **opcoes)
+
+        self.atual = None
+        self._pedidos = {}    # mundo -> {papel: Future[CamadaTextura]}, cada um com uma referência
+        self.ultima_ativacao_ms = 0.0
+        self.esperou = False  # a última ativação teve que esperar leitura/upload
+
+    # <----------------------------->
+    # CAMADAS
+    # <----------------------------->
+    def prefetch(self, mundo):
+        """Começa a ler as texturas do mundo (nada se já está na GPU ou a caminho)."""
+        if mundo in self._pedidos:
+            return
+        # só o atual e um próximo: outro prefetch em curso é abandonado
+        for m in list(self._pedidos):
+            if m != self.atual:
+                self._soltar(m)
+        self._pedidos[mundo] = {
+            papel: self.gerenciador.pedir(caminho, array=self.arrays[papel])
+            for papel, (caminho, _) in self.tex_mundo[mundo].items()
+        }
+
+    def ativar(self, mundo):
+        """Deixa o mundo na GPU (bloqueia o que faltar) e solta o anterior."""
+        t0 = time.perf_counter()
+        self.prefetch(mundo)
+        self.esperou = not all(f.done() for f in self._pedidos[mundo].values())
+        if self.esperou:
+            self.gerenciador.esperar()
+
+        anterior = self.atual
+        self.atual = mundo
+        if anterior is not None and anterior != mundo:
+            self._soltar(anterior)
+        self.ultima_ativacao_ms = (time.perf_counter() - t0) * 1000.0
+        return self.camadas(mundo)
+
+    def camadas(self, mundo):
+        return {papel: f.result() for papel, f in self._pedidos[mundo].items()}
+
+    def _soltar(self, mundo):
+        for f in self._pedidos.pop(mundo).values():
+            self.gerenciador.liberar(f)
+
+    # <----------------------------->
+    # ESTADO
+    # <----------------------------->
+    def estatisticas(self):
+        prontos = {m for m, fs in self._pedidos.items() if all(f.done() for f in fs.values())}
+        return {
+            "residentes": sorted(prontos),
+            "lendo": sorted(set(self._pedidos) - prontos),
+            "bytes": sum(a.bytes for a in self.arrays.values()),
+        }
+
+    def destroy(self):
+        for m in list(self._pedidos):
+            self._soltar(m)
+        for arr in self.arrays.values():
+            self.gerenciador.liberar_array(arr)
+        self.arrays = {}
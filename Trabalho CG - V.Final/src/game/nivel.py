@@ -0,0 +1,113 @@
+import numpy as np
+from engine.geometrias import (criarCubo, criarRampaSolida, malhas as registro,
+                               transformarMalha, mesclarMalhas, subdividirMalha)
+
+IDENTIDADE = np.eye(4, dtype=np.float32)
+
+
+class NivelEstatico:
+    """
+    Cenário que nunca se mexe (chão, plataformas, rampas) assado em mundo:
+    cada peça é transformada uma vez e as peças com o mesmo papel de textura
+    e a mesma cor viram uma malha só -> o nível inteiro sai em poucos draws.
+
+    Papéis de textura: "chao", "parede" (plataformas) e "rampa".
+
+    Com `luzes` (core.iluminacao.BlocoLuzes já com as luzes do mundo), a luz
+    difusa também é assada: a malha é subdividida (arestas <= `passo`) e cada
+    vértice guarda a luz que recebe (layout com luz, variante BAKED do
+    basic.*). Tem que assar de novo quando as luzes mudam (troca de mundo).
+
+    Cada grupo ainda é cortado em células de `celula` x `celula` no plano xz
+    (triângulo vai pra célula do seu centro), uma malha e uma AABB por
+    célula: senão a caixa do grupo cobre o nível todo e o culling não
+    descarta nada.
+    """
+
+    def __init__(self):
+        self.malhas = []   # [(papel, malha)] ; malha = (vao, vbo, ebo, count, tint)
+        self.assado = False
+        self.vertices = 0
+        self.centros = np.zeros((0, 3), dtype=np.float32)
+        self.extensoes = np.zeros((0, 3), dtype=np.float32)
+
+    def assar(self, plataformas, rampas, chao=None, luzes=None, passo=1.0, celula=16.0):
+        """
+        chao: (model, cor) do bloco de chão, ou None.
+        Plataformas invisíveis (paredes da borda) ficam de fora.
+        """
+        # as antigas só saem no fim: malha idêntica (sem luz assada, a
+        # geometria não muda entre mundos) é reaproveitada pelo registro
+        antigas = self.malhas
+        self.malhas = []
+        self.assado = luzes is not None
+        self.vertices = 0
+
+        cubo_v, cubo_i, _ = registro.dados(criarCubo, com_normais=True)
+        rampa_v, rampa_i, _ = registro.dados(criarRampaSolida)
+
+        grupos = {}   # (papel, cor) -> [(verts, idx)]
+
+        def add(papel, cor, verts, idx, model):
+            chave = (papel, tuple(float(c) for c in cor))
+            grupos.setdefault(chave, []).append(transformarMalha(verts, idx, model))
+
+        if chao is not None:
+            model, cor = chao
+            add("chao", cor, cubo_v, cubo_i, model)
+
+        for p in plataformas:
+            if not getattr(p, "visivel", True):
+                continue
+            add("parede", p.cor, cubo_v, cubo_i, p.model_render())
+
+        for r in rampas:
+            add("rampa", r.cor, rampa_v, rampa_i, r.model_render())
+
+        centros = []
+        extensoes = []
+        for (papel, cor), partes in grupos.items():
+            verts, idx = mesclarMalhas(partes)
+
+            if self.assado:
+                verts, idx = subdividirMalha(verts, idx, passo)
+                v = verts.reshape(-1, 8)
+                luz = luzes.iluminar(v[:, 0:3], v[:, 3:6])
+                verts = np.hstack([v, luz]).astype(np.float32).reshape(-1)
+
+            largura = 11 if self.assado else 8
+            for v, i in self._celulas(verts.reshape(-1, largura), idx, celula):
+                self.malhas.append((papel, registro.registrar(v.reshape(-1), i, cor,
+                                                              luz_assada=self.assado)))
+                self.vertices += len(v)
+
+                pos = v[:, 0:3]
+                lo = pos.min(axis=0)
+                hi = pos.max(axis=0)
+                centros.append((lo + hi) * 0.5)
+                extensoes.append((hi - lo) * 0.5)
+
+        self.centros = np.array(centros, dtype=np.float32).reshape(-1, 3)
+        self.extensoes = np.array(extensoes, dtype=np.float32).reshape(-1, 3)
+
+        for _, malha in antigas:
+            registro.liberar(malha)
+
+    @staticmethod
+    def _celulas(v, idx, celula):
+        """Separa a malha (v (V,k), idx) por célula xz do centro de cada triângulo."""
+        tri = np.asarray(idx, dtype=np.int64).reshape(-1, 3)
+        centro = v[tri, 0:3].mean(axis=1)
+        cel = np.floor(centro[:, [0, 2]] / celula).astype(np.int64)
+        _, grupo = np.unique(cel, axis=0, return_inverse=True)
+        grupo = grupo.reshape(-1)
+        for g in range(int(grupo.max()) + 1 if len(grupo) else 0):
+            # só os vértices usados pela célula, reindexados
+            usados, novo = np.unique(tri[grupo == g], return_inverse=True)
+            yield (np.ascontiguousarray(v[usados], dtype=np.float32),
+                   novo.reshape(-1).astype(np.uint32))
+
+    def destroy(self):
+        for _, malha in self.malhas:
+            registro.liberar(malha)
+        self.malhas = []
@@ -1,3 +1,6 @@
+from engine.transformacoes import trs
+
+
 class Plataforma:
     def __init__(self, x, z, w, d, h, cor, visivel=True):
         # x,z centro; w largura (x), d profundidade (z), h altura (y) do topo
@@ -17,3 +20,10 @@ class Plataforma:
         z_max = max(self.z - self.d / 1.65, self.z + self.d / 1.65)
 
         return (x_min <= px <= x_max) and (z_min <= pz <= z_max)
+
+    def model_render(self):
+        """Matriz do cubo desenhado para esta plataforma."""
+        if self.h == 0:
+            return trs((self.x, -0.5, self.z), esc=(self.w, 1, self.d))
+        altura = float(self.h)
+        return trs((self.x, altura / 2.0, self.z), esc=(self.w, altura, self.d))
@@ -1,3 +1,6 @@
+from engine.transformacoes import trs
+
+
 class Rampa:
     def __init__(self, x, z, w, d, y0, y1, cor):
         self.x, self.z, self.w, self.d = x, z, w, d
@@ -11,6 +14,12 @@ class Rampa:
         z_max = max(self.z - self.d/2.3, self.z + self.d/2.3)
         return x_min, x_max, z_min, z_max
 
+    def model_render(self):
+        """Matriz da cunha (criarRampaSolida) desenhada para esta rampa."""
+        sz = abs(self.d)
+        sz_draw = -sz if self.d < 0 else sz
+        return trs((self.x, self.y0 + 0.001, self.z), esc=(self.w, (self.y1 - self.y0), sz_draw))
+
     def contencao(self, px, pz):
         x_min, x_max, z_min, z_max = self._bounds()
         return (x_min <= px <= x_max) and (z_min <= pz <= z_max)
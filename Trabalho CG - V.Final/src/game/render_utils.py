@@ -1,19 +1,65 @@
 import math
-from engine.transformacoes import translacao, escala, rotacaoY
+from engine.transformacoes import trs
 
-def desenhar_flecha(desenhar_fn, prog, vp, x, y, z, yaw, vao_madeira, vao_metal, vao_pena):
-    base = translacao(x, y, z) @ rotacaoY(yaw)
+# distância da câmera a partir da qual a flecha vira um segmento só
+DIST_LOD_FLECHA = 40.0
 
-    # haste
-    haste = base @ translacao(0.0, 0.0, 0.35) @ escala(0.05, 0.05, 0.70)
-    desenhar_fn(vao_madeira, haste, vp, prog)
+# peças da flecha no espaço dela (translação @ escala, constantes)
+FLECHA_LOD = trs((0.0, 0.0, 0.36), esc=(0.06, 0.06, 0.96))
+FLECHA_HASTE = trs((0.0, 0.0, 0.35), esc=(0.05, 0.05, 0.70))
+FLECHA_PONTA = trs((0.0, 0.0, 0.78), esc=(0.07, 0.07, 0.12))
+FLECHA_PENA1 = trs((0.03, 0.02, -0.02), esc=(0.02, 0.08, 0.18))
+FLECHA_PENA2 = trs((-0.03, 0.02, -0.02), esc=(0.02, 0.08, 0.18))
 
-    # ponta
-    ponta = base @ translacao(0.0, 0.0, 0.78) @ escala(0.07, 0.07, 0.12)
-    desenhar_fn(vao_metal, ponta, vp, prog)
+
+class EstatisticasLOD:
+    """Conta, por frame, quantos modelos saíram completos e quantos simplificados."""
+
+    def __init__(self):
+        self.completos = 0
+        self.simplificados = 0
+        self.ultimo_frame = {"completos": 0, "simplificados": 0}
+
+    def longe(self, cam, x, y, z, dist):
+        """True se (x, y, z) está além de `dist` da câmera (e conta o modelo)."""
+        if cam is None:
+            self.completos += 1
+            return False
+        dx = x - float(cam[0])
+        dy = y - float(cam[1])
+        dz = z - float(cam[2])
+        if dx * dx + dy * dy + dz * dz > dist * dist:
+            self.simplificados += 1
+            return True
+        self.completos += 1
+        return False
+
+    def novo_frame(self):
+        self.ultimo_frame = {
+            "completos": self.completos,
+            "simplificados": self.simplificados,
+        }
+        self.completos = 0
+        self.simplificados = 0
+        return self.ultimo_frame
+
+
+lod_flechas = EstatisticasLOD()
+
+
+def desenhar_flecha(fila, x, y, z, yaw, vao_madeira, vao_metal, vao_pena,
+                    cam=None, dist_lod=DIST_LOD_FLECHA):
+    """cam: posição da câmera; longe dela a flecha é só a haste (1 draw em vez de 4)."""
+    base = trs((x, y, z), yaw)
+
+    if lod_flechas.longe(cam, x, y, z, dist_lod):
+        # haste cobrindo da pena à ponta
+        fila.enfileirar(vao_madeira, base @ FLECHA_LOD)
+        return
+
+    fila.enfileirar(vao_madeira, base @ FLECHA_HASTE)
+    fila.enfileirar(vao_metal, base @ FLECHA_PONTA)
 
     # penas
-    pena1 = base @ translacao(0.03, 0.02, -0.02) @ escala(0.02, 0.08, 0.18)
-    pena2 = base @ translacao(-0.03, 0.02, -0.02) @ escala(0.02, 0.08, 0.18)
-    desenhar_fn(vao_pena, pena1, vp, prog)
-    desenhar_fn(vao_pena, pena2, vp, prog)
+    fila.enfileirar(vao_pena, base @ FLECHA_PENA1)
+    fila.enfileirar(vao_pena, base @ FLECHA_PENA2)
@@ -2,13 +2,15 @@ import glfw
 from OpenGL.GL import *
 import numpy as np
 import math
+import time
 from pathlib import Path
 
 # === Engine ===
-from engine.transformacoes import ortho, perspectiva, translacao, escala, look_at
-from engine.geometrias import criarCubo, criarPlataforma, criarRampaSolida, criarVAO
+from engine.transformacoes import ortho, perspectiva, look_at, trs
+from engine.geometrias import criarCubo, malhas
 from engine.colisao import colisaoINI
-from engine.texturas import Texture2D
+from engine.culling import CullingFrustum
+from engine.texturas import texturas, CacheTexels
 
 # === Game ===
 from game.jogador import Player
@@ -16,12 +18,20 @@ from game.plataforma import Plataforma
 from game.rampa import Rampa
 from game.modelo_blocos import ModeloBlocos
 from game.modelo_inimigos import ModeloInimigos
-from game.render_utils import desenhar_flecha
+from game.render_utils import desenhar_flecha, lod_flechas
 from game.fase import Fase, Trecho, SpawnInfo
+from game.nivel import NivelEstatico, IDENTIDADE
+from game.mundos import StreamingMundos
 
 # === Core ===
-from core.renderizador import desenhar
-from core.shaders import criarPrograma
+from core.shaders import VariantesShader, CacheBinarios
+from core.renderizador import defines_material
+from core.iluminacao import BlocoLuzes
+from core.clusters import ClustersLuzes
+from core.janela import JanelaGLFW
+from core.estado_gl import estado_gl
+from core.fila_render import FilaRender
+from core.profiler import Profiler
 
 # === Shaders ===
 with open("src/assets/shaders/basic.vert", "r", encoding="utf-8") as f:
@@ -30,6 +40,22 @@ with open("src/assets/shaders/basic.vert", "r", encoding="utf-8") as f:
 with open("src/assets/shaders/basic.frag", "r", encoding="utf-8") as f:
     FRAG = f.read()
 
+# programas linkados (glGetProgramBinary) ficam aqui entre execuções
+SHADER_CACHE = Path("cache/shaders")
+
+# luz do cenário estático assada por vértice (False = iluminação por pixel)
+LUZ_ASSADA = True
+PASSO_ASSADO = 1.0
+
+# camadas sem referência (mundos anteriores) ficam no cache até este total
+ORCAMENTO_TEXTURAS = 40 << 20
+
+# texels já decodificados (e mipmaps) das texturas, lidos com mmap
+TEXTURA_CACHE = Path("cache/texturas")
+
+# F3 liga/desliga o overlay do profiler; F4 grava os tempos aqui
+PERFIL_JSON = Path("perfil.json")
+
 WORLD_OVER = 0
 WORLD_ETER = 1
 WORLD_UNDER = 2
@@ -58,11 +84,55 @@ WORLD_CFG = {
     },
 }
 
+# texturas por mundo: papel -> (arquivo, opções do engine.texturas)
+# atlas das paredes: pixel art, sem mipmap
+ATLAS = {"generate_mipmaps": False, "min_filter": GL_NEAREST, "mag_filter": GL_NEAREST}
+
+TEX_MUNDO = {
+    WORLD_OVER: {
+        "chao":   ("src/textures/Chao_Grama.png", {}),
+        "parede": ("src/textures/atlas_pedra_grama.png", ATLAS),
+        "rampa":  ("src/textures/Chao_Caverna.png", {}),
+    },
+    WORLD_ETER: {
+        "chao":   ("src/textures/Chao_Gelo.png", {}),
+        "parede": ("src/textures/atlas_parede_gelo.png", ATLAS),
+        "rampa":  ("src/textures/rampa_gelo.png", {}),
+    },
+    WORLD_UNDER: {
+        "chao":   ("src/textures/Chao_Under.png", {}),
+        "parede": ("src/textures/atlas_parede_under.png", ATLAS),
+        "rampa":  ("src/textures/Chao_Under.png", {}),
+    },
+}
+
+# luzes pontuais dos trechos (core.clusters): junto às paredes do corredor,
+# ~1 a cada LUZ_TRECHO_ESPACO de x em cada trecho, dos dois lados;
+# por mundo: cor, intensidade, alcance, altura
+LUZ_TRECHO_Z = 11.5
+LUZ_TRECHO_ESPACO = 3.0
+LUZ_TRECHO = {
+    WORLD_OVER:  ((1.00, 0.70, 0.40), 0.9, 6.0, 2.5),   # tochas
+    WORLD_ETER:  ((0.55, 0.80, 1.30), 1.0, 6.5, 1.2),   # cristais
+    WORLD_UNDER: ((1.30, 0.45, 0.25), 1.1, 6.0, 0.8),   # braseiros
+}
+
+# planos da câmera (projeção e fatias dos clusters de luz)
+CAM_PERTO = 0.1
+CAM_LONGE = 200.0
+
+# caixas de culling conservadoras (cobrem qualquer rotação do modelo)
+INIMIGO_CULL_DY = 1.1
+INIMIGO_CULL_EXT = (1.8, 1.2, 1.8)
+FLECHA_CULL_EXT = (0.9, 0.2, 0.9)
+
+# LOD por distância da câmera (a câmera fica ~30 do jogador)
+LOD_INIMIGO = 45.0
+LOD_FLECHA = 40.0
+
 def set_uTint(programa, tint):
-    loc = glGetUniformLocation(programa, "uTint")
-    glUseProgram(programa)
-    if loc != -1:
-        glUniform3f(loc, float(tint[0]), float(tint[1]), float(tint[2]))
+    programa.use()
+    programa.set_vec3("uTint", tint)
 
 def inimigo_face_para_player(inimigo, player):
     dx = player.x - inimigo.x
@@ -81,91 +151,62 @@ def proximo_mundo(m):
         return WORLD_UNDER
     return WORLD_OVER
 
-def main():
-    if not glfw.init():
+def main(janela=None, w=1600, h=900, perfil=None):
+    """
+    janela: backend de janela/contexto (core.janela.JanelaGLFW por padrão;
+    core.headless.JanelaHeadless roda o mesmo jogo sem tela).
+    perfil: core.profiler.Profiler (um novo se None), pra quem chama ler depois.
+    """
+    if janela is None:
+        janela = JanelaGLFW()
+    if not janela.iniciar(w, h, "Echoes of Dimensions"):
         return
+    if perfil is None:
+        perfil = Profiler()
+    perfil_hud = False
+
+    # texturas do cenário: arrays de 2 camadas por papel (mundo atual + próximo);
+    # as do primeiro mundo decodificam em threads enquanto os shaders compilam
+    t_texturas = time.perf_counter()
+    texturas.orcamento = ORCAMENTO_TEXTURAS
+    texturas.cache = CacheTexels(TEXTURA_CACHE)
+    mundos = StreamingMundos(TEX_MUNDO)
+    mundos.prefetch(WORLD_OVER)
 
-    w, h = 1600, 900
-    glfw.window_hint(glfw.CONTEXT_VERSION_MAJOR, 3)
-    glfw.window_hint(glfw.CONTEXT_VERSION_MINOR, 3)
-    glfw.window_hint(glfw.OPENGL_PROFILE, glfw.OPENGL_CORE_PROFILE)
-    win = glfw.create_window(w, h, "Echoes of Dimensions", None, None)
-    glfw.make_context_current(win)
     glEnable(GL_DEPTH_TEST)
 
-    programa = criarPrograma(VERT, FRAG)
-    glUseProgram(programa)
+    # luzes: direcional/ambiente no bloco "Luzes"; pontuais em clusters
+    luzes = BlocoLuzes()
+    clusters = ClustersLuzes(CAM_PERTO, CAM_LONGE)
+
+    def conectar_programa(prog):
+        luzes.conectar(prog)
+        clusters.conectar(prog)
+
+    # variantes do basic.* (UNLIT/TEXTURED/INSTANCED/CLUSTERED...);
+    # cada programa novo já sai ligado aos blocos e vai pro cache em disco
+    cache_shaders = CacheBinarios(SHADER_CACHE)
+    shaders = VariantesShader(VERT, FRAG, ao_criar=conectar_programa, cache=cache_shaders)
+    shaders.aquecer([
+        defines_material(unlit=u, textured=t, instanced=i, clustered=True, array=t)
+        for u in (False, True) for t in (False, True) for i in (False, True)
+    ] + [defines_material(textured=True, baked=True, array=True)])
+    programa = shaders.obter(defines_material(clustered=True))
+
+    for caminho, (n, ms) in cache_shaders.relatorio().items():
+        print(f"shaders: {n} programa(s) via {caminho} em {ms:.1f} ms")
+
+    fila = FilaRender(shaders, luzes, clusters, perfil=perfil)
     
     # <----------------------------->
-    # TEXTURAS (ATLAS)
+    # TEXTURAS (por mundo, game.mundos.StreamingMundos)
     # <----------------------------->
-    atlas_pedra_grama = Texture2D.from_file(
-        "src/textures/atlas_pedra_grama.png",
-        flip_y=True,
-        generate_mipmaps=False,
-        min_filter=GL_NEAREST,
-        mag_filter=GL_NEAREST,
-        wrap_s=GL_REPEAT,
-        wrap_t=GL_REPEAT,
-    )
-    
-    atlas_parede_gelo = Texture2D.from_file(
-        "src/textures/atlas_parede_gelo.png",
-        flip_y=True,
-        generate_mipmaps=False,
-        min_filter=GL_NEAREST,
-        mag_filter=GL_NEAREST,
-        wrap_s=GL_REPEAT,
-        wrap_t=GL_REPEAT,
-    )
-    
-    atlas_parede_under = Texture2D.from_file(
-        "src/textures/atlas_parede_under.png",
-        flip_y=True,
-        generate_mipmaps=False,
-        min_filter=GL_NEAREST,
-        mag_filter=GL_NEAREST,
-        wrap_s=GL_REPEAT,
-        wrap_t=GL_REPEAT,
-    )
-    
-    # === Texturas ===   
-    #Overworld   
-    text_over = Texture2D.from_file("src/textures/Chao_Grama.png")     
-    atlas_over = atlas_pedra_grama
-    rampa_over = Texture2D.from_file("src/textures/Chao_Caverna.png")
-
-    # Eter (gelo)
-    text_eter = Texture2D.from_file("src/textures/Chao_Gelo.png")
-    atlas_eter = atlas_parede_gelo    
-    rampa_eter = Texture2D.from_file("src/textures/rampa_gelo.png")
-
-    # Under (caverna)
-    text_under = Texture2D.from_file("src/textures/Chao_Under.png")
-    atlas_under= atlas_parede_under 
-    rampa_under = Texture2D.from_file("src/textures/Chao_Under.png") 
-
-    TEX_MUNDO = {
-        WORLD_OVER: {
-            "chao":  text_over,   
-            "parede": atlas_over,  
-            "rampa": rampa_over,  
-        },
-        WORLD_ETER: {
-            "chao":  text_eter,      
-            "parede": atlas_eter,    
-            "rampa": rampa_eter,     
-        },
-        WORLD_UNDER: {
-            "chao":  text_under,    
-            "parede": atlas_under,   
-            "rampa": rampa_under,    
-        },
-    }
-
-    text_chao  = TEX_MUNDO[WORLD_OVER]["chao"]
-    text_parede = TEX_MUNDO[WORLD_OVER]["parede"]
-    text_rampa = TEX_MUNDO[WORLD_OVER]["rampa"]
+    tex_mundo = {}   # papel -> CamadaTextura do mundo atual
+
+    def carregar_texturas(mundo):
+        # os arrays ficam ligados em todo mundo: trocar é só outra camada (uCamada);
+        # se o prefetch já subiu o mundo, não espera nada
+        tex_mundo.update(mundos.ativar(mundo))
 
 
     # <----------------------------->
@@ -206,9 +247,9 @@ def main():
     # VAOs (pos + normal + tint)
     # <----------------------------->
 
+    # uma malha de cubo só (registro); cada "vao_*" é um handle com outro tint
     def mk_cubo(cor):
-        v, i, c = criarCubo(cor, com_normais=True)
-        return criarVAO(v, i, c)
+        return malhas.obter(criarCubo, tint=cor)
 
     vao_pele  = mk_cubo(pele)
     vao_roupa = mk_cubo(roupa)
@@ -218,14 +259,6 @@ def main():
     vao_inim_corpo  = mk_cubo(inim_corpo)
     vao_inim_cabeca = mk_cubo(inim_cabeca)
 
-    cubo_ground = mk_cubo(ground_cor)
-    cubo_plat1  = mk_cubo(plat1_cor)
-    cubo_plat2  = mk_cubo(plat2_cor)
-
-    # rampa sólida
-    v, i, c = criarRampaSolida(ramp_cor)
-    vao_rampa_solida = criarVAO(v, i, c)
-
     hud_bg = mk_cubo(hud_bg_cor)
     hud_hp = mk_cubo(hud_hp_cor)
 
@@ -248,7 +281,8 @@ def main():
     # MODELOS
     # <----------------------------->
     modelo_player  = ModeloBlocos(vao_pele, vao_roupa, vao_bota, vao_det, vao_metal, vao_madeira)
-    modelo_inimigos = ModeloInimigos(vao_inim_corpo, vao_inim_cabeca, vao_metal, vao_madeira, vao_corda)
+    modelo_inimigos = ModeloInimigos(vao_inim_corpo, vao_inim_cabeca, vao_metal, vao_madeira, vao_corda,
+                                     dist_lod=LOD_INIMIGO)
 
     # <----------------------------->
     # CENÁRIO 
@@ -310,6 +344,17 @@ def main():
 
     plataformas, rampas = criar_mapa(plat1_cor, plat2_cor, ramp_cor)
 
+    # cenário estático assado (chão + plataformas + rampas em poucas malhas)
+    nivel = NivelEstatico()
+
+    def assar_cenario():
+        # usa as luzes do mundo atual (configurar_luzes antes)
+        chao = (trs((0, -0.51, 0), esc=(40, 1, 40)), ground_cor)
+        nivel.assar(plataformas, rampas, chao=chao,
+                    luzes=luzes if LUZ_ASSADA else None, passo=PASSO_ASSADO)
+
+    culling = CullingFrustum()
+
 
     # <----------------------------->
     # ESTADO DO JOGO
@@ -347,9 +392,60 @@ def main():
     def tem_todos_fragmentos():
         return bool(ecos[WORLD_OVER] and ecos[WORLD_ETER] and ecos[WORLD_UNDER])
 
+    # <----------------------------->
+    # ILUMINAÇÃO (fixa por mundo -> só muda no trocar_mundo)
+    # <----------------------------->
+    def configurar_luzes(mundo):
+        if mundo == WORLD_OVER:
+            dir_dir = (0.25, -1.0, 0.20)
+            dir_color = (1.00, 0.98, 0.92)   # sol
+            dir_int = 1.15
+            amb = 0.22
+
+            p_col = [(1.0, 0.95, 0.85)] * 4  # tochas
+        elif mundo == WORLD_ETER:
+            dir_dir = (0.10, -1.0, -0.15)
+            dir_color = (0.70, 0.85, 1.10)   # sol frio
+            dir_int = 1.05
+            amb = 0.18
+
+            p_col = [(0.65, 0.85, 1.25)] * 4 # cristais brilhantes
+        else:  
+            dir_dir = (-0.10, -1.0, 0.05)
+            dir_color = (1.10, 0.55, 0.40)   # Sol mais forte
+            dir_int = 0.85
+            amb = 0.12
+
+            p_col = [(1.25, 0.55, 0.35)] * 4 # fogo/lava
+
+        p_pos = [
+            (-12.0, 2.0,  0.0),          
+            (-3.5,  3.2,  7.5),           
+            (11.5,  3.5, -7.8),           
+            (ALTAR_X, 3.0, ALTAR_Z),      
+        ]
+
+        p_int = [1.2, 1.0, 1.0, 1.6]
+        p_rng = [12.0, 10.0, 10.0, 14.0]
+
+        # + as dos trechos (o bloco "Luzes" fica com as 4 de cima; os clusters com todas)
+        t_col, t_int, t_rng, t_y = LUZ_TRECHO[mundo]
+        for x, z in fase.pontos_de_luz(LUZ_TRECHO_Z, LUZ_TRECHO_ESPACO):
+            p_pos.append((x, t_y, z))
+            p_col.append(t_col)
+            p_int.append(t_int)
+            p_rng.append(t_rng)
+
+        luzes.definir_mundo(dir_dir, dir_color, dir_int, amb, p_pos, p_col, p_int, p_rng)
+        clusters.definir_luzes(p_pos, p_col, p_int, p_rng)
+
     mundo_atual = WORLD_OVER
     cfg_mundo = WORLD_CFG[mundo_atual]
     set_uTint(programa, cfg_mundo["tint"])
+    carregar_texturas(mundo_atual)
+    print(f"texturas: {len(tex_mundo)} do mundo inicial em {(time.perf_counter() - t_texturas) * 1000.0:.1f} ms "
+          f"(espera/upload {mundos.ultima_ativacao_ms:.1f} ms, {texturas.threads} threads, "
+          f"cache {texturas.cache.relatorio()})")
 
     ecos = {WORLD_OVER: False, WORLD_ETER: False, WORLD_UNDER: False}
 
@@ -406,21 +502,30 @@ def main():
 
     fase = Fase(trechos, leash_radius=7.0)
 
+    # luzes do mundo inicial (as dos trechos saem da `fase`) e cenário assado com elas
+    configurar_luzes(mundo_atual)
+    assar_cenario()
+
+    est = malhas.estatisticas()
+    print(f"malhas: {est['malhas']} na GPU ({est['bytes'] / 1024:.0f} KB), "
+          f"{est['referencias']} handles, {est['reusos']} reusos")
+
     # <----------------------------->
     # Movimentação
     # <----------------------------->
     keys = {}
 
     def trocar_mundo(novo_mundo: int):
-        nonlocal mundo_atual, cfg_mundo, text_chao, text_parede, text_rampa
+        nonlocal mundo_atual, cfg_mundo
 
         mundo_atual = novo_mundo
         cfg_mundo = WORLD_CFG[mundo_atual]
         set_uTint(programa, cfg_mundo["tint"])
-
-        text_chao   = TEX_MUNDO[mundo_atual]["chao"]
-        text_parede = TEX_MUNDO[mundo_atual]["parede"]
-        text_rampa  = TEX_MUNDO[mundo_atual]["rampa"]
+        configurar_luzes(mundo_atual)
+        carregar_texturas(mundo_atual)   # só troca a camada
+        print(f"mundo {cfg_mundo['name']}: texturas em {mundos.ultima_ativacao_ms:.1f} ms "
+              f"({'esperou a leitura' if mundos.esperou else 'já estavam na GPU'})")
+        assar_cenario()
 
         fase.reset_mundo()
         player.x = X_START + 1.0
@@ -429,6 +534,8 @@ def main():
 
 
     def key_cb(win, k, s, a, m):
+        nonlocal perfil_hud
+
         if a == glfw.PRESS:
             keys[k] = True
         elif a == glfw.RELEASE:
@@ -441,20 +548,30 @@ def main():
         if k == glfw.KEY_E and a == glfw.PRESS:
             keys["E_PRESS"] = True
 
-    glfw.set_key_callback(win, key_cb)
+        if k == glfw.KEY_F3 and a == glfw.PRESS:
+            perfil_hud = not perfil_hud
+        if k == glfw.KEY_F4 and a == glfw.PRESS:
+            perfil.salvar_json(PERFIL_JSON)
+            print("perfil salvo em", PERFIL_JSON)
 
-    proj = perspectiva(math.radians(60), w / h, 0.1, 200)
-    last = glfw.get_time()
+    janela.ao_teclar(key_cb)
+
+    proj = perspectiva(math.radians(60), w / h, CAM_PERTO, CAM_LONGE)
+    last = janela.tempo()
 
     dbg_t = 0.0
 
-    while not glfw.window_should_close(win):
-        now = glfw.get_time()
+    while not janela.deve_fechar():
+        now = janela.tempo()
         dt = now - last
         last = now
 
-        glfw.poll_events()
+        janela.eventos()
+
+        # texturas do próximo mundo sobem aos poucos (até ~4 ms de upload por frame)
+        texturas.bombear(tempo_max=0.004)
 
+        perfil.abrir("simulacao")
         if player.vivo:
             player.update(dt, keys, plataformas, rampas)
 
@@ -489,6 +606,8 @@ def main():
         dist_altar = math.hypot(player.x - ALTAR_X, player.z - ALTAR_Z)
 
         mundo_ok = fase.mundo_completo()
+        if mundo_ok:
+            mundos.prefetch(proximo_mundo(mundo_atual))
         eco_coletavel = (not ecos[mundo_atual]) and mundo_ok
 
         acabou_de_coletar = False
@@ -526,6 +645,7 @@ def main():
         # <----------------------------->
         if portal_ativo and dist_altar < ALTAR_RAIO and e_press and (not endgame_ativo) and (tutorial_estado != 1):
             trocar_mundo(proximo_mundo(mundo_atual))
+        perfil.fechar("simulacao")
 
         dbg_t += dt
         if dbg_t > 1.0:
@@ -535,7 +655,18 @@ def main():
                   "mundo_ok:", mundo_ok,
                   "eco_já:", ecos[mundo_atual],
                   "dist_altar:", round(dist_altar, 2),
-                  "playerX:", round(player.x, 2))
+                  "playerX:", round(player.x, 2),
+                  "draws:", fila.ultimo_frame["draws"],
+                  "upload instâncias KB:", round(fila.ultimo_frame["bytes"] / 1024, 1),
+                  "lod inimigos/flechas simplificados:", modelo_inimigos.lod.ultimo_frame["simplificados"],
+                  lod_flechas.ultimo_frame["simplificados"],
+                  "texturas MB (cache/arrays):", round(texturas.bytes / 2**20, 1),
+                  round(texturas.estatisticas()["bytes_arrays"] / 2**20, 1),
+                  "mundos na GPU/lendo:", mundos.estatisticas()["residentes"], mundos.estatisticas()["lendo"],
+                  "cull desenhados/descartados:", culling.ultimo_frame["desenhados"], culling.ultimo_frame["descartados"],
+                  "gl emitidas/evitadas:", estado_gl.ultimo_frame["emitidas"], estado_gl.ultimo_frame["evitadas"],
+                  "luzes visiveis/max por cluster:", clusters.ultimo_frame["visiveis"], clusters.ultimo_frame["max_cluster"],
+                  "frame p50/p95/p99 ms:", ", ".join(f"{v:.1f}" for v in perfil.percentis("frame") or ()))
 
         if mundo_atual == WORLD_OVER:
             vao_eco = vao_ecoV
@@ -561,159 +692,87 @@ def main():
         vp = proj @ view
 
 
-        # <----------------------------->
-        # ILUMINAÇÃO
-        # <----------------------------->
-        if mundo_atual == WORLD_OVER:
-            dir_dir = (0.25, -1.0, 0.20)
-            dir_color = (1.00, 0.98, 0.92)   # sol
-            dir_int = 1.15
-            amb = 0.22
-
-            p_col = [(1.0, 0.95, 0.85)] * 4  # tochas
-        elif mundo_atual == WORLD_ETER:
-            dir_dir = (0.10, -1.0, -0.15)
-            dir_color = (0.70, 0.85, 1.10)   # sol frio
-            dir_int = 1.05
-            amb = 0.18
-
-            p_col = [(0.65, 0.85, 1.25)] * 4 # cristais brilhantes
-        else:  
-            dir_dir = (-0.10, -1.0, 0.05)
-            dir_color = (1.10, 0.55, 0.40)   # Sol mais forte
-            dir_int = 0.85
-            amb = 0.12
-
-            p_col = [(1.25, 0.55, 0.35)] * 4 # fogo/lava
-
-        p_pos = [
-            (-12.0, 2.0,  0.0),          
-            (-3.5,  3.2,  7.5),           
-            (11.5,  3.5, -7.8),           
-            (ALTAR_X, 3.0, ALTAR_Z),      
-        ]
+        luzes.definir_camera(cam_eye)
+        luzes.enviar()
 
-        p_int = [1.2, 1.0, 1.0, 1.6]
-        p_rng = [12.0, 10.0, 10.0, 14.0]
+        fb_w, fb_h = janela.tamanho_framebuffer()
+        clusters.atualizar(view, vp, fb_w, fb_h)
 
-        cam_pos = (float(cam_eye[0]), float(cam_eye[1]), float(cam_eye[2]))
-
-        desenhar(
-            cubo_ground, translacao(0, -0.51, 0) @ escala(40, 1, 40), vp, programa, view_pos=cam_pos, 
-            dir_dir=dir_dir, dir_color=dir_color, dir_intensity=dir_int, ambient_strength=amb,
-            point_pos=p_pos, point_color=p_col, point_intensity=p_int, point_range=p_rng, tex=text_chao, use_tex=True
-            )
-
-        for p in plataformas:
-            
-            if not getattr(p, "visivel", True):
-                continue
-            
-            vao = cubo_plat1 if p.h == 0 else cubo_plat2
-
-            if p.h == 0:
-                desenhar(
-                    vao,
-                    translacao(p.x, -0.5, p.z) @ escala(p.w, 1, p.d),
-                    vp, programa, view_pos=cam_pos, 
-                    dir_dir=dir_dir, dir_color=dir_color, dir_intensity=dir_int, ambient_strength=amb,
-                    point_pos=p_pos, point_color=p_col, point_intensity=p_int, point_range=p_rng, tex=text_parede, use_tex=True
-                )
-            else:
-                altura = float(p.h)
-                desenhar(
-                    vao,
-                    translacao(p.x, altura / 2.0, p.z) @ escala(p.w, altura, p.d),
-                    vp, programa, view_pos=cam_pos, 
-                    dir_dir=dir_dir, dir_color=dir_color, dir_intensity=dir_int, ambient_strength=amb,
-                    point_pos=p_pos, point_color=p_col, point_intensity=p_int, point_range=p_rng, tex=text_parede, use_tex=True
-                )
-
-        for r in rampas:
-            sz = abs(r.d)
-            sz_draw = -sz if r.d < 0 else sz
-
-            desenhar(
-                vao_rampa_solida,
-                translacao(r.x, r.y0 + 0.001, r.z)
-                @ escala(r.w, (r.y1 - r.y0), sz_draw),
-                vp, programa, view_pos=cam_pos, 
-                dir_dir=dir_dir, dir_color=dir_color, dir_intensity=dir_int, ambient_strength=amb,
-                point_pos=p_pos, point_color=p_col, point_intensity=p_int, point_range=p_rng, tex=text_rampa, use_tex=True
-            )
+        with perfil.escopo("culling"):
+            culling.atualizar(vp)
+            vis_nivel = culling.visiveis(nivel.centros, nivel.extensoes)
 
+        # cenário: uma malha por textura/cor
+        for (papel, malha), visivel in zip(nivel.malhas, vis_nivel):
+            if visivel:
+                fila.enfileirar(malha, IDENTIDADE, tex=tex_mundo[papel], assada=nivel.assado)
 
         # <----------------------------->
         # DESENHA BAÚ
         # <----------------------------->
         if mundo_atual == WORLD_OVER:
-            desenhar(
+            fila.enfileirar(
                 vao_madeira,
-                translacao(bau_x, 0.35, bau_z) @ escala(1.2, 0.7, 0.9),
-                vp, programa, view_pos=cam_pos, 
-                dir_dir=dir_dir, dir_color=dir_color, dir_intensity=dir_int, ambient_strength=amb,
-                point_pos=p_pos, point_color=p_col, point_intensity=p_int, point_range=p_rng
+                trs((bau_x, 0.35, bau_z), esc=(1.2, 0.7, 0.9))
                 )
-            desenhar(
+            fila.enfileirar(
                 vao_madeira,
-                translacao(bau_x, 0.75, bau_z) @ escala(1.25, 0.25, 0.95),
-                vp, programa, view_pos=cam_pos, 
-                dir_dir=dir_dir, dir_color=dir_color, dir_intensity=dir_int, ambient_strength=amb,
-                point_pos=p_pos, point_color=p_col, point_intensity=p_int, point_range=p_rng
+                trs((bau_x, 0.75, bau_z), esc=(1.25, 0.25, 0.95))
                 )
-            desenhar(
+            fila.enfileirar(
                 vao_metal,
-                translacao(bau_x, 0.55, bau_z + 0.48) @ escala(0.25, 0.25, 0.10),
-                vp, programa, view_pos=cam_pos, 
-                dir_dir=dir_dir, dir_color=dir_color, dir_intensity=dir_int, ambient_strength=amb,
-                point_pos=p_pos, point_color=p_col, point_intensity=p_int, point_range=p_rng
+                trs((bau_x, 0.55, bau_z + 0.48), esc=(0.25, 0.25, 0.10))
                 )
 
 
-        model = translacao(ALTAR_X, 0.0, ALTAR_Z) @ escala(2.0, 0.6, 2.0)
-        desenhar(vao_altar, model, vp, programa, view_pos=cam_pos, 
-            dir_dir=dir_dir, dir_color=dir_color, dir_intensity=dir_int, ambient_strength=amb,
-            point_pos=p_pos, point_color=p_col, point_intensity=p_int, point_range=p_rng
-            )
+        model = trs((ALTAR_X, 0.0, ALTAR_Z), esc=(2.0, 0.6, 2.0))
+        fila.enfileirar(vao_altar, model)
 
         if eco_coletavel:
-            model = translacao(ALTAR_X, 1.3, ALTAR_Z) @ escala(0.6, 0.6, 0.6)
-            desenhar(vao_eco, model, vp, programa, view_pos=cam_pos, 
-            dir_dir=dir_dir, dir_color=dir_color, dir_intensity=dir_int, ambient_strength=amb,
-            point_pos=p_pos, point_color=p_col, point_intensity=p_int, point_range=p_rng
-            )
+            model = trs((ALTAR_X, 1.3, ALTAR_Z), esc=(0.6, 0.6, 0.6))
+            fila.enfileirar(vao_eco, model)
 
         if portal_ativo:
-            model = translacao(ALTAR_X, 1.4, ALTAR_Z) @ escala(1.2, 2.2, 0.4)
-            desenhar(vao_portal, model, vp, programa, view_pos=cam_pos, 
-            dir_dir=dir_dir, dir_color=dir_color, dir_intensity=dir_int, ambient_strength=amb,
-            point_pos=p_pos, point_color=p_col, point_intensity=p_int, point_range=p_rng)
+            model = trs((ALTAR_X, 1.4, ALTAR_Z), esc=(1.2, 2.2, 0.4))
+            fila.enfileirar(vao_portal, model)
 
         if player.vivo:
             modelo_player.draw_link(
-                desenhar, programa, vp,
+                fila,
                 player.x, player.y, player.z,
                 player.face, now,
                 andando=player_esta_andando(keys),
                 atacando=player.ataque
             )
 
-        for e in inimigos:
-            if not e.vivo:
+        vivos = [e for e in inimigos if e.vivo]
+        with perfil.escopo("culling"):
+            vis_ini = culling.visiveis([(e.x, e.y + INIMIGO_CULL_DY, e.z) for e in vivos], INIMIGO_CULL_EXT)
+
+        for e, visivel in zip(vivos, vis_ini):
+            if not visivel:
                 continue
 
             face = inimigo_face_para_player(e, player)
 
             if e.tipo == "melee":
-                modelo_inimigos.draw_melee(desenhar, programa, vp, e.x, e.y, e.z, face)
+                modelo_inimigos.draw_melee(fila, e.x, e.y, e.z, face, cam=cam_eye)
             else:
-                modelo_inimigos.draw_ranged(desenhar, programa, vp, e.x, e.y, e.z, face)
+                modelo_inimigos.draw_ranged(fila, e.x, e.y, e.z, face, cam=cam_eye)
 
-            for f in e.flechas_ativas:
-                px, py, pz = float(f["pos"][0]), float(f["pos"][1]), float(f["pos"][2])
-                vx, vz = float(f["vel"][0]), float(f["vel"][2])
-                yaw = math.atan2(vx, vz)
-                desenhar_flecha(desenhar, programa, vp, px, py, pz, yaw, vao_madeira, vao_metal, vao_pena)
+        flechas = [f for e in vivos for f in e.flechas_ativas]
+        with perfil.escopo("culling"):
+            vis_fle = culling.visiveis([f["pos"] for f in flechas], FLECHA_CULL_EXT)
+
+        for f, visivel in zip(flechas, vis_fle):
+            if not visivel:
+                continue
+
+            px, py, pz = float(f["pos"][0]), float(f["pos"][1]), float(f["pos"][2])
+            vx, vz = float(f["vel"][0]), float(f["vel"][2])
+            yaw = math.atan2(vx, vz)
+            desenhar_flecha(fila, px, py, pz, yaw, vao_madeira, vao_metal, vao_pena,
+                            cam=cam_eye, dist_lod=LOD_FLECHA)
 
         # <----------------------------->
         # HUD VIDA
@@ -724,8 +783,6 @@ def main():
 
         vp_hud = ortho(-1, 1, -1, 1)
 
-        glDisable(GL_DEPTH_TEST)
-
         HUD_X = -0.78
         HUD_Y =  0.82
 
@@ -733,14 +790,14 @@ def main():
         HUD_H = 0.06
 
         # Fundo (barra vazia)
-        model_bg = translacao(HUD_X, HUD_Y, 0.0) @ escala(HUD_W, HUD_H, 1.0)
-        desenhar(hud_bg, model_bg, vp_hud, programa, unlit=True)
+        model_bg = trs((HUD_X, HUD_Y, 0.0), esc=(HUD_W, HUD_H, 1.0))
+        fila.enfileirar_hud(hud_bg, model_bg)
 
         fill_w = HUD_W * frac
         shift = (HUD_W - fill_w) * 0.5
 
-        model_hp = translacao(HUD_X - shift, HUD_Y, 0.0) @ escala(fill_w, HUD_H * 0.75, 1.0)
-        desenhar(hud_hp, model_hp, vp_hud, programa, unlit=True)
+        model_hp = trs((HUD_X - shift, HUD_Y, 0.0), esc=(fill_w, HUD_H * 0.75, 1.0))
+        fila.enfileirar_hud(hud_hp, model_hp)
         
         # <----------------------------->
         # HUD FRAGMENTOS (3 mundos)
@@ -753,14 +810,14 @@ def main():
         # fundo "vazio"
         for i in range(3):
             x = FR_X0 + i * FR_GAP
-            desenhar(hud_bg, translacao(x, FR_Y, 0.0) @ escala(FR_S, FR_S, 1.0), vp_hud, programa, unlit=True)
+            fila.enfileirar_hud(hud_bg, trs((x, FR_Y, 0.0), esc=(FR_S, FR_S, 1.0)))
 
         if ecos[WORLD_OVER]:
-            desenhar(vao_ecoV, translacao(FR_X0 + 0 * FR_GAP, FR_Y, 0.0) @ escala(FR_S * 0.85, FR_S * 0.85, 1.0), vp_hud, programa, unlit=True)
+            fila.enfileirar_hud(vao_ecoV, trs((FR_X0 + 0 * FR_GAP, FR_Y, 0.0), esc=(FR_S * 0.85, FR_S * 0.85, 1.0)))
         if ecos[WORLD_ETER]:
-            desenhar(vao_ecoA, translacao(FR_X0 + 1 * FR_GAP, FR_Y, 0.0) @ escala(FR_S * 0.85, FR_S * 0.85, 1.0), vp_hud, programa, unlit=True)
+            fila.enfileirar_hud(vao_ecoA, trs((FR_X0 + 1 * FR_GAP, FR_Y, 0.0), esc=(FR_S * 0.85, FR_S * 0.85, 1.0)))
         if ecos[WORLD_UNDER]:
-            desenhar(vao_ecoR, translacao(FR_X0 + 2 * FR_GAP, FR_Y, 0.0) @ escala(FR_S * 0.85, FR_S * 0.85, 1.0), vp_hud, programa, unlit=True)
+            fila.enfileirar_hud(vao_ecoR, trs((FR_X0 + 2 * FR_GAP, FR_Y, 0.0), esc=(FR_S * 0.85, FR_S * 0.85, 1.0)))
 
         # <----------------------------->
         # OVERLAYS 
@@ -768,23 +825,37 @@ def main():
 
         # tutorial painel
         if tutorial_estado == 1:
-            desenhar(hud_bg, translacao(0.0, 0.0, 0.0) @ escala(1.6, 0.75, 1.0), vp_hud, programa, unlit=True)
-            desenhar(hud_hp, translacao(0.0, 0.18, 0.0) @ escala(1.45, 0.08, 1.0), vp_hud, programa, unlit=True)
-            desenhar(hud_hp, translacao(0.0, 0.05, 0.0) @ escala(1.25, 0.05, 1.0), vp_hud, programa, unlit=True)
-            desenhar(hud_hp, translacao(0.0, -0.05, 0.0) @ escala(1.35, 0.05, 1.0), vp_hud, programa, unlit=True)
-            desenhar(hud_hp, translacao(0.0, -0.20, 0.0) @ escala(0.95, 0.04, 1.0), vp_hud, programa, unlit=True)
+            fila.enfileirar_hud(hud_bg, trs((0.0, 0.0, 0.0), esc=(1.6, 0.75, 1.0)))
+            fila.enfileirar_hud(hud_hp, trs((0.0, 0.18, 0.0), esc=(1.45, 0.08, 1.0)))
+            fila.enfileirar_hud(hud_hp, trs((0.0, 0.05, 0.0), esc=(1.25, 0.05, 1.0)))
+            fila.enfileirar_hud(hud_hp, trs((0.0, -0.05, 0.0), esc=(1.35, 0.05, 1.0)))
+            fila.enfileirar_hud(hud_hp, trs((0.0, -0.20, 0.0), esc=(0.95, 0.04, 1.0)))
 
         # endgame painel
         if endgame_ativo:
-            desenhar(hud_bg, translacao(0.0, 0.0, 0.0) @ escala(1.8, 0.9, 1.0), vp_hud, programa, unlit=True)
-            desenhar(hud_hp, translacao(0.0, 0.22, 0.0) @ escala(1.3, 0.10, 1.0), vp_hud, programa, unlit=True)
-            desenhar(hud_hp, translacao(0.0, 0.02, 0.0) @ escala(1.0, 0.07, 1.0), vp_hud, programa, unlit=True)
-
-        glEnable(GL_DEPTH_TEST)
-
-        glfw.swap_buffers(win)
-
-    glfw.terminate()
+            fila.enfileirar_hud(hud_bg, trs((0.0, 0.0, 0.0), esc=(1.8, 0.9, 1.0)))
+            fila.enfileirar_hud(hud_hp, trs((0.0, 0.22, 0.0), esc=(1.3, 0.10, 1.0)))
+            fila.enfileirar_hud(hud_hp, trs((0.0, 0.02, 0.0), esc=(1.0, 0.07, 1.0)))
+
+        # profiler (F3)
+        if perfil_hud:
+            perfil.overlay(fila, hud_bg)
+
+        fila.flush(vp, vp_hud, cam_eye)
+        culling.novo_frame()
+        modelo_inimigos.lod.novo_frame()
+        lod_flechas.novo_frame()
+
+        estado_gl.novo_frame()
+        janela.trocar_buffers()
+        perfil.novo_frame()
+
+    perfil.destroy()
+    fila.destroy()
+    mundos.destroy()
+    malhas.destroy()   # os caches sobrevivem ao contexto; não deixa ids velhos
+    texturas.destroy()
+    janela.encerrar()
 
 if __name__ == "__main__":
     main()
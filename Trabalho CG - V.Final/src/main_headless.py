@@ -0,0 +1,134 @@
+"""
+Roda o jogo sem janela (EGL ou OSMesa, Mesa llvmpipe serve) desenhando num
+FBO, pra benchmark e teste de regressão por imagem.
+
+Da pasta do projeto (igual ao main.py):
+
+    python src/main_headless.py --frames 300
+    python src/main_headless.py --frames 120 --saida out/ --a-cada 30
+    python src/main_headless.py --frames 120 --a-cada 30 --referencia golden/
+    python src/main_headless.py --frames 300 --teclas "0:W:1,100:SPACE:1,101:SPACE:0" --json tempos.json
+    python src/main_headless.py --frames 300 --perfil perfil.json
+
+Com --referencia, sai com código 1 se algum frame lido diferir da imagem
+de mesmo nome (frame_NNNN.png) em mais de --max-pixels pixels, ou se a
+imagem não existir (no --json: "referencia" com os dois casos).
+"""
+import argparse
+import json
+import os
+import sys
+
+
+def _args():
+    ap = argparse.ArgumentParser(description="Echoes of Dimensions sem janela (FBO)")
+    ap.add_argument("--frames", type=int, default=300)
+    ap.add_argument("--tamanho", default="1600x900", help="LxA do FBO")
+    ap.add_argument("--contexto", choices=("egl", "osmesa"), default="egl")
+    ap.add_argument("--fps", type=float, default=60.0, help="passo do relógio fixo")
+    ap.add_argument("--tempo-real", action="store_true", help="usa o relógio de verdade (não reproduzível)")
+    ap.add_argument("--teclas", default="", help='roteiro "frame:TECLA:1|0,..." (1 = aperta, 0 = solta)')
+    ap.add_argument("--saida", help="pasta pra salvar os frames lidos (PNG)")
+    ap.add_argument("--a-cada", type=int, default=0, help="lê 1 frame a cada N (0 = não lê)")
+    ap.add_argument("--referencia", help="pasta com os PNGs de referência")
+    ap.add_argument("--tolerancia", type=int, default=8, help="diferença por canal ignorada")
+    ap.add_argument("--max-pixels", type=int, default=0, help="pixels diferentes aceitos por frame")
+    ap.add_argument("--descartar", type=int, default=10, help="frames de aquecimento fora da estatística")
+    ap.add_argument("--json", help="grava tempos por frame + resumo")
+    ap.add_argument("--perfil", help="grava o JSON do profiler (escopos de CPU/GPU por passe)")
+    return ap.parse_args()
+
+
+def _roteiro(texto, glfw):
+    teclas = {}
+    for item in filter(None, (t.strip() for t in texto.split(","))):
+        frame, nome, acao = item.split(":")
+        tecla = getattr(glfw, "KEY_" + nome.upper())
+        teclas.setdefault(int(frame), []).append((tecla, glfw.PRESS if acao == "1" else glfw.RELEASE))
+    return teclas
+
+
+def rodar():
+    args = _args()
+
+    # o PyOpenGL fixa a plataforma no primeiro import de OpenGL
+    os.environ["PYOPENGL_PLATFORM"] = args.contexto
+    if args.contexto == "egl":
+        os.environ.setdefault("EGL_PLATFORM", "surfaceless")
+
+    import glfw
+    import numpy as np
+    from PIL import Image
+
+    import main as jogo
+    from core.headless import JanelaHeadless
+    from core.profiler import Profiler
+
+    w, h = (int(x) for x in args.tamanho.lower().split("x"))
+    falhas = []
+    faltando = []
+
+    def ao_ler(i, rgb):
+        nome = f"frame_{i:04d}.png"
+        if args.saida:
+            os.makedirs(args.saida, exist_ok=True)
+            Image.fromarray(rgb).save(os.path.join(args.saida, nome))
+        if args.referencia:
+            caminho = os.path.join(args.referencia, nome)
+            if not os.path.isfile(caminho):
+                print(f"{nome}: sem referência ({caminho})")
+                faltando.append(nome)
+                return
+            ref = np.asarray(Image.open(caminho).convert("RGB"))
+            diff = np.abs(ref.astype(np.int16) - rgb.astype(np.int16)).max(axis=2)
+            n = int((diff > args.tolerancia).sum())
+            print(f"{nome}: max {int(diff.max())}, {n} pixels > {args.tolerancia}")
+            if n > args.max_pixels:
+                falhas.append(nome)
+
+    ler = args.a_cada > 0 and (args.saida or args.referencia)
+    janela = JanelaHeadless(
+        args.frames,
+        contexto=args.contexto,
+        fps=args.fps,
+        tempo_real=args.tempo_real,
+        teclas=_roteiro(args.teclas, glfw),
+        ao_ler=ao_ler if ler else None,
+        ler_a_cada=max(1, args.a_cada),
+    )
+
+    perfil = Profiler(janela=max(1, args.frames))
+    jogo.main(janela, w, h, perfil=perfil)
+
+    resumo = janela.resumo(descartar=min(args.descartar, max(0, janela.frame - 1)))
+    print(f"{resumo['frames']} frames {w}x{h} ({resumo['contexto']}, {resumo['renderer']})")
+    for nome in ("cpu_ms", "gpu_ms"):
+        s = resumo[nome]
+        if s is None:
+            print(f"  {nome}: sem dados")
+        else:
+            print(f"  {nome}: média {s['media']:.2f}  p50 {s['p50']:.2f}  p95 {s['p95']:.2f}  max {s['max']:.2f}")
+
+    for nome, s in sorted(perfil.resumo().items()):
+        if nome != "frame":
+            print(f"  {nome}: p50 {s['p50']:.2f}  p95 {s['p95']:.2f}  p99 {s['p99']:.2f}")
+
+    if args.perfil:
+        perfil.salvar_json(args.perfil)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            saida = {"resumo": resumo, "cpu_ms": janela.cpu_ms, "gpu_ms": janela.gpu_ms}
+            if args.referencia:
+                saida["referencia"] = {"diferentes": falhas, "faltando": faltando}
+            json.dump(saida, f, indent=2)
+
+    if falhas:
+        print("diferente da referência:", ", ".join(falhas))
+    if faltando:
+        print("sem referência:", ", ".join(faltando))
+    return 1 if falhas or faltando else 0
+
+
+if __name__ == "__main__":
+    sys.exit(rodar())